@@ -0,0 +1,54 @@
+# src/app/core/auth_middleware.py
+
+from starlette.requests import HTTPConnection
+from starlette.responses import RedirectResponse
+
+from src.app.core.security import decode_session_token
+
+
+class AuthMiddleware:
+    """
+    Pure ASGI middleware authenticating requests from their `session_token` cookie.
+
+    Sets `request.state.user`, `role` and `user_id` from the token, and redirects requests without a valid token to
+    the login page. Unlike a `@app.middleware("http")` function, it runs no extra task per request and passes the
+    response messages through untouched, so streamed bodies (e.g. report downloads) are not relayed through a
+    memory stream.
+    """
+
+    def __init__(self, app, public_paths=(), login_path: str = "/login"):
+        """
+        Args:
+            app: The ASGI application.
+            public_paths (Iterable[str]): Path prefixes served without authentication.
+            login_path (str): The login page, served to unauthenticated users.
+        """
+        self.app = app
+        self.public_paths = tuple(public_paths)
+        self.login_path = login_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.public_paths):
+            await self.app(scope, receive, send)
+            return
+
+        is_login = scope["path"].startswith(self.login_path)
+        session_token = HTTPConnection(scope).cookies.get("session_token")
+        if not session_token:
+            if not is_login:
+                await RedirectResponse(self.login_path, status_code=307)(scope, receive, send)
+                return
+        else:
+            try:
+                session = decode_session_token(session_token)
+            except Exception:
+                if not is_login:
+                    await RedirectResponse(url=self.login_path, status_code=307)(scope, receive, send)
+                    return
+            else:
+                state = scope.setdefault("state", {})
+                state["user"] = session.username
+                state["role"] = session.role
+                state["user_id"] = session.user_id
+
+        await self.app(scope, receive, send)
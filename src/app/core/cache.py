@@ -0,0 +1,83 @@
+# src/app/core/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+# Every cache created in the process, by name, for the monitoring endpoint
+caches = {}
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a time-to-live and a size bound (least recently used entries are evicted).
+
+    Values must be immutable (tuples, frozensets, ...): they are shared by every request of the worker.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._generation = 0
+        self._lock = threading.Lock()
+        caches[name] = self
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value of `key`, calling `loader()` on a miss or an expired entry.
+
+        A value loaded while the key was being invalidated is returned to the caller but not stored, so an
+        invalidation is never overwritten by data read before it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, *keys):
+        """
+        Drop the given keys, or every entry when no key is given.
+        """
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
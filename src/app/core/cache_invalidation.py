@@ -0,0 +1,230 @@
+# src/app/core/cache_invalidation.py
+#
+# Keeps the in-process caches of every worker consistent with the database.
+#
+# Models are registered with `invalidate_on(model, cache, key)`. When a transaction changes a registered model,
+# a `pg_notify` naming the cache keys is issued in that transaction, so Postgres only delivers it if the
+# transaction commits. Each worker runs `CacheInvalidationListener`, which LISTENs on the channel and evicts the
+# keys; the worker that made the change also evicts them locally on commit, without waiting for the round trip.
+#
+# Instances changed through the unit of work evict their key before and after the change (e.g. both users of a
+# permission moved to another user). Bulk insert/update/delete statements on a registered model do not tell which
+# rows they change, so they clear the whole cache.
+
+import json
+import logging
+import select
+import threading
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+
+from src.app.core.cache import caches, TTLCache
+from src.app.core.database import engine
+
+CHANNEL = "cache_invalidation"
+MAX_PAYLOAD = 7900  # Postgres rejects notification payloads of 8000 bytes or more
+
+# (model, cache, key function) triples registered with `invalidate_on`
+_rules = []
+
+
+def invalidate_on(model, cache: TTLCache, key):
+    """
+    Evict `key(instance)` from `cache`, in every worker, when a transaction inserts, updates or deletes an instance
+    of `model`.
+
+    Args:
+        model: The mapped class to watch.
+        cache (TTLCache): The cache holding data derived from the model.
+        key (Callable): Maps a changed instance to its cache key (an int, str or tuple of them).
+    """
+    _rules.append((model, cache, key))
+
+
+def _encode(cache_name: str, keys):
+    payload = json.dumps({"cache": cache_name, "keys": None if keys is None else sorted(keys, key=repr)})
+    if len(payload) > MAX_PAYLOAD:
+        # Too many keys for one notification: clear the whole cache instead
+        payload = json.dumps({"cache": cache_name, "keys": None})
+    return payload
+
+
+def _decode(payload: str):
+    message = json.loads(payload)
+    keys = message.get("keys")
+    if keys is not None:
+        keys = [tuple(key) if isinstance(key, list) else key for key in keys]
+    return message.get("cache"), keys
+
+
+def _evict(cache_name: str, keys):
+    cache = caches.get(cache_name)
+    if cache is None:
+        return
+    if keys is None:
+        cache.invalidate()
+    elif keys:
+        cache.invalidate(*keys)
+
+
+class _UnknownPrevious(Exception):
+    pass
+
+
+class _Previous:
+    """
+    An instance as it was before its pending changes: its changed attributes read as their previous values.
+    """
+
+    def __init__(self, instance):
+        self._instance = instance
+        self._attrs = inspect(instance).attrs
+
+    def __getattr__(self, name):
+        if name in self._attrs:
+            history = self._attrs[name].history
+            if history.deleted:
+                return history.deleted[0]
+            if history.added:
+                # Changed without the previous value being loaded
+                raise _UnknownPrevious(name)
+        return getattr(self._instance, name)
+
+
+def _announce(session, changed: dict):
+    """
+    Issue the notifications of changed cache keys (None: the whole cache) not yet announced by the transaction.
+    """
+    pending = session.info.setdefault("cache_invalidations", {})
+    connection = session.connection()
+    for cache_name, keys in changed.items():
+        if cache_name in pending and pending[cache_name] is None:
+            continue
+        if keys is None:
+            pending[cache_name] = None
+            payload = _encode(cache_name, None)
+        else:
+            keys.discard(None)
+            new_keys = keys - pending.get(cache_name, set())
+            if not new_keys:
+                continue
+            pending.setdefault(cache_name, set()).update(new_keys)
+            payload = _encode(cache_name, new_keys)
+        # Delivered to the listeners only if this transaction commits
+        connection.execute(sql_select(func.pg_notify(CHANNEL, payload)))
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_changes(session, flush_context):
+    changed = {}
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        for model, cache, key in _rules:
+            if not isinstance(obj, model) or changed.get(cache.name, ()) is None:
+                continue
+            keys = changed.setdefault(cache.name, set())
+            keys.add(key(obj))
+            if obj not in session.new:
+                try:
+                    keys.add(key(_Previous(obj)))
+                except _UnknownPrevious:
+                    changed[cache.name] = None
+    if changed:
+        _announce(session, changed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _notify_bulk_changes(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    changed = {
+        cache.name: None for model, cache, key in _rules if table is not None and table in model.__mapper__.tables
+    }
+    if changed:
+        _announce(orm_execute_state.session, changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_changes(session):
+    for cache_name, keys in session.info.pop("cache_invalidations", {}).items():
+        _evict(cache_name, keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("cache_invalidations", None)
+
+
+class CacheInvalidationListener:
+    """
+    Background thread evicting cache keys announced on the invalidation channel by any worker.
+
+    It holds one dedicated connection outside the pool. If the connection drops, notifications may have been
+    missed, so every cache is cleared once the listener has reconnected.
+    """
+
+    def __init__(self, poll_timeout: float = 5, retry_delay: float = 5):
+        self.poll_timeout = poll_timeout
+        self.retry_delay = retry_delay
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_timeout + 1)
+
+    def _connect(self):
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    def _run(self):
+        reconnecting = False
+        while not self._stop.is_set():
+            try:
+                connection = self._connect()
+            except Exception as e:
+                logging.error(f"Cache invalidation listener cannot connect: {e}")
+                self._stop.wait(self.retry_delay)
+                reconnecting = True
+                continue
+
+            if reconnecting:
+                for cache in caches.values():
+                    cache.invalidate()
+            try:
+                self._listen(connection)
+            except Exception as e:
+                logging.error(f"Cache invalidation listener disconnected: {e}")
+                reconnecting = True
+                self._stop.wait(self.retry_delay)
+            finally:
+                connection.close()
+
+    def _listen(self, connection):
+        while not self._stop.is_set():
+            if select.select([connection], [], [], self.poll_timeout) == ([], [], []):
+                continue
+            connection.poll()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                try:
+                    _evict(*_decode(notification.payload))
+                except (ValueError, TypeError) as e:
+                    logging.error(f"Invalid cache invalidation payload {notification.payload!r}: {e}")
+
+
+listener = CacheInvalidationListener()
@@ -1,5 +1,6 @@
 # src/app/core/config.py
 
+from typing import Optional
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -21,6 +22,13 @@ class Settings(BaseSettings):
     POSTGRES_SERVER: str
     POSTGRES_PORT: int
     POSTGRES_DB: str
+    # Serve the stock and item APIs through an asyncpg engine instead of the sync engine's threadpool
+    DATABASE_ASYNC: bool = False
+    # Defaults to DATABASE_URL with the driver swapped for asyncpg
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connections of the asyncpg engine; requests beyond them wait for a session in arrival order
+    ASYNC_POOL_SIZE: int = 5
+    ASYNC_MAX_OVERFLOW: int = 10
     # POSTGRES_SYNC_PREFIX: str
     # POSTGRES_ASYNC_PREFIX: str
     # POSTGRES_URI: str
@@ -36,6 +44,41 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # Path prefixes served without authentication: the session token is neither read nor verified
+    AUTH_PUBLIC_PATHS: list[str] = ["/static/"]
+    # Seconds a verified session token is reused without checking its signature again (never past its expiry)
+    AUTH_TOKEN_CACHE_TTL: float = 60
+    AUTH_TOKEN_CACHE_SIZE: int = 1024
+
+    # === Caches ===
+    # Seconds an entry is served from an in-process cache before being reloaded. Changes are evicted from every
+    # worker through Postgres LISTEN/NOTIFY, so the TTL only bounds staleness if the listener is disconnected.
+    PERMISSION_CACHE_TTL: float = 3600
+    PERMISSION_CACHE_SIZE: int = 10000
+    REFERENCE_CACHE_TTL: float = 3600
+    REFERENCE_CACHE_SIZE: int = 10000
+    CACHE_INVALIDATION_LISTENER: bool = True
+
+    # === Report jobs ===
+    # Report processes per web worker
+    REPORT_JOB_WORKERS: int = 2
+    # A queued or running job without progress for this long is considered lost, and is not joined by new requests
+    REPORT_JOB_STALE_SECONDS: int = 900
+
+    # === History log ===
+    # Entries logged outside the caller's transaction are queued and written in batches by a background thread
+    HISTORY_LOG_WRITER: bool = True
+    # Entries the queue holds before callers write their entries themselves
+    HISTORY_LOG_BUFFER_SIZE: int = 10000
+    HISTORY_LOG_BATCH_SIZE: int = 500
+    # Seconds a queued entry waits at most before being written
+    HISTORY_LOG_FLUSH_INTERVAL: float = 0.5
+    # Monthly partitions of `history_logs` created ahead of the current month
+    HISTORY_LOG_PARTITIONS_AHEAD: int = 3
+    # Months of partitions kept before the current one; older ones are archived under src/assets/history_archive
+    HISTORY_LOG_RETENTION_MONTHS: int = 24
+    # Days of entries the history page lists by default, so it only scans the recent partitions
+    HISTORY_LOG_DEFAULT_DAYS: int = 90
 
     class Config:
         env_file = "src/.env"
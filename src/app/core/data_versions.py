@@ -0,0 +1,99 @@
+# src/app/core/data_versions.py
+#
+# Per-table change counters for derived data such as generated reports.
+#
+# Tables are registered with `track_versions(model, ...)`. Each transaction that writes to a tracked table, through
+# the ORM or through insert/update/delete statements, increments the table's row in `data_versions` once it has
+# committed, in a transaction of its own: the hot counter rows are never locked by the write transactions, so
+# concurrent stock writes do not queue on them.
+#
+# The version therefore becomes visible just after the data. A report reading the versions in between is built
+# from the new data but recorded under the previous version, and regenerated once more after the bump: readers never
+# keep stale data. If the bump fails, it is logged and the cached reports stay stale until the next write.
+
+import logging
+from datetime import datetime, UTC
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from src.app.models.data_version import DataVersion
+
+# Names of the tracked tables
+_tracked_tables = set()
+
+
+def track_versions(*models):
+    """
+    Keep a change counter for the tables of the given mapped classes.
+    """
+    _tracked_tables.update(model.__tablename__ for model in models)
+
+
+def get_versions(db: Session, table_names) -> dict:
+    """
+    Current versions of the given tables, 0 for tables never written since tracking started.
+
+    Returns:
+        dict: Mapping of table name to version.
+    """
+    table_names = sorted(table_names)
+    versions = dict.fromkeys(table_names, 0)
+    versions.update(
+        db.execute(select(DataVersion.table_name, DataVersion.version)
+                   .where(DataVersion.table_name.in_(table_names))).all()
+    )
+    return versions
+
+
+def _changed_tables(session) -> set:
+    return session.info.setdefault("changed_versioned_tables", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table_name = getattr(obj, "__tablename__", None)
+        if table_name in _tracked_tables:
+            _changed_tables(session).add(table_name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name in _tracked_tables:
+            _changed_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions(session):
+    table_names = session.info.pop("changed_versioned_tables", None)
+    if not table_names:
+        return
+
+    statement = insert(DataVersion).values([
+        {"table_name": table_name, "version": 1, "updated_at": datetime.now(UTC)}
+        for table_name in sorted(table_names)  # fixed order, so concurrent bumps cannot deadlock
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[DataVersion.table_name],
+        set_={"version": DataVersion.version + 1, "updated_at": statement.excluded.updated_at},
+    )
+    bind = session.get_bind()
+    try:
+        if isinstance(bind, Connection):
+            # A session joined to a transaction of its caller: the bump belongs to that transaction
+            bind.execute(statement)
+        else:
+            with bind.begin() as connection:
+                connection.execute(statement)
+    except Exception as e:
+        logging.error(f"Data versions of {', '.join(sorted(table_names))} not bumped: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tables(session):
+    session.info.pop("changed_versioned_tables", None)
@@ -1,9 +1,17 @@
 # src/app/core/database.py
+import asyncio
 import logging
+from datetime import datetime, timedelta, UTC
+from functools import lru_cache
 
-from sqlalchemy import create_engine
+from pydantic import TypeAdapter
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 
 from src.app.core.config import get_settings
 
@@ -11,11 +19,68 @@ settings = get_settings()
 
 
 DATABASE_URL = settings.DATABASE_URL
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
 
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+_PG_EPOCH = datetime(2000, 1, 1)
+
+
+def _encode_timestamp(value: datetime):
+    # The services write timezone-aware UTC datetimes into `timestamp without time zone` columns; psycopg2 drops
+    # the offset, asyncpg rejects them. Store them as naive UTC, as the sync engine does.
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return ((value - _PG_EPOCH) // timedelta(microseconds=1),)
+
+
+def _decode_timestamp(value: tuple):
+    return _PG_EPOCH + timedelta(microseconds=value[0])
+
+
+def make_async_engine(url, **kwargs):
+    """
+    Create an asyncpg engine storing datetimes as the sync engine does.
+
+    Args:
+        url: The database URL, with the `postgresql+asyncpg` driver.
+        **kwargs: Passed to `create_async_engine`.
+
+    Returns:
+        AsyncEngine: The engine.
+    """
+    async_engine = create_async_engine(url, **kwargs)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _register_timestamp_codec(dbapi_connection, connection_record):
+        dbapi_connection.run_async(
+            lambda connection: connection.set_type_codec(
+                "timestamp", schema="pg_catalog", encoder=_encode_timestamp, decoder=_decode_timestamp,
+                format="tuple",
+            )
+        )
+
+    return async_engine
+
+
+# Async engine, only created when enabled so the sync deployment does not need asyncpg.
+# expire_on_commit is off because expired attributes cannot be lazy-loaded once the response is serialized.
+async_engine = make_async_engine(
+    ASYNC_DATABASE_URL, pool_pre_ping=True, pool_size=settings.ASYNC_POOL_SIZE, max_overflow=settings.ASYNC_MAX_OVERFLOW
+) if settings.DATABASE_ASYNC else None
+
+# Sessions of the async engine open at once, one per connection. Unlike the threadpool, the event loop admits every
+# request at once; without this bound they all race for the pool's connections, whose queue is not first come, first
+# served, so under load some requests keep losing the race until they time out.
+_async_sessions = asyncio.Semaphore(settings.ASYNC_POOL_SIZE + settings.ASYNC_MAX_OVERFLOW)
+
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+) if async_engine else None
+
 
 def get_db():
     db = SessionLocal()
@@ -26,3 +91,51 @@ def get_db():
         raise
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with _async_sessions, AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logging.error(f"Database session error: {e}")
+            raise
+
+
+# Session dependency of the async-capable endpoints: AsyncSession when DATABASE_ASYNC is set, Session otherwise
+get_service_db = get_async_db if settings.DATABASE_ASYNC else get_db
+
+
+@lru_cache
+def _response_adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+async def run_db(db, func, *args, async_func=None, response_model=None, **kwargs):
+    """
+    Call a service function from an async endpoint.
+
+    With an AsyncSession, `async_func`, the service's `*_async` variant, is awaited: its queries await asyncpg and
+    its blocking work is handed to the threadpool. Without one, `func` runs through `AsyncSession.run_sync`, which
+    awaits the queries but runs the sync service code itself, ORM work and any file I/O included, on the event loop
+    thread. With a sync Session, `func` runs in the threadpool as before. The session is passed as the `db` keyword
+    argument.
+
+    Pass the endpoint's `response_model` when the function returns ORM instances: they are converted to it in the same
+    call, while attributes expired by the commit or lazy relationships can still be loaded, instead of by the response
+    serialization outside of the session's greenlet.
+    """
+    def convert(result):
+        if response_model is None:
+            return result
+        return _response_adapter(response_model).validate_python(result, from_attributes=True)
+
+    def call(session):
+        return convert(func(*args, db=session, **kwargs))
+
+    if isinstance(db, AsyncSession):
+        if async_func is not None:
+            # The async services keep their instances loaded (expire_on_commit is off) and return no lazy attributes
+            return convert(await async_func(*args, db=db, **kwargs))
+        return await db.run_sync(call)
+    return await run_in_threadpool(call, db)
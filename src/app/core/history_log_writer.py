@@ -0,0 +1,148 @@
+# src/app/core/history_log_writer.py
+#
+# Batched writes of history log entries, so auditing does not add round trips to every business operation.
+#
+# Entries logged as part of the caller's transaction are kept on the session and written with one multi-row INSERT
+# just before it commits (and dropped if it rolls back). Entries logged after the caller's transaction are queued
+# for `HistoryLogWriter`, a background thread writing them in batches through its own sessions. Its queue is
+# bounded: when it is full, or the thread is not running, the caller writes its entries itself. Queued entries are
+# only visible once written, and only the process queueing them can flush them: entries other requests look up
+# (such as approval requests' entries) are logged with the caller's transaction.
+
+import logging
+import queue
+import threading
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from src.app.core.config import get_settings
+from src.app.core.database import SessionLocal
+from src.app.models.history_log import HistoryLog
+
+settings = get_settings()
+
+
+def add_to_transaction(db: Session, rows: list[dict]):
+    """
+    Write history log rows when the session's transaction commits.
+
+    Args:
+        db (Session): The session of the transaction.
+        rows (list[dict]): HistoryLog column values, one dict per entry.
+    """
+    db.info.setdefault("history_log_rows", []).extend(rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_transaction_rows(session):
+    rows = session.info.pop("history_log_rows", None)
+    if rows:
+        session.execute(insert(HistoryLog), rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_transaction_rows(session):
+    session.info.pop("history_log_rows", None)
+
+
+class HistoryLogWriter:
+    """
+    Background thread writing queued history log rows in batches of up to `batch_size`, at least every
+    `flush_interval` seconds while rows are waiting.
+
+    Rows still queued when the process dies are lost; `stop` writes the remaining rows on shutdown.
+    """
+
+    def __init__(self, max_size: int = 10000, batch_size: int = 500, flush_interval: float = 0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def submit(self, rows: list[dict]):
+        """
+        Queue history log rows for the background thread, writing them in the calling thread if it is not running
+        or its queue is full.
+        """
+        if not (self._thread and self._thread.is_alive()):
+            self.write(rows)
+            return
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.write(rows[index:])
+                return
+
+    def flush(self):
+        """
+        Write every queued row now, e.g. before reading entries that may still be queued.
+        """
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return
+            self.write(batch)
+
+    def write(self, rows: list[dict]):
+        """
+        Write history log rows with one multi-row INSERT in a transaction of their own.
+        """
+        if not rows:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(insert(HistoryLog), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    def _take(self, block: bool) -> list[dict]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take(block=True)
+            if not batch:
+                continue
+            try:
+                self.write(batch)
+            except Exception as e:
+                # Retry entry by entry, so one invalid entry does not take the rest of the batch with it
+                logging.error(f"History log batch of {len(batch)} entries failed, retrying one by one: {e}")
+                for row in batch:
+                    try:
+                        self.write([row])
+                    except Exception as e:
+                        logging.error(f"History log writer dropped an entry ({row.get('entity')} "
+                                      f"{row.get('entity_id')} {row.get('action')}): {e}")
+
+
+history_log_writer = HistoryLogWriter(
+    max_size=settings.HISTORY_LOG_BUFFER_SIZE,
+    batch_size=settings.HISTORY_LOG_BATCH_SIZE,
+    flush_interval=settings.HISTORY_LOG_FLUSH_INTERVAL,
+)
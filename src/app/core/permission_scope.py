@@ -0,0 +1,131 @@
+# src/app/core/permission_scope.py
+
+from fastapi import HTTPException
+from sqlalchemy import and_, exists, or_, String, cast, true
+from sqlalchemy.orm import Session, Query
+from src.app.core.rbac import method_map, get_permission_index
+from src.app.models.item import Item
+from src.app.models.permission import Permission, AccessType
+from src.app.models.project import Project
+from src.app.models.stock import Stock
+from src.app.models.stock_balance import StockBalance
+from src.app.models.warehouse import Warehouse
+
+# Access types whose grants include reading
+READ_ACCESS_TYPES = tuple(AccessType(access_type) for access_type, methods in method_map.items() if "get" in methods)
+
+
+class PermissionScope:
+    """
+    Row-level scoping of queries to the rows a user holds grants on, as SQL predicates.
+
+    The predicates are correlated EXISTS subqueries against `permissions` (served by ix_permission_user_entity), so
+    the filtering happens in the database and no id lists are loaded into Python. Grants match as in
+    `has_permission`: the entity and the entity id of a grant may each be "*".
+    """
+
+    @staticmethod
+    def is_unrestricted(db: Session, user_id: int) -> bool:
+        """
+        Whether the user sees every row (admins and superusers). Read from the user's context.
+        """
+        try:
+            user = get_permission_index(user_id, db)
+        except HTTPException:
+            return False
+        return user.role == "admin" or user.is_superuser
+
+    @staticmethod
+    def grant_exists(user_id: int, entity: str, id_column, access_types=READ_ACCESS_TYPES):
+        """
+        EXISTS predicate: the user holds one of `access_types` on the `entity` row whose id is `id_column`.
+
+        Args:
+            user_id (int): The ID of the user.
+            entity (str): The permission entity ("project", "warehouse", "location" or "item").
+            id_column: The column holding the id of the entity in the scoped query.
+            access_types (tuple): The access types that satisfy the check (reading by default).
+
+        Returns:
+            ColumnElement: The predicate, false when `id_column` is NULL.
+        """
+        return and_(
+            id_column.isnot(None),
+            exists().where(
+                Permission.user_id == user_id,
+                Permission.entity.in_([entity, "*"]),
+                Permission.entity_id.in_([cast(id_column, String), "*"]),
+                Permission.access_type.in_(access_types),
+            ),
+        )
+
+    @staticmethod
+    def stocks(user_id: int):
+        """
+        Predicate on Stock: the stock is held by a project or warehouse the user can read.
+        """
+        return or_(
+            PermissionScope.grant_exists(user_id, "project", Stock.project_id),
+            PermissionScope.grant_exists(user_id, "warehouse", Stock.warehouse_id),
+        )
+
+    @staticmethod
+    def stock_balances(user_id: int):
+        """
+        Predicate on StockBalance: the balance is held by a project or warehouse the user can read.
+        """
+        return or_(
+            PermissionScope.grant_exists(user_id, "project", StockBalance.project_id),
+            PermissionScope.grant_exists(user_id, "warehouse", StockBalance.warehouse_id),
+        )
+
+    @staticmethod
+    def items(user_id: int):
+        """
+        Predicate on Item: the user can read the item.
+        """
+        return PermissionScope.grant_exists(user_id, "item", Item.id)
+
+    @staticmethod
+    def projects(user_id: int):
+        """
+        Predicate on Project: the user can read the project.
+        """
+        return PermissionScope.grant_exists(user_id, "project", Project.id)
+
+    @staticmethod
+    def warehouses(user_id: int):
+        """
+        Predicate on Warehouse: the user can read the warehouse.
+        """
+        return PermissionScope.grant_exists(user_id, "warehouse", Warehouse.id)
+
+    @staticmethod
+    def apply(query: Query, db: Session, user_id: int, predicate) -> Query:
+        """
+        Filter a query with a scope predicate, unless the user is unrestricted.
+
+        Args:
+            query (Query): The query to scope.
+            db (Session): The database session.
+            user_id (int): The ID of the user.
+            predicate (Callable): Builds the predicate for the user, e.g. `PermissionScope.stocks`.
+
+        Returns:
+            Query: The scoped query.
+        """
+        if PermissionScope.is_unrestricted(db, user_id):
+            return query
+        return query.filter(predicate(user_id))
+
+    @staticmethod
+    def where(db: Session, user_id: int, predicate):
+        """
+        The scope predicate for Core statements: `true()` for unrestricted users.
+
+        Its arguments follow `AsyncSession.run_sync`, which passes the sync session first:
+        `await db.run_sync(PermissionScope.where, user_id, PermissionScope.items)`.
+        """
+        if PermissionScope.is_unrestricted(db, user_id):
+            return true()
+        return predicate(user_id)
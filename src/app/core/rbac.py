@@ -2,14 +2,28 @@
 
 from fastapi import HTTPException, Request
 from functools import wraps
+from types import MappingProxyType
+from typing import NamedTuple
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 from src.app.models.user import User
 from src.app.models.permission import Permission
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from functools import lru_cache
+from src.app.core.cache import TTLCache
+from src.app.core.cache_invalidation import invalidate_on
+from src.app.core.config import get_settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+settings = get_settings()
+
+# user_id -> PermissionIndex, invalidated when the user or their permissions change
+permission_cache = TTLCache("permissions", ttl=settings.PERMISSION_CACHE_TTL, maxsize=settings.PERMISSION_CACHE_SIZE)
+invalidate_on(User, permission_cache, lambda user: user.id)
+invalidate_on(Permission, permission_cache, lambda permission: permission.user_id)
+
 
 method_map = {
     "read": {"get"},
@@ -28,6 +42,34 @@ method_map = {
     "*": {"get", "post", "put", "patch", "delete"},
 }
 
+# One bit per HTTP method; any other method (head, options, ...) only matches "*" grants
+method_bits = {"get": 1, "post": 2, "put": 4, "patch": 8, "delete": 16}
+OTHER_METHOD_BIT = 32
+access_masks = {
+    access_type: sum(method_bits[method] for method in methods) for access_type, methods in method_map.items()
+}
+access_masks["*"] |= OTHER_METHOD_BIT
+
+# Path entities that only admins reach, whatever the user's grants
+RESTRICTED_ENTITIES = frozenset({"users", "departments", "permissions", "pending_approvals", "history_logs", "restore"})
+
+
+class PermissionIndex(NamedTuple):
+    """
+    A user's role and permissions compiled for constant-time checks, with the user fields the services need, so
+    it serves as the user's context for the whole request (see `get_permission_index`).
+
+    `masks` maps (entity, entity_id), either of which may be "*", to the bitmask of HTTP methods granted on it.
+    `can_approve` tells whether the user's actions need no approval (see `has_approval_privileges`).
+    """
+    role: str
+    permissions: tuple
+    masks: MappingProxyType
+    can_approve: bool = False
+    username: str = None
+    is_superuser: bool = False
+    direct_manager_id: int = None
+
 # def rbac_check(entity: str, access_type: str):
 #     def decorator(request: Request, db: Session = Depends(get_db)):
 #         user = request.state.user  # Extract user details from middleware
@@ -76,7 +118,12 @@ def rbac_check(entity: str, access_type: str):
     def decorator(func):
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            check_permissions(*args, **kwargs)  # Call permissions check
+            db = kwargs.get("db") or next((arg for arg in args if isinstance(arg, (Session, AsyncSession))), None)
+            if isinstance(db, AsyncSession):
+                # Run the check on the async session's connection, without blocking the event loop
+                await db.run_sync(lambda session: check_permissions(*args, **{**kwargs, "db": session}))
+            else:
+                await run_in_threadpool(check_permissions, *args, **kwargs)  # Call permissions check
             return await func(*args, **kwargs)  # Await the wrapped async function
 
         @wraps(func)
@@ -163,47 +210,137 @@ def rbac_check(entity: str, access_type: str):
 #         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@lru_cache
+def compile_permissions(role: str, permissions: tuple, can_approve: bool = False, username: str = None,
+                        is_superuser: bool = False, direct_manager_id: int = None) -> PermissionIndex:
+    """
+    Fold a user's grants into one method bitmask per (entity, entity_id).
+
+    Args:
+        role (str): The role of the user.
+        permissions (tuple): (entity, entity_id, access_type) tuples of the user's permissions.
+        can_approve (bool): Whether the user has approval privileges.
+        username (str): The username, recorded on the user's history log entries.
+        is_superuser (bool): Whether the user is a superuser.
+        direct_manager_id (int): The ID of the user's manager, who may approve their requests.
+
+    Returns:
+        PermissionIndex: The compiled permissions.
+    """
+    masks = {}
+    for entity, entity_id, access_type in permissions:
+        masks[(entity, entity_id)] = masks.get((entity, entity_id), 0) | access_masks.get(access_type, 0)
+    return PermissionIndex(role=role, permissions=permissions, masks=MappingProxyType(masks), can_approve=can_approve,
+                           username=username, is_superuser=is_superuser, direct_manager_id=direct_manager_id)
+
+
+def get_permission_index(user_id: int, db: Session) -> PermissionIndex:
+    """
+    Get a user's compiled permissions from the permission cache, compiling them on a miss.
+
+    The result is also kept on the session, which lives for one request: the permission checks, approval checks and
+    history log entries of a request read it once, without going through the shared cache again.
+
+    Args:
+        user_id (int): The ID of the user.
+        db (Session): The database session, only used on a cache miss.
+
+    Returns:
+        PermissionIndex: The compiled permissions.
+    """
+    contexts = db.info.setdefault("user_contexts", {})
+    if user_id in contexts:
+        return contexts[user_id]
+
+    def load():
+        user = db.query(User.role, User.is_superuser, User.direct_manager_id, User.username).filter(
+            User.id == user_id
+        ).first()
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        rows = db.query(Permission.entity, Permission.entity_id, Permission.access_type).filter(
+            Permission.user_id == user_id
+        ).all()
+        can_approve = bool(user.is_superuser or user.role == "admin" or user.direct_manager_id is None)
+        return compile_permissions(
+            user.role, tuple((row.entity, row.entity_id, row.access_type.value) for row in rows), can_approve,
+            user.username, bool(user.is_superuser), user.direct_manager_id
+        )
+
+    changed = db.info.get("changed_user_ids", ())
+    if user_id in changed or None in changed:
+        # Changed in the session's open transaction (None: an unknown user): the cached entry predates the change
+        return load()
+    contexts[user_id] = permission_cache.get_or_load(user_id, load)
+    return contexts[user_id]
+
+
+def _changed_user_ids(session, obj) -> set:
+    if isinstance(obj, User):
+        return {obj.id}
+    # A permission moved to another user changes the permissions of its previous user too; None when the previous
+    # user was never loaded
+    history = inspect(obj).attrs.user_id.history
+    if history.added and not history.deleted and obj not in session.new:
+        return {obj.user_id, None}
+    return {obj.user_id, *history.deleted}
+
+
+@event.listens_for(Session, "after_flush")
+def _forget_changed_user_contexts(session, flush_context):
+    # A request changing a user or their permissions reads them again, as the permission cache does after the commit
+    changed = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (User, Permission)):
+            changed |= _changed_user_ids(session, obj)
+    if changed:
+        session.info.setdefault("changed_user_ids", set()).update(changed)
+        contexts = session.info.get("user_contexts", {})
+        for user_id in changed if None not in changed else list(contexts):
+            contexts.pop(user_id, None)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _end_user_changes(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        session.info.get("user_contexts", {}).pop(user_id, None)
+
+
 def get_permissions_for_user(user_id: int, db: Session):
     """
-    Cache user permissions to improve performance in high-traffic environments.
+    Get a user's permissions as (entity, entity_id, access_type) tuples, from the permission cache.
     """
-    return db.query(Permission).filter(Permission.user_id == user_id).all()
+    return get_permission_index(user_id, db).permissions
+
+
+def invalidate_permissions(*user_ids: int):
+    """
+    Drop cached permissions of the given users, or of every user when none is given.
+    """
+    permission_cache.invalidate(*user_ids)
 
 
 def has_permission(db: Session, user_id: int, entity: str, entity_id: str, access_type: str) -> bool:
-    # Query the user from the database
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    # Compiled role and permissions of the user, from the cache
+    index = get_permission_index(user_id, db)
 
     # Admins have all permissions
-    if user.role == "admin":
+    if index.role == "admin":
         return True
 
-    # Query permissions for the user
-    permissions = get_permissions_for_user(user_id, db)
+    if entity in RESTRICTED_ENTITIES:
+        return False
 
-    for permission in permissions:
-        # Check if permission matches exactly or with wildcards
-        if (
-                (permission.entity in {entity, "*"} and entity not in ["users", "departments", "permissions",
-                                                                       "pending_approvals", "history_logs",
-                                                                       "restore"]) and
-                permission.entity_id in {str(entity_id), "*"} and
-                (
-                    permission.access_type == "*" or
-                    access_type in method_map.get(permission.access_type, set())
-                )
-        ):
-            return True
-
-    # Raise exception if no matching permission found
-    return False
+    # Check if permission matches exactly or with wildcards
+    entity_id = str(entity_id)
+    masks = index.masks
+    granted = (
+        masks.get((entity, entity_id), 0) | masks.get((entity, "*"), 0) |
+        masks.get(("*", entity_id), 0) | masks.get(("*", "*"), 0)
+    )
+    return bool(granted & method_bits.get(access_type, OTHER_METHOD_BIT))
 
 
 def has_approval_privileges(db: Session, user_id: int):
-    user = db.query(User).filter(User.id == user_id).first()
-    if user.is_superuser or user.role == "admin" or user.direct_manager_id is None:
-        return True
-    return False
+    # Superusers, admins and users without a manager act without approval; read from the permission cache
+    return get_permission_index(user_id, db).can_approve
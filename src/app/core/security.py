@@ -1,9 +1,14 @@
 # src/app/core/security.py
 
+import hashlib
+import time
+from typing import NamedTuple
+
 from passlib.context import CryptContext
 from jose import jwt, ExpiredSignatureError
 from datetime import datetime, timedelta, UTC
 from fastapi import HTTPException, status
+from src.app.core.cache import TTLCache
 from src.app.core.config import get_settings
 
 settings = get_settings()
@@ -13,6 +18,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# SHA-256 digest of a session token -> its verified SessionUser, so a page load and its assets cost one signature check
+token_cache = TTLCache("session_tokens", ttl=settings.AUTH_TOKEN_CACHE_TTL, maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+class SessionUser(NamedTuple):
+    username: str
+    role: str
+    user_id: int
+    expires_at: float
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -45,3 +60,30 @@ def decode_access_token(token: str):
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+def decode_session_token(token: str) -> SessionUser:
+    """
+    Verify a session token, reusing the result of a recent verification of the same token.
+
+    Args:
+        token (str): The session token.
+
+    Returns:
+        SessionUser: The user of the token.
+
+    Raises:
+        HTTPException: 401 if the token is invalid or expired.
+    """
+    def load():
+        payload = decode_access_token(token)
+        return SessionUser(payload["sub"], payload["role"], payload["id"], payload["exp"])
+
+    session = token_cache.get_or_load(hashlib.sha256(token.encode()).digest(), load)
+    if session.expires_at <= time.time():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return session
@@ -9,3 +9,9 @@ from .warehouse import Warehouse
 from .invoice import Invoice
 from .pending_approval import PendingApproval, ApprovalStatus
 from .history_log import HistoryLog
+from .stock_balance import StockBalance
+from .stock_movement import StockMovement, MovementType
+from .stock_snapshot import StockSnapshot, StockSnapshotBalance
+from .report_job import ReportJob, ReportJobStatus
+from .data_version import DataVersion
+from .report import Report
@@ -0,0 +1,16 @@
+# src/app/models/data_version.py
+
+from datetime import datetime, UTC
+from sqlalchemy import Column, String, BigInteger, DateTime
+from src.app.core.database import Base
+
+
+class DataVersion(Base):
+    """
+    Change counter of a table, bumped after every transaction that writes to it (see `core.data_versions`).
+    """
+    __tablename__ = "data_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
@@ -1,26 +1,37 @@
 # src/app/models/history_log.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from datetime import datetime, UTC
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, DDL, Index, event
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from src.app.core.database import Base
 
 
 class HistoryLog(Base):
+    """
+    Audit trail entry. The table is partitioned by month of `request_at` (see `HistoryLogPartitionService`), so the
+    primary key includes it.
+
+    The names of the entity, requester and approver are captured when the entry is written, so listings need no joins
+    and keep showing them after the entity is deleted.
+    """
     __tablename__ = "history_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     entity = Column(String, nullable=False)
     entity_id = Column(Integer, nullable=True)
+    entity_name = Column(String, nullable=True)
     entity_metadata = Column(JSONB, nullable=True)  # Store metadata as JSON
     action = Column(String, nullable=False)
     details = Column(Text, nullable=True)
 
     requested_by = Column(Integer, ForeignKey("users.id"), nullable=False)
-    request_at = Column(DateTime, nullable=True)
+    request_at = Column(DateTime, primary_key=True, default=lambda: datetime.now(UTC))
+    requester_name = Column(String, nullable=True)
 
     approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     approval_at = Column(DateTime, nullable=True)
+    approver_name = Column(String, nullable=True)
 
     # Relationships
     requester = relationship("User", foreign_keys=[requested_by], back_populates="history_logs_requested")
@@ -61,3 +72,23 @@ class HistoryLog(Base):
         primaryjoin="and_(HistoryLog.entity == 'invoice', foreign(HistoryLog.entity_id) == Invoice.id)",
         viewonly=True
     )
+
+    __table_args__ = (
+        # Keyset pagination of the history listing, newest first
+        Index("ix_history_logs_request_at_id", request_at.desc(), id.desc()),
+        # Timelines of an entity, a requester and an approver: each is one range scan in timeline order
+        Index("ix_history_logs_entity_timeline", entity, entity_id, request_at.desc(), id.desc()),
+        Index("ix_history_logs_requester_timeline", requested_by, request_at.desc(), id.desc()),
+        Index("ix_history_logs_approver_timeline", approved_by, approval_at.desc(), id.desc()),
+        # Containment (@>) and jsonpath (@?) searches of the metadata
+        Index("ix_history_logs_entity_metadata", entity_metadata, postgresql_using="gin",
+              postgresql_ops={"entity_metadata": "jsonb_path_ops"}),
+        {"postgresql_partition_by": "RANGE (request_at)"},
+    )
+
+
+# Catches rows outside the monthly partitions until `HistoryLogPartitionService.ensure_partitions` moves them
+event.listen(
+    HistoryLog.__table__, "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS history_logs_default PARTITION OF history_logs DEFAULT")
+)
@@ -2,7 +2,7 @@
 import json
 from typing import Dict, Any
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum, func, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum, func, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from src.app.core.database import Base
@@ -26,7 +26,7 @@ class PendingApproval(Base):
     new_value = Column(JSONB, nullable=False)  # Stores the proposed new value as JSONB
 
     requested_by = Column(Integer, ForeignKey("users.id"), nullable=False)  # Requested by
-    requested_at = Column(DateTime, default=datetime.now(UTC))
+    requested_at = Column(DateTime, default=lambda: datetime.now(UTC))
 
     approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     approved_at = Column(DateTime, nullable=True)
@@ -82,6 +82,10 @@ class PendingApproval(Base):
     # Unique constraint for actions other than "create"
     __table_args__ = (
         UniqueConstraint('entity', 'entity_id', 'action', name='uq_entity_entityid_action'),
+        # Audit searches: containment (@>) and jsonpath (@?) on the proposed values, within a time window
+        Index("ix_pending_approvals_new_value", "new_value", postgresql_using="gin",
+              postgresql_ops={"new_value": "jsonb_path_ops"}),
+        Index("ix_pending_approvals_requested_at", "requested_at"),
     )
 
     # # Automatic serialization/deserialization of new_value
@@ -12,7 +12,7 @@ class Project(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
-    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
     budget = Column(Float, nullable=True)  # Optional budget for the project
     description = Column(Text, nullable=True)  # Additional description
 
@@ -0,0 +1,31 @@
+# src/app/models/report.py
+
+from datetime import datetime, UTC
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from src.app.core.database import Base
+
+
+class Report(Base):
+    """
+    Catalog entry of a generated report file, so listing reports does not scan the reports directory.
+
+    Files found in the directory without an entry (see `src.scripts.reconcile_reports`) have no report, parameters,
+    row count or creator.
+    """
+    __tablename__ = "reports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, unique=True)  # File name in the reports directory
+    report = Column(String, nullable=True)  # e.g. "get_stock_by_item"
+    params = Column(JSONB, nullable=True)
+    file_format = Column(String, nullable=True)
+    size_bytes = Column(BigInteger, nullable=False, default=0)
+    rows_written = Column(Integer, nullable=True)
+    generated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+    duration_ms = Column(Integer, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_report_generated_at", "generated_at"),
+    )
@@ -0,0 +1,44 @@
+# src/app/models/report_job.py
+
+import enum
+from datetime import datetime, UTC
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from src.app.core.database import Base
+
+
+class ReportJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ReportJob(Base):
+    """
+    A report generated in the background. Identical requests share the job while it is queued or running, found
+    through `params_hash`.
+    """
+    __tablename__ = "report_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    report = Column(String, nullable=False)  # e.g. "stock", "entity", "stock_by_entity_type"
+    params = Column(JSONB, nullable=False, default=dict)
+    file_format = Column(String, nullable=False, default="xlsx")
+    params_hash = Column(String(64), nullable=False)
+
+    status = Column(Enum(ReportJobStatus), nullable=False, default=ReportJobStatus.QUEUED)
+    rows_written = Column(Integer, nullable=False, default=0)
+    file_name = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Refreshed on every progress update; queued or running jobs not refreshed for a while are considered lost
+    heartbeat_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+
+    __table_args__ = (
+        Index("ix_report_job_params_hash_status", "params_hash", "status"),
+    )
@@ -1,7 +1,7 @@
 # src/app/model/stock.py
 
 from datetime import datetime, UTC
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Enum, Boolean, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Enum, Boolean, Text, Index
 from sqlalchemy.orm import relationship, validates
 from src.app.core.database import Base
 from src.app.models.pending_approval import ApprovalStatus
@@ -78,6 +78,15 @@ class Stock(Base):
         viewonly=True
     )
 
+    # Indexes matching the StockService/ReportService access paths
+    __table_args__ = (
+        # Movements: item_id = ? AND project_id = ? AND warehouse_id = ?, rows locked in id order
+        Index("ix_stock_item_holder", "item_id", "project_id", "warehouse_id", "id"),
+        # Per-warehouse and per-project listings (also the location filters, via warehouse/project ids)
+        Index("ix_stock_warehouse_item", "warehouse_id", "item_id", postgresql_where=warehouse_id.isnot(None)),
+        Index("ix_stock_project_item", "project_id", "item_id", postgresql_where=project_id.isnot(None)),
+    )
+
     @validates("warehouse_id", "project_id")
     def validate_exclusive_relationship(self, key, value):
         if self.warehouse_id and self.project_id:
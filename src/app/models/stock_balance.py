@@ -0,0 +1,42 @@
+# src/app/models/stock_balance.py
+
+from datetime import datetime, UTC
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import relationship
+from src.app.core.database import Base
+
+
+class StockBalance(Base):
+    """
+    Rollup of `stocks.quantity` per item and holder (warehouse or project).
+
+    Maintained in the same transaction as every stock movement, so totals are read from here instead of
+    aggregating the whole stocks table.
+    """
+    __tablename__ = "stock_balances"
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)  # Null if held by a warehouse
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=True)  # Null if held by a project
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True, index=True)  # Location of the holder
+    quantity = Column(Float, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+
+    # Relationships
+    item = relationship("Item")
+    project = relationship("Project")
+    warehouse = relationship("Warehouse")
+    location = relationship("Location")
+
+    # One balance row per (item, holder); NULL holders are folded to 0 so they take part in the uniqueness
+    __table_args__ = (
+        Index(
+            "uq_stock_balance_item_holder",
+            "item_id",
+            func.coalesce(project_id, 0),
+            func.coalesce(warehouse_id, 0),
+            unique=True,
+        ),
+    )
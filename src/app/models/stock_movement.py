@@ -0,0 +1,47 @@
+# src/app/models/stock_movement.py
+
+import enum
+from datetime import datetime, UTC
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+from src.app.core.database import Base
+
+
+class MovementType(str, enum.Enum):
+    ADD = "add"
+    DEDUCT = "deduct"
+    TRANSFER_OUT = "transfer_out"
+    TRANSFER_IN = "transfer_in"
+
+
+class StockMovement(Base):
+    """
+    Append-only ledger of stock movements, one row per add, deduct or transfer leg.
+
+    Rows are never updated or deleted; `balance_after` is the holder's balance right after the movement.
+    """
+    __tablename__ = "stock_movements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)  # Null if held by a warehouse
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=True)  # Null if held by a project
+    movement_type = Column(Enum(MovementType), nullable=False)
+    transfer_id = Column(String, nullable=True)  # Shared by both legs of a transfer
+
+    quantity_delta = Column(Float, nullable=False)  # Positive for additions, negative for deductions
+    cost_price = Column(Float, nullable=True)  # Unit cost of the moved quantity
+    balance_after = Column(Float, nullable=False)  # Holder balance after this movement
+
+    moved_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    moved_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+
+    # Relationships
+    item = relationship("Item")
+    project = relationship("Project")
+    warehouse = relationship("Warehouse")
+    mover = relationship("User")
+
+    __table_args__ = (
+        Index("ix_stock_movement_item_holder", "item_id", "project_id", "warehouse_id", "id"),
+    )
@@ -0,0 +1,47 @@
+# src/app/models/stock_snapshot.py
+
+from datetime import datetime, UTC
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import relationship
+from src.app.core.database import Base
+
+
+class StockSnapshot(Base):
+    """
+    A point-in-time copy of every stock balance, taken periodically on top of the stock movement ledger.
+
+    `last_movement_id` is the last ledger row included in the snapshot; later movements are replayed from there.
+    """
+    __tablename__ = "stock_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    taken_at = Column(DateTime, nullable=False, index=True, default=lambda: datetime.now(UTC))
+    last_movement_id = Column(Integer, nullable=False, default=0)
+
+    # Relationships
+    balances = relationship("StockSnapshotBalance", back_populates="snapshot")
+
+
+class StockSnapshotBalance(Base):
+    __tablename__ = "stock_snapshot_balances"
+
+    id = Column(Integer, primary_key=True, index=True)
+    snapshot_id = Column(Integer, ForeignKey("stock_snapshots.id", ondelete="CASCADE"), nullable=False)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=True)
+    quantity = Column(Float, nullable=False)
+
+    # Relationships
+    snapshot = relationship("StockSnapshot", back_populates="balances")
+
+    __table_args__ = (
+        Index(
+            "uq_stock_snapshot_balance_item_holder",
+            "snapshot_id",
+            "item_id",
+            func.coalesce(project_id, 0),
+            func.coalesce(warehouse_id, 0),
+            unique=True,
+        ),
+    )
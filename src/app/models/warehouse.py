@@ -12,7 +12,7 @@ class Warehouse(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
-    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
     capacity = Column(Float, nullable=True)  # Capacity of the warehouse (optional)
     description = Column(Text, nullable=True)  # Additional description
 
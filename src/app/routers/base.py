@@ -6,15 +6,17 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from sqlalchemy import func
 from sqlalchemy.orm import Session
+from src.app.core.cache import caches
 from src.app.core.database import get_db
+from src.app.core.permission_scope import PermissionScope
 from src.app.core.rbac import get_permissions_for_user, has_permission
 from src.app.models.item import Item
 from src.app.models.project import Project
-from src.app.models.stock import Stock
+from src.app.models.stock_balance import StockBalance
 from src.app.models.warehouse import Warehouse
 from starlette.responses import RedirectResponse
 
-from src.app.core.security import decode_access_token
+from src.app.core.security import decode_session_token
 
 router = APIRouter()
 templates = Jinja2Templates(directory="src/web/templates")
@@ -30,6 +32,14 @@ def health_check(settings: Settings = Depends(get_settings)):
     }
 
 
+@router.get("/health/caches")
+def cache_stats():
+    """
+    Size and hit/miss counters of this worker's in-process caches.
+    """
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
 @router.get("/", response_class=HTMLResponse)
 def dashboard_page(request: Request, db: Session = Depends(get_db)):
     # Get the session_token from the cookie
@@ -38,7 +48,7 @@ def dashboard_page(request: Request, db: Session = Depends(get_db)):
         return RedirectResponse(url="/login", status_code=307)
 
     # Optionally, decode the token to access user info
-    payload = decode_access_token(session_token)
+    decode_session_token(session_token)
 
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
@@ -54,22 +64,30 @@ async def get_dashboard_metrics(request: Request, db: Session = Depends(get_db))
         return templates.TemplateResponse("error.html", {"request": request,"status_code": 401,
                                                          "message": "Not authenticated"})
 
-    total_items = db.query(Item).filter(Item.is_active == True).count()
-    total_warehouses = db.query(Warehouse).filter(Warehouse.is_active == True).count()
-    total_projects = db.query(Project).filter(Project.is_active == True).count()
-    total_stock = db.query(func.sum(Stock.quantity)).scalar() or 0
+    # Only the items, holders and stock the user can read, filtered in SQL
+    user_id = request.state.user_id
+
+    def scoped(query, predicate):
+        return PermissionScope.apply(query, db, user_id, predicate)
+
+    total_items = scoped(db.query(Item).filter(Item.is_active == True), PermissionScope.items).count()
+    total_warehouses = scoped(
+        db.query(Warehouse).filter(Warehouse.is_active == True), PermissionScope.warehouses
+    ).count()
+    total_projects = scoped(db.query(Project).filter(Project.is_active == True), PermissionScope.projects).count()
+    total_stock = scoped(db.query(func.sum(StockBalance.quantity)), PermissionScope.stock_balances).scalar() or 0
 
     # Stock distribution by warehouse/project
-    stock_distribution = (
+    stock_distribution = scoped(
         db.query(
             func.coalesce(Warehouse.name, Project.name).label("entity_name"),
-            func.sum(Stock.quantity).label("total_quantity"),
+            func.sum(StockBalance.quantity).label("total_quantity"),
         )
-        .outerjoin(Warehouse, Stock.warehouse_id == Warehouse.id)
-        .outerjoin(Project, Stock.project_id == Project.id)
-        .group_by("entity_name")
-        .all()
-    )
+        .outerjoin(Warehouse, StockBalance.warehouse_id == Warehouse.id)
+        .outerjoin(Project, StockBalance.project_id == Project.id)
+        .filter(StockBalance.quantity != 0),
+        PermissionScope.stock_balances,
+    ).group_by("entity_name").all()
 
     distribution_data = {row.entity_name: row.total_quantity for row in stock_distribution}
 
@@ -1,81 +1,102 @@
 # src/app/routers/history_logs.py
 
+from datetime import datetime, timedelta, UTC
+
 from fastapi import APIRouter, Request, Depends
-from sqlalchemy import case, String, cast, func
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm import Session
+from src.app.core.config import get_settings
 from src.app.core.database import get_db
 from src.app.core.rbac import rbac_check
-from src.app.models import HistoryLog, Item, Project, Warehouse, Location, User, Department, Invoice
+from src.app.services.history_log_service import HistoryLogService, TIMELINE_PAGE_SIZE
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 
 router = APIRouter()
 templates = Jinja2Templates(directory="src/web/templates")
+settings = get_settings()
 
 
 @router.get("/", response_class=HTMLResponse)
 @rbac_check(entity="history_logs", access_type="manage")  # Highlight: Added decorator
-def history_logs_page(request: Request, db: Session = Depends(get_db), page: int = 1, size: int = 10):
+def history_logs_page(request: Request, db: Session = Depends(get_db), size: int = 10,
+                      days: int = settings.HISTORY_LOG_DEFAULT_DAYS, after: str = None, before: str = None):
     """
-    List all locations with pagination.
+    List the history logs of the last `days` days, newest first, a page at a time.
+
+    The page is read by keyset: `after` and `before` are the cursors of the next and previous pages. The window on
+    `request_at` lets the query skip the older monthly partitions of `history_logs`.
     """
-    total_logs = db.query(HistoryLog).count()  # Total number of logs
-    offset = (page - 1) * size
-
-    # Create aliases for the User model
-    Requester = aliased(User)
-    Approver = aliased(User)
-
-    # Query history logs with resolved entity and usernames
-    history_logs_query = (db.query(
-        HistoryLog.id,
-        HistoryLog.entity,
-        HistoryLog.entity_metadata,
-        HistoryLog.action,
-        HistoryLog.details,
-        HistoryLog.request_at,
-        HistoryLog.approval_at,
-        HistoryLog.entity_id,
-        Requester.username.label("requester_name"),  # Use requester relationship
-        Approver.username.label("approver_name"),  # Use approver relationship
-        case((
-            HistoryLog.entity == "item",
-            func.coalesce(Item.item_code, HistoryLog.entity_metadata['item_code'].astext)),
-            (HistoryLog.entity == "user", func.coalesce(User.username, HistoryLog.entity_metadata['username'].astext)),
-            (HistoryLog.entity == "project", func.coalesce(Project.name, HistoryLog.entity_metadata['name'].astext)),
-            (HistoryLog.entity == "warehouse",
-             func.coalesce(Warehouse.name, HistoryLog.entity_metadata['name'].astext)),
-            (HistoryLog.entity == "location", func.coalesce(Location.name, HistoryLog.entity_metadata['name'].astext)),
-            (HistoryLog.entity == "department",
-             func.coalesce(Department.name, HistoryLog.entity_metadata['name'].astext)),
-            (HistoryLog.entity == "invoice",
-             func.coalesce(Invoice.number, HistoryLog.entity_metadata['number'].astext)),
-            else_=cast(HistoryLog.entity_id, String),
-        ).label("entity_display_name")  # Dynamically resolve entity name
-    )
-          .distinct(HistoryLog.id)  # Ensure unique HistoryLog.id entries
-          .outerjoin(Requester, HistoryLog.requested_by == Requester.id)  # Resolve requester
-          .outerjoin(Approver, HistoryLog.approved_by == Approver.id)  # Resolve approver
-          .outerjoin(Item, (HistoryLog.entity == "item") & (HistoryLog.entity_id == Item.id))
-          .outerjoin(Project, (HistoryLog.entity == "project") & (HistoryLog.entity_id == Project.id))
-          .outerjoin(Warehouse,
-                     (HistoryLog.entity == "warehouse") & (HistoryLog.entity_id == Warehouse.id))
-          .outerjoin(Location,
-                     (HistoryLog.entity == "location") & (HistoryLog.entity_id == Location.id))
-          .outerjoin(Department,
-                     (HistoryLog.entity == "department") & (HistoryLog.entity_id == Department.id))
-          .outerjoin(Invoice, (HistoryLog.entity == "invoice") & (HistoryLog.entity_id == Invoice.id))
-          .offset(offset)
-          .limit(size))
-
-    history_logs = history_logs_query.all()
+    since = (datetime.now(UTC) - timedelta(days=max(days, 1))).replace(tzinfo=None)
+    page = HistoryLogService.list_page(db, since, size, after=after, before=before)
 
     return templates.TemplateResponse("history_logs.html", {
         "request": request,
-        "history_logs": history_logs,
-        "page": page,
+        "history_logs": page["logs"],
+        "next_cursor": page["next_cursor"],
+        "prev_cursor": page["prev_cursor"],
+        "estimated_total": page["estimated_total"],
         "size": size,
-        "total_pages": (total_logs + size - 1) // size,  # Calculate total pages
+        "days": days,
         "user_id": request.state.user_id,
         "user_role": request.state.role
     })
+
+
+@router.get("/timeline/entity/{entity}/{entity_id}")
+@rbac_check(entity="history_logs", access_type="read")
+def entity_timeline(entity: str, entity_id: int, request: Request, db: Session = Depends(get_db),
+                    cursor: str = None, limit: int = TIMELINE_PAGE_SIZE):
+    """
+    Stream the audit trail of an entity, newest first. Pass the returned `next_cursor` to get the older entries.
+    """
+    return StreamingResponse(
+        HistoryLogService.stream_timeline("entity", entity, entity_id, cursor=cursor, limit=limit),
+        media_type="application/json",
+    )
+
+
+@router.get("/timeline/requester/{user_id}")
+@rbac_check(entity="history_logs", access_type="read")
+def requester_timeline(user_id: int, request: Request, db: Session = Depends(get_db), cursor: str = None,
+                       limit: int = TIMELINE_PAGE_SIZE):
+    """
+    Stream the entries requested by a user, newest first. Pass the returned `next_cursor` to get the older entries.
+    """
+    return StreamingResponse(
+        HistoryLogService.stream_timeline("requester", user_id, cursor=cursor, limit=limit),
+        media_type="application/json",
+    )
+
+
+@router.get("/timeline/approver/{user_id}")
+@rbac_check(entity="history_logs", access_type="read")
+def approver_timeline(user_id: int, request: Request, db: Session = Depends(get_db), cursor: str = None,
+                      limit: int = TIMELINE_PAGE_SIZE):
+    """
+    Stream the entries approved by a user, most recently approved first. Pass the returned `next_cursor` to get the
+    older entries.
+    """
+    return StreamingResponse(
+        HistoryLogService.stream_timeline("approver", user_id, cursor=cursor, limit=limit),
+        media_type="application/json",
+    )
+
+
+@router.get("/search")
+@rbac_check(entity="history_logs", access_type="read")
+def search_history(request: Request, db: Session = Depends(get_db), source: str = "history", contains: str = None,
+                   path: str = None, since: datetime = None, until: datetime = None, cursor: str = None,
+                   limit: int = TIMELINE_PAGE_SIZE):
+    """
+    Stream the audit entries whose JSON matches the filters, newest first: the history log metadata, or the proposed
+    values of the pending approvals with `source=pending_approvals`.
+
+    `contains` is JSON the value must contain, e.g. `{"warehouse_id": 12}`; `path` is a jsonpath it must match, e.g.
+    `$.supplier ? (@ == "X")`. The search covers the last `HISTORY_LOG_DEFAULT_DAYS` days unless `since` is given.
+    """
+    if since is None:
+        since = (datetime.now(UTC) - timedelta(days=settings.HISTORY_LOG_DEFAULT_DAYS)).replace(tzinfo=None)
+    return StreamingResponse(
+        HistoryLogService.stream_search(db, source, contains, path, since, until, cursor=cursor, limit=limit),
+        media_type="application/json",
+    )
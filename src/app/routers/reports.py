@@ -1,9 +1,14 @@
 # src/app/routers/reports.py
 
-from fastapi import APIRouter, Request, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Request, Depends, Query
 from sqlalchemy.orm import Session
 from src.app.core.database import get_db
 from src.app.core.rbac import rbac_check
+from src.app.schemas.report import ReportJobCreate, ReportJobResponse
+from src.app.services.report_job_service import ReportJobService
+from src.app.services.report_query_service import REPORT_PAGE_SIZE
 from src.app.services.report_service import ReportService
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
@@ -24,41 +29,72 @@ def reports_page(request: Request, db: Session = Depends(get_db)):
 
 @router.get("/list")
 @rbac_check(entity="reports", access_type="read")  # Highlight: Added decorator
-def list_reports(request: Request, db: Session = Depends(get_db)):
-    return ReportService.list_reports()
+def list_reports(request: Request, db: Session = Depends(get_db), page: int = 1, size: int = 50):
+    return ReportService.list_reports(db, page, size)
 
 
 @router.post("/generate")
 @rbac_check(entity="reports", access_type="create")  # Highlight: Added decorator
-def generate_report(request: Request, db: Session = Depends(get_db)):
-    return ReportService.generate_report(db)
+def generate_report(request: Request, db: Session = Depends(get_db), file_format: str = Query("xlsx", alias="format")):
+    # The full stock report is generated in the background; poll /reports/jobs/{id} for the file
+    job = ReportJobService.submit_job(db, "stock", {}, file_format, request.state.user_id)
+    return {"message": "Report generation started.", "job": job}
+
+
+@router.post("/jobs", response_model=ReportJobResponse)
+@rbac_check(entity="reports", access_type="create")
+def submit_report_job(request: Request, job: ReportJobCreate, db: Session = Depends(get_db)):
+    return ReportJobService.submit_job(db, job.report, job.params, job.format, request.state.user_id)
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+@rbac_check(entity="reports", access_type="read")
+def get_report_job(request: Request, job_id: int, db: Session = Depends(get_db)):
+    return ReportJobService.get_job(db, job_id)
 
 
 @router.get("/{entity_type}")
 @rbac_check(entity="reports", access_type="read")  # Highlight: Added decorator
-def entity_report(request: Request, entity_type: str, db: Session = Depends(get_db)):
-    return ReportService.entity_report(entity_type, request.state.user_id, db)
+def entity_report(request: Request, entity_type: str, db: Session = Depends(get_db),
+                  file_format: str = Query("xlsx", alias="format"), cursor: Optional[str] = None,
+                  limit: int = REPORT_PAGE_SIZE, fields: Optional[str] = None):
+    return ReportService.entity_report(entity_type, request.state.user_id, db, file_format, cursor, limit, fields)
 
 
 @router.get("/stock/item/{item_id}")
 @rbac_check(entity="reports", access_type="read")  # Highlight: Added decorator
-def get_stock_by_item(request: Request, item_id: int, db: Session = Depends(get_db)):
-    return ReportService.get_stock_by_item(item_id, db)
+def get_stock_by_item(request: Request, item_id: int, db: Session = Depends(get_db),
+                      file_format: str = Query("xlsx", alias="format"), cursor: Optional[str] = None,
+                      limit: int = REPORT_PAGE_SIZE, fields: Optional[str] = None):
+    return ReportService.get_stock_by_item(item_id, db, file_format, request.state.user_id, cursor, limit, fields)
+
+
+@router.get("/stock/rollup")
+@rbac_check(entity="reports", access_type="read")
+def get_stock_rollup(request: Request, db: Session = Depends(get_db)):
+    # Item, warehouse, project, location and grand totals in one round trip
+    return ReportService.get_stock_rollup(db, request.state.user_id)
 
 
 @router.get("/stock/{entity_type}")
 @rbac_check(entity="reports", access_type="read")  # Highlight: Added decorator
-def get_stock_by_entity_type(request: Request, entity_type: str, db: Session = Depends(get_db)):
-    return ReportService.get_stock_by_entity_type(entity_type, db)
+def get_stock_by_entity_type(request: Request, entity_type: str, db: Session = Depends(get_db),
+                             file_format: str = Query("xlsx", alias="format"), cursor: Optional[str] = None,
+                             limit: int = REPORT_PAGE_SIZE, fields: Optional[str] = None):
+    return ReportService.get_stock_by_entity_type(entity_type, db, file_format, request.state.user_id, cursor, limit,
+                                                  fields)
 
 
 @router.get("/stock/{entity_type}/{entity_id}")
 @rbac_check(entity="reports", access_type="read")  # Highlight: Added decorator
-def get_stock_by_entity_and_id(request: Request, entity_type: str, entity_id: int, db: Session = Depends(get_db)):
-    return ReportService.get_stock_by_entity_and_id(entity_type, entity_id, db)
+def get_stock_by_entity_and_id(request: Request, entity_type: str, entity_id: int, db: Session = Depends(get_db),
+                               file_format: str = Query("xlsx", alias="format"), cursor: Optional[str] = None,
+                               limit: int = REPORT_PAGE_SIZE, fields: Optional[str] = None):
+    return ReportService.get_stock_by_entity_and_id(entity_type, entity_id, db, file_format,
+                                                     request.state.user_id, cursor, limit, fields)
 
 
 @router.delete("/delete")
 @rbac_check(entity="reports", access_type="delete")  # Highlight: Added decorator
 def delete_report(request: Request, data: dict, db: Session = Depends(get_db)):
-    return ReportService.delete_report(data)
+    return ReportService.delete_report(data, db)
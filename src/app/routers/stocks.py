@@ -1,12 +1,14 @@
 # src/app/routers/stock.py
 
+from datetime import datetime
 from fastapi import APIRouter, Request, Depends
-from sqlalchemy import or_
 from sqlalchemy.orm import Session, joinedload
-from src.app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.app.core.database import get_db, get_service_db, run_db
+from src.app.core.permission_scope import PermissionScope
 from src.app.core.rbac import rbac_check
-from src.app.models import Permission, User
 from src.app.services.stock_service import StockService
+from src.app.services.stock_movement_service import StockMovementService
 from src.app.schemas.stock import StockCreate, StockDeduct, StockResponse, StockTransfer
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
@@ -32,52 +34,14 @@ def stock_page(request: Request, db: Session = Depends(get_db), page: int = 1, s
             .joinedload(Warehouse.location),  # Load Location via Warehouse
         )
 
+        # Only the stocks held by projects and warehouses the user can read, filtered in SQL
+        stocks_query = PermissionScope.apply(stocks_query, db, request.state.user_id, PermissionScope.stocks)
+
         total_stock = stocks_query.count()  # Total number of items
         offset = (page - 1) * size
         total_pages = (total_stock + size - 1) // size  # Calculate total pages
 
-        user = db.query(User).filter(User.id == request.state.user_id).first()
-        if user.role == "admin" or user.is_superuser:
-            stocks = stocks_query.offset(offset).limit(size).all()
-        else:
-            # Query user permissions
-            permissions = db.query(Permission).filter(Permission.user_id == request.state.user_id).all()
-
-            # Initialize project and warehouse IDs
-            project_ids = []
-            warehouse_ids = []
-
-            # Process permissions
-            for perm in permissions:
-                if perm.entity == "*":
-                    project_ids = [proj.id for proj in db.query(Project.id).all()]
-                    warehouse_ids = [wh.id for wh in db.query(Warehouse.id).all()]
-                else:
-                    if perm.entity == "project" and perm.access_type in {"READ", "ALL"}:
-                        if perm.entity_id == "*":
-                            # Global project access: fetch all project IDs
-                            project_ids = [proj.id for proj in db.query(Project.id).all()]
-                            break  # No need to process further; user has access to all projects
-                        else:
-                            project_ids.append(int(perm.entity_id))
-
-                    if perm.entity == "warehouse" and perm.access_type in {"READ", "ALL"}:
-                        if perm.entity_id == "*":
-                            # Global warehouse access: fetch all warehouse IDs
-                            warehouse_ids = [wh.id for wh in db.query(Warehouse.id).all()]
-                            break  # No need to process further; user has access to all warehouses
-                        else:
-                            warehouse_ids.append(int(perm.entity_id))
-
-            # Filter stocks by permitted project or warehouse IDs
-            stocks = stocks_query.filter(
-                or_(
-                    Stock.project_id.in_(project_ids) if project_ids else False,
-                    # Include project filter only if there are IDs
-                    Stock.warehouse_id.in_(warehouse_ids) if warehouse_ids else False
-                    # Include warehouse filter only if there are IDs
-                )
-            ).offset(offset).limit(size).all()
+        stocks = stocks_query.order_by(Stock.id).offset(offset).limit(size).all()
 
         items = db.query(Item).filter(Item.is_active == True).all()
         projects = db.query(Project).filter(Project.is_active == True).all()
@@ -102,83 +66,123 @@ def stock_page(request: Request, db: Session = Depends(get_db), page: int = 1, s
 
 @router.post("/add", response_model=StockResponse)
 @rbac_check(entity="stocks", access_type="write")  # Highlight: Added decorator
-def add_stock(request: Request, stock: StockCreate, db: Session = Depends(get_db)):
-    return StockService.add_stock(stock, request.state.user_id, db)
+async def add_stock(request: Request, stock: StockCreate, db: AsyncSession | Session = Depends(get_service_db)):
+    return await run_db(db, StockService.add_stock, stock, request.state.user_id, response_model=StockResponse,
+                        async_func=StockService.add_stock_async)
+
+
+@router.post("/add/bulk", response_model=list[StockResponse])
+@rbac_check(entity="stocks", access_type="write")  # Highlight: Added decorator
+async def add_stock_bulk(request: Request, stocks: list[StockCreate],
+                         db: AsyncSession | Session = Depends(get_service_db)):
+    return await run_db(db, StockService.add_stock_bulk, stocks, request.state.user_id,
+                        response_model=list[StockResponse],
+                        async_func=StockService.add_stock_bulk_async)
 
 
 @router.post("/deduct", response_model=list[StockResponse])
 @rbac_check(entity="stocks", access_type="write")  # Highlight: Added decorator
-def deduct_stock(request: Request, stock: StockDeduct, db: Session = Depends(get_db)):
-    return StockService.deduct_stock(stock, request.state.user_id, db)
+async def deduct_stock(request: Request, stock: StockDeduct, db: AsyncSession | Session = Depends(get_service_db)):
+    return await run_db(db, StockService.deduct_stock, stock, request.state.user_id, response_model=list[StockResponse],
+                        async_func=StockService.deduct_stock_async)
 
 
 @router.post("/transfer", response_model=StockResponse)
 @rbac_check(entity="stocks", access_type="write")  # Highlight: Added decorator
-def transfer_stock(request: Request, stock: StockTransfer, db: Session = Depends(get_db)):
-    return StockService.transfer_stock(stock, request.state.user_id, db)
+async def transfer_stock(request: Request, stock: StockTransfer, db: AsyncSession | Session = Depends(get_service_db)):
+    return await run_db(db, StockService.transfer_stock, stock, request.state.user_id, response_model=StockResponse,
+                        async_func=StockService.transfer_stock_async)
 
 
 @router.get("/location/{location_id}", response_model=list[StockResponse])
 @rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
-def get_items_by_location(request: Request, location_id: int, db: Session = Depends(get_db)):
+async def get_items_by_location(request: Request, location_id: int,
+                                db: AsyncSession | Session = Depends(get_service_db)):
     """
     Retrieve stock items by location.
     """
-    return StockService.get_stock_by_location_or_project_or_warehouse(db, location_id=location_id)
+    return await run_db(db, StockService.get_stock_by_location_or_project_or_warehouse, location_id=location_id,
+                        response_model=list[StockResponse],
+                        async_func=StockService.get_stock_by_location_or_project_or_warehouse_async)
 
 
 @router.get("/warehouse/{warehouse_id}", response_model=list[StockResponse])
 @rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
-def get_items_by_warehouse(request: Request, warehouse_id: int, db: Session = Depends(get_db)):
+async def get_items_by_warehouse(request: Request, warehouse_id: int,
+                                 db: AsyncSession | Session = Depends(get_service_db)):
     """
     Retrieve stock items by warehouse.
     """
-    return StockService.get_stock_by_location_or_project_or_warehouse(db, warehouse_id=warehouse_id)
+    return await run_db(db, StockService.get_stock_by_location_or_project_or_warehouse, warehouse_id=warehouse_id,
+                        response_model=list[StockResponse],
+                        async_func=StockService.get_stock_by_location_or_project_or_warehouse_async)
 
 
 @router.get("/project/{project_id}", response_model=list[StockResponse])
 @rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
-def get_items_by_project(request: Request, project_id: int, db: Session = Depends(get_db)):
+async def get_items_by_project(request: Request, project_id: int, db: AsyncSession | Session = Depends(get_service_db)):
     """
     Retrieve stock items by project.
     """
-    return StockService.get_stock_by_location_or_project_or_warehouse(db, project_id=project_id)
+    return await run_db(db, StockService.get_stock_by_location_or_project_or_warehouse, project_id=project_id,
+                        response_model=list[StockResponse],
+                        async_func=StockService.get_stock_by_location_or_project_or_warehouse_async)
 
 
 @router.get("/item/{item_id}/location/{location_id}", response_model=list[StockResponse])
 @rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
-def get_item_locations_and_quantities(request: Request, item_id: int, location_id: int, db: Session = Depends(get_db)):
-    return StockService.get_stock_of_item_by_location_or_project_or_warehouse(
-        db, item_id=item_id, location_id=location_id)
+async def get_item_locations_and_quantities(request: Request, item_id: int, location_id: int,
+                                            db: AsyncSession | Session = Depends(get_service_db)):
+    return await run_db(db, StockService.get_stock_of_item_by_location_or_project_or_warehouse,
+                        item_id=item_id, location_id=location_id, response_model=list[StockResponse],
+                        async_func=StockService.get_stock_of_item_by_location_or_project_or_warehouse_async)
 
 
 @router.get("/item/{item_id}/warehouse/{warehouse_id}", response_model=list[StockResponse])
 @rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
-def get_item_locations_and_quantities(request: Request, item_id: int, warehouse_id: int, db: Session = Depends(get_db)):
-    return StockService.get_stock_of_item_by_location_or_project_or_warehouse(
-        db, item_id=item_id, warehouse_id=warehouse_id)
+async def get_item_locations_and_quantities(request: Request, item_id: int, warehouse_id: int,
+                                            db: AsyncSession | Session = Depends(get_service_db)):
+    return await run_db(db, StockService.get_stock_of_item_by_location_or_project_or_warehouse,
+                        item_id=item_id, warehouse_id=warehouse_id, response_model=list[StockResponse],
+                        async_func=StockService.get_stock_of_item_by_location_or_project_or_warehouse_async)
 
 
 @router.get("/item/{item_id}/project/{project_id}", response_model=list[StockResponse])
 @rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
-def get_item_locations_and_quantities(request: Request, item_id: int, project_id: int, db: Session = Depends(get_db)):
-    return StockService.get_stock_of_item_by_location_or_project_or_warehouse(
-        db, item_id=item_id, project_id=project_id)
+async def get_item_locations_and_quantities(request: Request, item_id: int, project_id: int,
+                                            db: AsyncSession | Session = Depends(get_service_db)):
+    return await run_db(db, StockService.get_stock_of_item_by_location_or_project_or_warehouse,
+                        item_id=item_id, project_id=project_id, response_model=list[StockResponse],
+                        async_func=StockService.get_stock_of_item_by_location_or_project_or_warehouse_async)
 
 
 @router.get("/item/{item_id}/locations", response_model=list[dict])
 @rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
-def get_item_locations_and_quantities(request: Request, item_id: int, db: Session = Depends(get_db)):
+async def get_item_locations_and_quantities(request: Request, item_id: int,
+                                            db: AsyncSession | Session = Depends(get_service_db)):
     """
     Retrieve locations and quantities of an item across projects and warehouses.
     """
-    return StockService.get_item_location_and_qty(db, item_id=item_id)
+    return await run_db(db, StockService.get_item_location_and_qty, item_id=item_id,
+                        async_func=StockService.get_item_location_and_qty_async)
 
 
 @router.get("/item/{item_id}/total", response_model=dict)
 @rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
-def get_total_stock_by_item(request: Request, item_id: int, db: Session = Depends(get_db)):
+async def get_total_stock_by_item(request: Request, item_id: int, db: AsyncSession | Session = Depends(get_service_db)):
     """
     Retrieve total stock of an item across all locations.
     """
-    return StockService.get_total_stock_by_item(db, item_id=item_id)
+    return await run_db(db, StockService.get_total_stock_by_item, item_id=item_id,
+                        async_func=StockService.get_total_stock_by_item_async)
+
+
+@router.get("/item/{item_id}/as_of", response_model=dict)
+@rbac_check(entity="stocks", access_type="read")  # Highlight: Added decorator
+async def get_stock_as_of(request: Request, item_id: int, as_of: datetime, project_id: int = None,
+                          warehouse_id: int = None, db: AsyncSession | Session = Depends(get_service_db)):
+    """
+    Retrieve the stock of an item held by a project or warehouse at a point in time.
+    """
+    return await run_db(db, StockMovementService.get_balance_as_of, item_id=item_id, as_of=as_of,
+                        project_id=project_id, warehouse_id=warehouse_id)
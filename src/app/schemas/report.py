@@ -0,0 +1,25 @@
+# src/app/schemas/report.py
+
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class ReportJobCreate(BaseModel):
+    report: str  # "stock", "entity", "stock_by_entity_type", "stock_by_entity" or "stock_by_item"
+    params: dict = {}  # e.g. {"entity_type": "warehouse", "entity_id": 1}
+    format: str = "xlsx"  # "xlsx", "csv" or "csv.gz"
+
+
+class ReportJobResponse(BaseModel):
+    id: int
+    report: str
+    params: dict
+    format: str
+    status: str
+    rows_written: int
+    file_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,233 @@
+# src/app/services/history_log_partition_service.py
+
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime, UTC
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.app.core.config import get_settings
+from src.app.models.history_log import HistoryLog
+from src.app.services.history_log_service import HistoryLogService
+
+settings = get_settings()
+
+ARCHIVE_DIR = "src/assets/history_archive"
+DEFAULT_PARTITION = "history_logs_default"
+PARTITION_NAME = re.compile(r"^history_logs_(\d{4})_(\d{2})$")
+
+# Serializes partition changes between workers running `ensure_partitions` at startup
+PARTITION_LOCK = 0x686c6f67  # "hlog"
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"history_logs_{month:%Y_%m}"
+
+
+class HistoryLogPartitionService:
+    """
+    Monthly range partitions of `history_logs` on `request_at`.
+
+    Each month has its own partition, created ahead of time; rows falling outside them land in the default
+    partition and are moved into their month's partition by the next `ensure_partitions`. Partitions older than the
+    retention period are detached, exported to a gzipped CSV file under `ARCHIVE_DIR` and dropped.
+    """
+
+    @staticmethod
+    def is_partitioned(db: Session) -> bool:
+        return bool(db.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('history_logs'))"
+        )).scalar())
+
+    @staticmethod
+    def partitions(db: Session, attached: bool = True) -> list[tuple[str, date]]:
+        """
+        The monthly partitions, oldest first.
+
+        Args:
+            db (Session): The database session.
+            attached (bool): List the attached partitions, or the detached ones left by an interrupted archival.
+
+        Returns:
+            list[tuple[str, date]]: (table name, first day of the month) pairs.
+        """
+        rows = db.execute(text("""
+            SELECT c.relname, EXISTS (
+                SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid AND i.inhparent = to_regclass('history_logs')
+            ) AS attached
+            FROM pg_class c
+            WHERE c.relkind = 'r' AND c.relnamespace = 'public'::regnamespace AND c.relname LIKE 'history\\_logs\\_%'
+        """)).all()
+        months = []
+        for name, is_attached in rows:
+            match = PARTITION_NAME.match(name)
+            if match and is_attached == attached:
+                months.append((name, date(int(match[1]), int(match[2]), 1)))
+        return sorted(months, key=lambda partition: partition[1])
+
+    @staticmethod
+    def ensure_partitions(db: Session, months_ahead: int = None, months=()) -> list[str]:
+        """
+        Create the partitions of the current month, the next `months_ahead` months, the given months and the months
+        of any rows in the default partition, moving those rows into their partitions. Commits.
+
+        Args:
+            db (Session): The database session.
+            months_ahead (int): Months to create ahead of the current one; `HISTORY_LOG_PARTITIONS_AHEAD` by default.
+            months (Iterable[date]): Other months to create, e.g. those of rows about to be loaded.
+
+        Returns:
+            list[str]: The names of the created partitions.
+        """
+        if months_ahead is None:
+            months_ahead = settings.HISTORY_LOG_PARTITIONS_AHEAD
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK})
+
+        current = month_start(datetime.now(UTC))
+        wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        wanted.update(month_start(month) for month in months)
+        stray = {
+            month_start(month) for month in db.execute(text(
+                f"SELECT DISTINCT date_trunc('month', request_at) FROM {DEFAULT_PARTITION}"
+            )).scalars()
+        }
+        existing = {month for _, month in HistoryLogPartitionService.partitions(db)}
+
+        created = []
+        for month in sorted((wanted | stray) - existing):
+            name = partition_name(month)
+            bounds = {"start": month, "end": add_months(month, 1)}
+            if month in stray:
+                # A partition cannot be created over rows of the default partition: move them out meanwhile
+                db.execute(text(f"ALTER TABLE history_logs DETACH PARTITION {DEFAULT_PARTITION}"))
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF history_logs FOR VALUES FROM ('{month}') "
+                    f"TO ('{bounds['end']}')"
+                ))
+                db.execute(text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                    f"WHERE request_at >= :start AND request_at < :end RETURNING *) "
+                    f"INSERT INTO history_logs SELECT * FROM moved"
+                ), bounds)
+                db.execute(text(f"ALTER TABLE history_logs ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+            else:
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF history_logs FOR VALUES FROM ('{month}') "
+                    f"TO ('{bounds['end']}')"
+                ))
+            created.append(name)
+
+        db.commit()
+        return created
+
+    @staticmethod
+    def archive(db: Session, retention_months: int = None, archive_dir: str = ARCHIVE_DIR) -> list[str]:
+        """
+        Detach the partitions older than the retention period, export each to `<archive_dir>/<partition>.csv.gz`
+        and drop it.
+
+        A partition is only dropped once its file is complete; a partition left detached by a failed export is
+        exported again by the next run.
+
+        Args:
+            db (Session): The database session.
+            retention_months (int): Months kept before the current one; `HISTORY_LOG_RETENTION_MONTHS` by default.
+            archive_dir (str): The directory of the archive files.
+
+        Returns:
+            list[str]: The paths of the written archive files.
+        """
+        if retention_months is None:
+            retention_months = settings.HISTORY_LOG_RETENTION_MONTHS
+        cutoff = add_months(month_start(datetime.now(UTC)), -retention_months)
+
+        for name, month in HistoryLogPartitionService.partitions(db):
+            if month < cutoff:
+                db.execute(text(f"ALTER TABLE history_logs DETACH PARTITION {name}"))
+                db.commit()
+
+        os.makedirs(archive_dir, exist_ok=True)
+        files = []
+        for name, _ in HistoryLogPartitionService.partitions(db, attached=False):
+            file_path = f"{archive_dir}/{name}.csv.gz"
+            temp_path = f"{file_path}.tmp"
+            cursor = db.connection().connection.cursor()
+            try:
+                with gzip.open(temp_path, "wt", encoding="utf-8", newline="") as file:
+                    cursor.copy_expert(f"COPY (SELECT * FROM {name} ORDER BY id) TO STDOUT WITH (FORMAT csv, HEADER)",
+                                       file)
+                os.replace(temp_path, file_path)
+            finally:
+                cursor.close()
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+            logging.info(f"History log partition {name} archived to {file_path}")
+            files.append(file_path)
+        return files
+
+    @staticmethod
+    def convert(db: Session) -> int:
+        """
+        Replace an unpartitioned `history_logs` table by the partitioned one, copying its rows. Commits.
+
+        Rows without `request_at` are filed under their approval time, or the time of the conversion. Names missing
+        from the copied rows are filled in (see `HistoryLogService.backfill_names`).
+
+        Returns:
+            int: The number of copied rows, or -1 if the table is already partitioned.
+        """
+        if HistoryLogPartitionService.is_partitioned(db):
+            return -1
+
+        db.execute(text("LOCK TABLE history_logs IN ACCESS EXCLUSIVE MODE"))
+        db.execute(text("ALTER TABLE history_logs RENAME TO history_logs_unpartitioned"))
+        # Free the names the partitioned table's sequence and indexes are created with
+        db.execute(text("ALTER SEQUENCE IF EXISTS history_logs_id_seq RENAME TO history_logs_unpartitioned_id_seq"))
+        for index_name in db.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = 'public' AND tablename = 'history_logs_unpartitioned'"
+        )).scalars():
+            db.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_unpartitioned"'))
+
+        HistoryLog.__table__.create(bind=db.connection())
+        months = db.execute(text(
+            "SELECT DISTINCT date_trunc('month', COALESCE(request_at, approval_at, now() AT TIME ZONE 'UTC')) "
+            "FROM history_logs_unpartitioned"
+        )).scalars().all()
+        HistoryLogPartitionService.ensure_partitions(db, months=months)
+
+        legacy_columns = set(db.execute(text(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = 'public' "
+            "AND table_name = 'history_logs_unpartitioned'"
+        )).scalars())
+        columns = [column.name for column in HistoryLog.__table__.columns if column.name in legacy_columns]
+        selected = [
+            "COALESCE(request_at, approval_at, now() AT TIME ZONE 'UTC')" if name == "request_at" else name
+            for name in columns
+        ]
+        copied = db.execute(text(
+            f"INSERT INTO history_logs ({', '.join(columns)}) "
+            f"SELECT {', '.join(selected)} FROM history_logs_unpartitioned"
+        )).rowcount
+        db.execute(text(
+            "SELECT setval(pg_get_serial_sequence('history_logs', 'id'), "
+            "(SELECT COALESCE(max(id), 0) + 1 FROM history_logs), false)"
+        ))
+        db.execute(text("DROP TABLE history_logs_unpartitioned"))
+        db.commit()
+        HistoryLogService.backfill_names(db)
+        return copied
@@ -1,46 +1,168 @@
 # src/app/services/history_log_service.py
 
+import json
 
+from sqlalchemy import String, cast, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONPATH
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from datetime import datetime, UTC
-from src.app.core.rbac import has_approval_privileges
-from src.app.models.history_log import HistoryLog
+from src.app.core.database import SessionLocal
+from src.app.core.history_log_writer import add_to_transaction, history_log_writer
+from src.app.core.rbac import get_permission_index
+from src.app.models import (HistoryLog, PendingApproval, Item, Project, Warehouse, Location, User, Department,
+                            Invoice)
+from src.app.services.reference_data_service import ReferenceDataService
+from src.app.utils.cursor import encode_cursor, decode_cursor
+
+# Entity -> (model, name column, metadata key) of the name shown for the entries of each named entity; the metadata
+# holds the name of permanently deleted entities
+ENTITY_NAMES = {
+    "item": (Item, Item.item_code, "item_code"),
+    "user": (User, User.username, "username"),
+    "project": (Project, Project.name, "name"),
+    "warehouse": (Warehouse, Warehouse.name, "name"),
+    "location": (Location, Location.name, "name"),
+    "department": (Department, Department.name, "name"),
+    "invoice": (Invoice, Invoice.number, "number"),
+}
+
+# Names served from the reference data cache
+CACHED_NAMES = (Location, Warehouse, Project)
+
+# Entries returned per timeline response, by default and at most, and fetched per round trip while streaming them
+TIMELINE_PAGE_SIZE = 1000
+MAX_TIMELINE_PAGE_SIZE = 10000
+TIMELINE_BATCH_SIZE = 500
+
+# Search source -> (model, searched JSONB column, request time column)
+SEARCH_SOURCES = {
+    "history": (HistoryLog, HistoryLog.entity_metadata, HistoryLog.request_at),
+    "pending_approvals": (PendingApproval, PendingApproval.new_value, PendingApproval.requested_at),
+}
 
 
 class HistoryLogService:
     @staticmethod
-    def log_action(db: Session, entity: str, entity_id: int, action: str, requester_id: int, metadata: dict = None):
+    def log_entry(db: Session, entity: str, entity_id: int, action: str, requester_id: int, metadata: dict = None,
+                  at: datetime = None) -> dict:
+        """
+        Build the column values of a history log entry, approved on the spot if the requester has approval
+        privileges. The requester's privileges and username are read from the permission cache.
+
+        Returns:
+            dict: HistoryLog column values.
+        """
+        at = at or datetime.now(UTC)
+        requester = get_permission_index(requester_id, db)
+        privileged = requester.can_approve
+        return {
+            "entity": entity,
+            "entity_id": entity_id,
+            "entity_name": HistoryLogService.entity_name(db, entity, entity_id, metadata),
+            "action": action,
+            "requested_by": requester_id,
+            "request_at": at,
+            "requester_name": requester.username,
+            "entity_metadata": metadata,
+            "details": "Done with privileges" if privileged else None,
+            "approved_by": requester_id if privileged else None,
+            "approval_at": at if privileged else None,
+            "approver_name": requester.username if privileged else None,
+        }
+
+    @staticmethod
+    def entity_name(db: Session, entity: str, entity_id: int, metadata: dict = None):
+        """
+        The name shown for an entity in the history logs: its code, name or number, taken from the metadata if it no
+        longer exists, or its ID for entities without a name (e.g. stock).
+
+        Args:
+            db (Session): Database session.
+            entity (str): The entity type.
+            entity_id (int): The ID of the entity.
+            metadata (dict, optional): The metadata of the entry.
+
+        Returns:
+            str: The name, or None without an entity ID.
+        """
+        if entity_id is None:
+            return None
+        if entity not in ENTITY_NAMES:
+            return str(entity_id)
+
+        model, column, key = ENTITY_NAMES[entity]
+        if model in CACHED_NAMES:
+            try:
+                name = ReferenceDataService.get_name(db, model, entity_id)
+            except HTTPException:
+                name = None
+        else:
+            name = db.query(column).filter(model.id == entity_id).scalar()
+        if name is None and metadata:
+            name = metadata.get(key)
+        return name
+
+    @staticmethod
+    def log_action(db: Session, entity: str, entity_id: int, action: str, requester_id: int, metadata: dict = None,
+                   commit: bool = True):
         """
         Create a history log entry.
 
+        The entry is not written by this call: it is batched with the other entries of the caller's transaction, or
+        with those of other requests (see `core.history_log_writer`). Entries that must be readable once the call
+        returns, e.g. to be updated by `approval_log_action`, are logged with `commit=False`.
+
         Args:
             db (Session): Database session.
             entity (str): The entity type (e.g., "item", "project").
             entity_id (int): The ID of the entity affected by the action.
             action (str): The action performed (e.g., "create", "update", "delete").
             requester_id (int): ID of the user who performed the action or approve it.
+            commit (bool, optional): Write the entry in the background, independently of the caller's transaction.
+                Pass False to write the entry as part of the caller's transaction, when it commits.
 
         Returns:
-            HistoryLog: The created history log entry.
+            HistoryLog: The history log entry, not attached to the session: its ID is only assigned when written.
         """
-        log_entry = HistoryLog(entity=entity, entity_id=entity_id, action=action, requested_by=requester_id,
-                               request_at=datetime.now(UTC), entity_metadata=metadata)
-        db.add(log_entry)
-        db.commit()
+        row = HistoryLogService.log_entry(db, entity, entity_id, action, requester_id, metadata)
+        if commit:
+            history_log_writer.submit([row])
+        else:
+            add_to_transaction(db, [row])
+        return HistoryLog(**row)
 
-        if has_approval_privileges(db, requester_id):
-            HistoryLogService.approval_log_action(db, entity, entity_id, requester_id, "Done with privileges",
-                                                  log_entry.id)
+    @staticmethod
+    def log_actions_bulk(db: Session, entity: str, action: str, requester_id: int, entries: list[tuple[int, dict]]):
+        """
+        Create many history log entries, written with the caller's transaction in one multi-row INSERT.
+
+        Args:
+            db (Session): Database session.
+            entity (str): The entity type (e.g., "item", "stock").
+            action (str): The action performed (e.g., "add").
+            requester_id (int): ID of the user who performed the action.
+            entries (list[tuple[int, dict]]): Pairs of (entity_id, metadata), one per log entry.
+        """
+        if not entries:
+            return
 
-        return log_entry
+        now = datetime.now(UTC)
+        add_to_transaction(db, [
+            HistoryLogService.log_entry(db, entity, entity_id, action, requester_id, metadata, now)
+            for entity_id, metadata in entries
+        ])
 
     @staticmethod
     def approval_log_action(db: Session, entity: str, entity_id: int, user_id: int, details: str = None,
-                            id: int = None):
+                            id: int = None, action: str = None, requested_by: int = None):
         """
         Update a history log entry.
 
+        Without an ID, the entry updated is the latest unapproved entry of the action on the entity, requested by
+        `requested_by` if given.
+
         Args:
             db (Session): Database session.
             id (int): The ID of the log.
@@ -48,30 +170,367 @@ class HistoryLogService:
             entity_id (int): The ID of the entity affected by the action.
             user_id (int): ID of the user who performed the action or approve it.
             details (str, optional): A summary of the changes made.
+            action (str, optional): The action of the entry, required without an ID.
+            requested_by (int, optional): ID of the user who requested the action.
 
         Returns:
             HistoryLog: The update history log entry.
         """
         if not id:
-            exist_log_entry = db.query(HistoryLog).filter(
+            query = db.query(HistoryLog).filter(
                 HistoryLog.entity == entity,
-                HistoryLog.entity_id == entity_id
-            ).first()
+                HistoryLog.entity_id == entity_id,
+                HistoryLog.action == action,
+                HistoryLog.approved_by.is_(None),
+            )
+            if requested_by is not None:
+                query = query.filter(HistoryLog.requested_by == requested_by)
+            exist_log_entry = query.order_by(HistoryLog.request_at.desc(), HistoryLog.id.desc()).first()
         else:
             exist_log_entry = db.query(HistoryLog).filter(HistoryLog.id == id).first()
 
         if not exist_log_entry:
             raise HTTPException(status_code=400, detail="Log doesn't exists")
 
-        if has_approval_privileges(db, user_id):
+        approver = get_permission_index(user_id, db)
+        if approver.can_approve:
             exist_log_entry.details = details
             exist_log_entry.approved_by = user_id
             exist_log_entry.approval_at = datetime.now(UTC)
+            exist_log_entry.approver_name = approver.username
 
             db.commit()
             db.refresh(exist_log_entry)
             return exist_log_entry
 
+    @staticmethod
+    def list_page(db: Session, since: datetime, size: int = 10, after: str = None, before: str = None) -> dict:
+        """
+        A page of the history logs requested since `since`, newest first, by keyset pagination on
+        (request_at, id): every page costs one index range scan of `ix_history_logs_request_at_id`, however deep.
+
+        Args:
+            db (Session): Database session.
+            since (datetime): The oldest request time listed.
+            size (int): The number of entries per page.
+            after (str, optional): The `next_cursor` of the previous page, to get the next (older) page.
+            before (str, optional): The `prev_cursor` of the page, to get the previous (newer) page.
+
+        Returns:
+            dict: The entries, the cursors of the next and previous pages (None on the last and first pages), and an
+            estimate of the number of entries.
+        """
+        size = min(max(size, 1), 500)
+        key = tuple_(HistoryLog.request_at, HistoryLog.id)
+        query = db.query(
+            HistoryLog.id,
+            HistoryLog.entity,
+            HistoryLog.entity_id,
+            func.coalesce(HistoryLog.entity_name, cast(HistoryLog.entity_id, String)).label("entity_display_name"),
+            HistoryLog.entity_metadata,
+            HistoryLog.action,
+            HistoryLog.details,
+            HistoryLog.request_at,
+            HistoryLog.approval_at,
+            HistoryLog.requester_name,
+            HistoryLog.approver_name,
+        ).filter(HistoryLog.request_at >= since)
+        estimated_total = HistoryLogService.estimate_count(db, query)
+
+        if before:
+            query = query.filter(key > HistoryLogService._decode_key(before))
+            rows = query.order_by(HistoryLog.request_at, HistoryLog.id).limit(size + 1).all()
+            has_more = len(rows) > size
+            rows = rows[:size][::-1]
+            has_newer, has_older = has_more, True
+        else:
+            if after:
+                query = query.filter(key < HistoryLogService._decode_key(after))
+            rows = query.order_by(HistoryLog.request_at.desc(), HistoryLog.id.desc()).limit(size + 1).all()
+            has_older = len(rows) > size
+            rows = rows[:size]
+            has_newer = after is not None
+
+        return {
+            "logs": rows,
+            "next_cursor": encode_cursor((rows[-1].request_at.isoformat(), rows[-1].id)) if rows and has_older else None,
+            "prev_cursor": encode_cursor((rows[0].request_at.isoformat(), rows[0].id)) if rows and has_newer else None,
+            "estimated_total": estimated_total,
+        }
+
+    @staticmethod
+    def _decode_key(cursor: str) -> tuple:
+        request_at, log_id = decode_cursor(cursor, 2)
+        try:
+            return tuple_(datetime.fromisoformat(request_at), int(log_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    @staticmethod
+    def estimate_count(db: Session, query) -> int:
+        """
+        The planner's estimate of the number of rows of a query, read from its EXPLAIN: unlike COUNT(*), it does not
+        read the rows.
+        """
+        compiled = query.statement.compile(dialect=db.get_bind().dialect)
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def backfill_names(db: Session) -> int:
+        """
+        Fill the entity, requester and approver names of the entries written before they were captured. Commits.
+
+        Returns:
+            int: The number of updated name columns, summed over the entries.
+        """
+        updated = 0
+        for entity, (model, column, key) in ENTITY_NAMES.items():
+            updated += db.execute(
+                update(HistoryLog)
+                .where(HistoryLog.entity == entity, HistoryLog.entity_name.is_(None), HistoryLog.entity_id.isnot(None))
+                .values(entity_name=func.coalesce(
+                    db.query(column).filter(model.id == HistoryLog.entity_id).scalar_subquery(),
+                    HistoryLog.entity_metadata[key].astext,
+                )),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+        updated += db.execute(
+            update(HistoryLog)
+            .where(HistoryLog.entity.notin_(ENTITY_NAMES), HistoryLog.entity_name.is_(None),
+                   HistoryLog.entity_id.isnot(None))
+            .values(entity_name=cast(HistoryLog.entity_id, String)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        for user_column, name_column in ((HistoryLog.requested_by, "requester_name"),
+                                         (HistoryLog.approved_by, "approver_name")):
+            updated += db.execute(
+                update(HistoryLog)
+                .where(getattr(HistoryLog, name_column).is_(None), user_column.isnot(None))
+                .values({name_column: db.query(User.username).filter(User.id == user_column).scalar_subquery()}),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+        db.commit()
+        return updated
+
+    @staticmethod
+    def timeline(db: Session, timeline: str, value, entity_id: int = None, cursor: str = None):
+        """
+        The entries of a timeline, newest first: those of an entity, of a requester, or of an approver (ordered by
+        approval time). Each timeline is a range scan of its `ix_history_logs_*_timeline` index.
+
+        Args:
+            db (Session): Database session.
+            timeline (str): "entity", "requester" or "approver".
+            value: The entity type, or the ID of the requester or approver.
+            entity_id (int, optional): The ID of the entity, for entity timelines.
+            cursor (str, optional): Continue after the entry of this cursor.
+
+        Returns:
+            tuple[Query, tuple]: The ordered query and its sort key columns.
+        """
+        query = db.query(HistoryLog)
+        if timeline == "entity":
+            query = query.filter(HistoryLog.entity == value, HistoryLog.entity_id == entity_id)
+            key = (HistoryLog.request_at, HistoryLog.id)
+        elif timeline == "requester":
+            query = query.filter(HistoryLog.requested_by == value)
+            key = (HistoryLog.request_at, HistoryLog.id)
+        elif timeline == "approver":
+            query = query.filter(HistoryLog.approved_by == value, HistoryLog.approval_at.isnot(None))
+            key = (HistoryLog.approval_at, HistoryLog.id)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown timeline: {timeline}")
+
+        if cursor:
+            query = query.filter(tuple_(*key) < HistoryLogService._decode_key(cursor))
+        return query.order_by(*(column.desc() for column in key)), key
+
+    @staticmethod
+    def stream_timeline(timeline: str, value, entity_id: int = None, cursor: str = None,
+                        limit: int = TIMELINE_PAGE_SIZE):
+        """
+        Stream up to `limit` entries of a timeline as a JSON document: {"data": [entries], "next_cursor": ...}.
+
+        Args:
+            timeline (str): "entity", "requester" or "approver".
+            value: The entity type, or the ID of the requester or approver.
+            entity_id (int, optional): The ID of the entity, for entity timelines.
+            cursor (str, optional): The `next_cursor` of the previous page.
+            limit (int): The maximum number of entries, up to `MAX_TIMELINE_PAGE_SIZE`.
+
+        Returns:
+            Iterator[str]: The chunks of the document.
+        """
+        if cursor:
+            HistoryLogService._decode_key(cursor)
+        if timeline not in ("entity", "requester", "approver"):
+            raise HTTPException(status_code=400, detail=f"Unknown timeline: {timeline}")
+        return HistoryLogService._stream(
+            lambda db: HistoryLogService.timeline(db, timeline, value, entity_id, cursor), limit,
+            HistoryLogService.to_dict,
+        )
+
+    @staticmethod
+    def search(db: Session, source: str, contains=None, path: str = None, since: datetime = None,
+               until: datetime = None, cursor: str = None):
+        """
+        Search the JSONB values of the audit trail, newest first: the metadata of the history logs, or the proposed
+        values of the pending approvals.
+
+        Both filters are served by the `jsonb_path_ops` GIN index of the searched column, and the time window prunes
+        the `history_logs` partitions outside it.
+
+        Args:
+            db (Session): Database session.
+            source (str): "history" or "pending_approvals".
+            contains (dict | list, optional): JSON the value must contain (`@>`), e.g. {"warehouse_id": 12}.
+            path (str, optional): A jsonpath the value must match (`@?`), e.g. '$.supplier ? (@ like_regex "^X")'.
+            since (datetime, optional): The oldest request time searched.
+            until (datetime, optional): The request time searched up to, excluded.
+            cursor (str, optional): Continue after the entry of this cursor.
+
+        Returns:
+            tuple[Query, tuple]: The ordered query and its sort key columns.
+        """
+        if source not in SEARCH_SOURCES:
+            raise HTTPException(status_code=400, detail=f"Unknown source: {source}")
+        model, column, requested_at = SEARCH_SOURCES[source]
+
+        query = db.query(model)
+        if contains is not None:
+            query = query.filter(column.contains(contains))
+        if path:
+            query = query.filter(column.path_exists(cast(path, JSONPATH)))
+        if since:
+            query = query.filter(requested_at >= since)
+        if until:
+            query = query.filter(requested_at < until)
+
+        key = (requested_at, model.id)
+        if cursor:
+            query = query.filter(tuple_(*key) < HistoryLogService._decode_key(cursor))
+        return query.order_by(*(column.desc() for column in key)), key
+
+    @staticmethod
+    def stream_search(db: Session, source: str, contains: str = None, path: str = None, since: datetime = None,
+                      until: datetime = None, cursor: str = None, limit: int = TIMELINE_PAGE_SIZE):
+        """
+        Stream up to `limit` search results (see `search`) as a JSON document: {"data": [...], "next_cursor": ...}.
+
+        The filters are validated on `db` before the stream starts, so malformed ones are reported as 400 errors.
+
+        Args:
+            db (Session): Database session, used to validate the jsonpath.
+            source (str): "history" or "pending_approvals".
+            contains (str, optional): The JSON text of the containment filter.
+            path (str, optional): The jsonpath filter.
+            since (datetime, optional): The oldest request time searched.
+            until (datetime, optional): The request time searched up to, excluded.
+            cursor (str, optional): The `next_cursor` of the previous page.
+            limit (int): The maximum number of results, up to `MAX_TIMELINE_PAGE_SIZE`.
+
+        Returns:
+            Iterator[str]: The chunks of the document.
+        """
+        if source not in SEARCH_SOURCES:
+            raise HTTPException(status_code=400, detail=f"Unknown source: {source}")
+        if cursor:
+            HistoryLogService._decode_key(cursor)
+        if contains is not None:
+            try:
+                contains = json.loads(contains)
+            except ValueError:
+                contains = None
+            if not isinstance(contains, (dict, list)):
+                raise HTTPException(status_code=400, detail="contains must be a JSON object or array.")
+        if path:
+            try:
+                db.execute(select(cast(path, JSONPATH)))
+            except DBAPIError:
+                db.rollback()
+                raise HTTPException(status_code=400, detail="Invalid jsonpath.")
+
+        to_dict = HistoryLogService.to_dict if source == "history" else HistoryLogService.approval_to_dict
+        return HistoryLogService._stream(
+            lambda session: HistoryLogService.search(session, source, contains, path, since, until, cursor), limit,
+            to_dict,
+        )
+
+    @staticmethod
+    def _stream(build, limit: int, to_dict):
+        """
+        Stream the rows of a keyset-ordered query as a JSON document: {"data": [rows], "next_cursor": ...}.
+
+        The rows are read from a server-side cursor through a session of the stream's own, since the response
+        outlives the request's session, so long results are never held in memory.
+
+        Args:
+            build (Callable[[Session], tuple[Query, tuple]]): Builds the ordered query and its sort key columns.
+            limit (int): The maximum number of rows, up to `MAX_TIMELINE_PAGE_SIZE`.
+            to_dict (Callable): Converts a row to its JSON object.
+
+        Returns:
+            Iterator[str]: The chunks of the document.
+        """
+        limit = min(max(limit, 1), MAX_TIMELINE_PAGE_SIZE)
+
+        def chunks():
+            # Flush entries still queued by the background writer
+            history_log_writer.flush()
+            db = SessionLocal()
+            try:
+                query, key = build(db)
+                yield '{"data": ['
+                last, count, has_more = None, 0, False
+                for row in query.limit(limit + 1).yield_per(TIMELINE_BATCH_SIZE):
+                    if count == limit:
+                        has_more = True
+                        break
+                    yield ("," if count else "") + json.dumps(to_dict(row), default=str)
+                    last, count = row, count + 1
+                next_cursor = None
+                if has_more:
+                    next_cursor = encode_cursor((getattr(last, key[0].key).isoformat(), last.id))
+                yield "], " + json.dumps({"next_cursor": next_cursor})[1:]
+            finally:
+                db.close()
+
+        return chunks()
+
+    @staticmethod
+    def to_dict(log: HistoryLog) -> dict:
+        return {
+            "id": log.id,
+            "entity": log.entity,
+            "entity_id": log.entity_id,
+            "entity_name": log.entity_name,
+            "action": log.action,
+            "details": log.details,
+            "metadata": log.entity_metadata,
+            "requested_by": log.requested_by,
+            "requester_name": log.requester_name,
+            "request_at": log.request_at.isoformat() if log.request_at else None,
+            "approved_by": log.approved_by,
+            "approver_name": log.approver_name,
+            "approval_at": log.approval_at.isoformat() if log.approval_at else None,
+        }
+
+    @staticmethod
+    def approval_to_dict(pending: PendingApproval) -> dict:
+        return {
+            "id": pending.id,
+            "entity": pending.entity,
+            "entity_id": pending.entity_id,
+            "action": pending.action,
+            "new_value": pending.new_value,
+            "requested_by": pending.requested_by,
+            "requested_at": pending.requested_at.isoformat() if pending.requested_at else None,
+            "approved_by": pending.approved_by,
+            "approved_at": pending.approved_at.isoformat() if pending.approved_at else None,
+            "status": pending.approval_status.value if pending.approval_status else None,
+        }
+
     @staticmethod
     def get_logs_by_entity(db: Session, entity: str, entity_id: int):
         """
@@ -83,14 +542,9 @@ class HistoryLogService:
             entity_id (int): The ID of the entity.
 
         Returns:
-            List[HistoryLog]: A list of history log entries.
+            List[HistoryLog]: A list of history log entries, newest first.
         """
-        return (
-            db.query(HistoryLog)
-            .filter(HistoryLog.entity == entity, HistoryLog.entity_id == entity_id)
-            .order_by(HistoryLog.action_date.desc())
-            .all()
-        )
+        return HistoryLogService.timeline(db, "entity", entity, entity_id)[0].all()
 
     @staticmethod
     def get_logs_by_requester(db: Session, user_id: int):
@@ -102,33 +556,23 @@ class HistoryLogService:
             user_id (int): The ID of the user.
 
         Returns:
-            List[HistoryLog]: A list of history log entries created by the user.
+            List[HistoryLog]: A list of history log entries created by the user, newest first.
         """
-        return (
-            db.query(HistoryLog)
-            .filter(HistoryLog.requested_by == user_id)
-            .order_by(HistoryLog.action_date.desc())
-            .all()
-        )
+        return HistoryLogService.timeline(db, "requester", user_id)[0].all()
 
     @staticmethod
     def get_logs_by_approver(db: Session, user_id: int):
         """
-        Retrieve history logs created by a specific user.
+        Retrieve history logs approved by a specific user.
 
         Args:
             db (Session): Database session.
             user_id (int): The ID of the user.
 
         Returns:
-            List[HistoryLog]: A list of history log entries created by the user.
+            List[HistoryLog]: A list of history log entries approved by the user, most recently approved first.
         """
-        return (
-            db.query(HistoryLog)
-            .filter(HistoryLog.approved_by == user_id)
-            .order_by(HistoryLog.action_date.desc())
-            .all()
-        )
+        return HistoryLogService.timeline(db, "approver", user_id)[0].all()
 
     @staticmethod
     def get_all_logs(db: Session, limit: int = 100):
@@ -140,16 +584,15 @@ class HistoryLogService:
             limit (int, optional): The maximum number of logs to retrieve. Defaults to 100.
 
         Returns:
-            List[HistoryLog]: A list of all history log entries.
+            List[HistoryLog]: A list of all history log entries, newest first.
         """
         return (
             db.query(HistoryLog)
-            .order_by(HistoryLog.action_date.desc())
+            .order_by(HistoryLog.request_at.desc(), HistoryLog.id.desc())
             .limit(limit)
             .all()
         )
 
-
 #
 # @router.delete("/{item_id}/soft-delete", response_model=ItemResponse)
 # def soft_delete_item(item_id: int, db: Session = Depends(get_db), request: Request = None):
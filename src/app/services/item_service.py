@@ -1,10 +1,17 @@
 # src/app/services/item_service.py
+#
+# The read paths and the photo upload also exist as `*_async` methods on an AsyncSession (DATABASE_ASYNC); the photo
+# file is removed and written in the threadpool. The other item actions are sync only.
 
 import os
 from datetime import datetime, UTC
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, UploadFile, Depends
+from starlette.concurrency import run_in_threadpool
 from src.app.core.database import get_db
+from src.app.core.permission_scope import PermissionScope
 from src.app.core.rbac import has_approval_privileges
 from src.app.models import PendingApproval
 from src.app.models.item import Item
@@ -224,38 +231,47 @@ class ItemService:
         )
 
     @staticmethod
-    def get_item(item_id: int, db: Session = Depends(get_db)):
-        item = db.query(Item).filter(Item.id == item_id).first()
+    def check_item(item: Item) -> Item:
         if not item or not item.is_active:
-            if item.is_archived:
+            if item and item.is_archived:
                 raise HTTPException(status_code=404, detail="Item is archived")
             raise HTTPException(status_code=404, detail="Item not found")
         return item
 
     @staticmethod
-    def list_items(db: Session = Depends(get_db)):
-        items = db.query(Item).filter(Item.is_active == True).all()
+    def get_item(item_id: int, db: Session = Depends(get_db)):
+        return ItemService.check_item(db.query(Item).filter(Item.id == item_id).first())
+
+    @staticmethod
+    async def get_item_async(item_id: int, db: AsyncSession):
+        return ItemService.check_item(await db.scalar(select(Item).where(Item.id == item_id)))
+
+    @staticmethod
+    def list_items(user_id: int, db: Session = Depends(get_db)):
+        # Only the items the user can read, filtered in SQL
+        items_query = db.query(Item).filter(Item.is_active == True)
+        items = PermissionScope.apply(items_query, db, user_id, PermissionScope.items).all()
         return items
 
     @staticmethod
-    def upload_item_photo(
-            item_id: int,
-            file: UploadFile,
-            db: Session = Depends(get_db)
-    ):
-        """
-        Upload a photo for a specific item and save it in the assets/photos directory.
+    async def list_items_async(user_id: int, db: AsyncSession):
+        scope = await db.run_sync(PermissionScope.where, user_id, PermissionScope.items)
+        return (await db.scalars(select(Item).where(Item.is_active == True, scope))).all()
+
+    @staticmethod
+    def save_photo(item_id: int, previous_photo: str, file: UploadFile) -> str:
         """
-        item = db.query(Item).filter(Item.id == item_id).first()
-        if not item or not item.is_active:
-            raise HTTPException(status_code=404, detail="Item not found")
+        Replace an item's photo file in the assets/photos directory.
 
+        Returns:
+            str: The path of the new photo, relative to the assets directory.
+        """
         # Delete the photo file if it exists
-        if item.photo and os.path.exists(os.path.join("src/assets", item.photo)):
+        if previous_photo and os.path.exists(os.path.join("src/assets", previous_photo)):
             try:
-                os.remove(os.path.join("src/assets", item.photo))
+                os.remove(os.path.join("src/assets", previous_photo))
             except Exception as e:
-                print(f"Error deleting file {item.photo}: {e}")
+                print(f"Error deleting file {previous_photo}: {e}")
 
         # Validate file type
         if not file.content_type.startswith("image/"):
@@ -272,13 +288,42 @@ class ItemService:
         with open(file_path, "wb") as f:
             f.write(file.file.read())
 
+        return os.path.join("photos", file_name)
+
+    @staticmethod
+    def upload_item_photo(
+            item_id: int,
+            file: UploadFile,
+            db: Session = Depends(get_db)
+    ):
+        """
+        Upload a photo for a specific item and save it in the assets/photos directory.
+        """
+        item = db.query(Item).filter(Item.id == item_id).first()
+        if not item or not item.is_active:
+            raise HTTPException(status_code=404, detail="Item not found")
+
         # Update item with photo path
-        item.photo = os.path.join("photos", file_name)
+        item.photo = ItemService.save_photo(item_id, item.photo, file)
         db.commit()
         db.refresh(item)
 
         return {"detail": "Photo uploaded successfully"}
 
+    @staticmethod
+    async def upload_item_photo_async(item_id: int, file: UploadFile, db: AsyncSession):
+        """
+        `upload_item_photo` on an AsyncSession, with the file I/O in the threadpool.
+        """
+        item = await db.scalar(select(Item).where(Item.id == item_id))
+        if not item or not item.is_active:
+            raise HTTPException(status_code=404, detail="Item not found")
+
+        item.photo = await run_in_threadpool(ItemService.save_photo, item_id, item.photo, file)
+        await db.commit()
+
+        return {"detail": "Photo uploaded successfully"}
+
     # === for pending approvals use ===
     @staticmethod
     def direct_create(new_value: dict, db: Session = Depends(get_db)):
@@ -3,8 +3,8 @@
 from sqlalchemy.orm import Session
 from datetime import datetime, UTC
 from fastapi import HTTPException
-from src.app.core.rbac import has_approval_privileges
-from src.app.models import User, PendingApproval, ApprovalStatus
+from src.app.core.rbac import get_permission_index
+from src.app.models import PendingApproval, ApprovalStatus
 from src.app.services.history_log_service import HistoryLogService
 
 
@@ -39,9 +39,8 @@ class PendingApprovalService:
         if existing_request:
             raise HTTPException(status_code=400, detail="A pending approval for this action already exists.")
 
-        user = db.query(User).filter(User.id == requested_by).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        # Raises 404 for an unknown user; the context is reused by the history log entry below
+        get_permission_index(requested_by, db)
 
         request_entry = PendingApproval(
             entity=entity,
@@ -53,11 +52,11 @@ class PendingApprovalService:
             approval_status=ApprovalStatus.PENDING
         )
         db.add(request_entry)
+
+        # Log action, written with the request: approving it updates this entry, possibly from another worker
+        HistoryLogService.log_action(db, entity, entity_id, action, requested_by, commit=False)
         db.commit()
         db.refresh(request_entry)
-
-        # Log action
-        HistoryLogService.log_action(db, entity, entity_id, action, requested_by)
         return request_entry
         # return {"detail": f"Approval request for {action} submitted successfully", "request_id": request_entry.id}
 
@@ -84,11 +83,10 @@ class PendingApprovalService:
             raise HTTPException(status_code=400, detail="Request already processed")
 
         # Step 2: Check if approver is eligible (admin, superuser, or direct manager)
-        approver = db.query(User).filter(User.id == approver_id).first()
-        requester = db.query(User).filter(User.id == pending.requested_by).first()
+        approver = get_permission_index(approver_id, db)
 
-        if not (approver and has_approval_privileges(db, approver_id) or
-                approver.id == requester.direct_manager_id):
+        if not (approver.can_approve or
+                approver_id == get_permission_index(pending.requested_by, db).direct_manager_id):
             raise HTTPException(status_code=403, detail="You are not authorized to make this action")
 
         if action == "reject":
@@ -104,7 +102,9 @@ class PendingApprovalService:
                 user_id=approver_id,
                 entity=pending.entity,
                 entity_id=pending.entity_id,
-                details=f"{pending.action} - rejected"
+                details=f"{pending.action} - rejected",
+                action=pending.action,
+                requested_by=pending.requested_by,
             )
 
             # Delete the request after history logged
@@ -153,7 +153,9 @@ class PendingApprovalService:
             user_id=approver_id,
             entity=pending.entity,
             entity_id=pending.entity_id,
-            details=f"{pending.action} - approved"
+            details=f"{pending.action} - approved",
+            action=pending.action,
+            requested_by=pending.requested_by,
         )
 
         # Delete the request after history logged
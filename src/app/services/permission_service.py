@@ -3,6 +3,7 @@
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from src.app.core.rbac import invalidate_permissions
 from src.app.models.permission import Permission
 from src.app.schemas.permission import PermissionCreate
 
@@ -25,6 +26,7 @@ class PermissionService:
         new_permission = Permission(**dict(permission_data))
         db.add(new_permission)
         db.commit()
+        invalidate_permissions(permission_data.user_id)
         db.refresh(new_permission)
         return new_permission
 
@@ -45,6 +47,8 @@ class PermissionService:
                 new_permissions.append(new_permission)
 
         db.commit()
+        if new_permissions:
+            invalidate_permissions(*{permission_data.user_id for permission_data in permissions_data})
         return new_permissions
 
     @staticmethod
@@ -53,8 +57,10 @@ class PermissionService:
         if not permission:
             raise HTTPException(status_code=404, detail="Permission not found")
 
+        user_id = permission.user_id
         db.delete(permission)
         db.commit()
+        invalidate_permissions(user_id)
         return {"detail": "Permission revoked successfully"}
 
     @staticmethod
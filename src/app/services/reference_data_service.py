@@ -0,0 +1,40 @@
+# src/app/services/reference_data_service.py
+
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from src.app.core.cache import TTLCache
+from src.app.core.cache_invalidation import invalidate_on
+from src.app.core.config import get_settings
+from src.app.models.location import Location
+from src.app.models.project import Project
+from src.app.models.warehouse import Warehouse
+
+settings = get_settings()
+
+# (table name, id) -> name of a location, warehouse or project, evicted in every worker when the row changes
+reference_cache = TTLCache("reference_data", ttl=settings.REFERENCE_CACHE_TTL, maxsize=settings.REFERENCE_CACHE_SIZE)
+for _model in (Location, Warehouse, Project):
+    invalidate_on(_model, reference_cache, lambda instance: (instance.__tablename__, instance.id))
+
+
+class ReferenceDataService:
+    @staticmethod
+    def get_name(db: Session, model, entity_id: int):
+        """
+        Get the name of a location, warehouse or project from the reference data cache.
+
+        Args:
+            db (Session): The database session, only used on a cache miss.
+            model: Location, Warehouse or Project.
+            entity_id (int): The ID of the entity.
+
+        Returns:
+            str: The name of the entity.
+        """
+        def load():
+            name = db.query(model.name).filter(model.id == entity_id).scalar()
+            if name is None:
+                raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+            return name
+
+        return reference_cache.get_or_load((model.__tablename__, entity_id), load)
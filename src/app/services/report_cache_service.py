@@ -0,0 +1,177 @@
+# src/app/services/report_cache_service.py
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from src.app.core.data_versions import get_versions, track_versions
+from src.app.models.item import Item
+from src.app.models.location import Location
+from src.app.models.project import Project
+from src.app.models.stock import Stock
+from src.app.models.stock_balance import StockBalance
+from src.app.models.warehouse import Warehouse
+from src.app.services.report_catalog_service import ReportCatalogService
+from src.app.utils.report_writer import REPORTS_DIR, ReportProgress, report_progress
+
+# Outside the listed reports directory (list_reports only lists files)
+CACHE_DIR = f"{REPORTS_DIR}/.cache"
+
+# The tables the reports are built from
+track_versions(Stock, StockBalance, Item, Warehouse, Project, Location)
+
+# Arguments that do not change the content of a report
+IGNORED_ARGUMENTS = {"db", "user_id"}
+
+
+class ReportCacheService:
+    """
+    Serves a report again without regenerating it while the tables it reads are unchanged.
+
+    Each generated report is recorded in a small metadata file keyed by the report and its arguments: the data
+    versions it was built from, its file (with the file's modification time, in case another report overwrote it)
+    and its JSON payload. A repeated report costs one `data_versions` query and reading that metadata.
+    """
+
+    @staticmethod
+    def cached(db: Session, report: str, arguments: dict, tables, generate: Callable, user_id: int = None):
+        """
+        Run `generate` unless it already ran with the same arguments while `tables` are unchanged, and record the
+        report file it writes in the report catalog.
+
+        Args:
+            db (Session): The database session.
+            report (str): The report name.
+            arguments (dict): The arguments the report depends on, including its file format.
+            tables: The mapped classes the report reads.
+            generate (Callable): Writes the report file and returns the JSON payload of the report.
+            user_id (int): The ID of the requesting user, recorded in the catalog.
+
+        Returns:
+            The payload of `generate`, encoded by `jsonable_encoder`.
+        """
+        key = ReportCacheService.cache_key(report, arguments)
+        outer = report_progress.get()
+        versions = get_versions(db, [model.__tablename__ for model in tables])
+        entry = ReportCacheService.load(key, versions)
+        if entry:
+            if outer:
+                outer.file_path = entry["file_path"]
+                outer.update(entry["rows_written"])
+            return entry["payload"]
+
+        # Capture the file written by the report, passing progress on to a background job if there is one
+        capture = ReportProgress(on_rows=outer.update if outer else None)
+        token = report_progress.set(capture)
+        started = time.monotonic()
+        try:
+            payload = jsonable_encoder(generate())
+        finally:
+            report_progress.reset(token)
+        duration_ms = int((time.monotonic() - started) * 1000)
+        if outer:
+            outer.file_path = capture.file_path
+
+        ReportCacheService.store(key, versions, capture.file_path, capture.rows_written, payload)
+        if capture.file_path:
+            ReportCatalogService.record(
+                db, capture.file_path, report, arguments, arguments.get("file_format"), capture.rows_written,
+                duration_ms, user_id,
+            )
+        return payload
+
+    @staticmethod
+    def lookup(db: Session, report: str, arguments: dict, tables):
+        """
+        The report `cached` would serve without running its generator, or None.
+
+        Args:
+            db (Session): The database session.
+            report (str): The report name.
+            arguments (dict): The arguments the report depends on, including its file format.
+            tables: The mapped classes the report reads.
+
+        Returns:
+            dict: The cached entry, with the report's `file_path`, `rows_written` and `payload`.
+        """
+        versions = get_versions(db, [model.__tablename__ for model in tables])
+        return ReportCacheService.load(ReportCacheService.cache_key(report, arguments), versions)
+
+    @staticmethod
+    def cache_key(name: str, arguments: dict) -> str:
+        key = json.dumps([name, arguments], sort_keys=True, default=str)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def load(key: str, versions: dict):
+        """
+        The cached report for `key`, or None if it is missing, stale or its file changed.
+        """
+        try:
+            with open(f"{CACHE_DIR}/{key}.json", encoding="utf-8") as file:
+                entry = json.load(file)
+            if entry["versions"] != versions:
+                return None
+            file_path = entry["file_path"]
+            if file_path and os.stat(file_path).st_mtime_ns != entry["file_mtime_ns"]:
+                return None
+            return entry
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def store(key: str, versions: dict, file_path: str, rows_written: int, payload):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        entry = {
+            "versions": versions,
+            "file_path": file_path,
+            "file_mtime_ns": os.stat(file_path).st_mtime_ns if file_path else None,
+            "rows_written": rows_written,
+            "payload": payload,
+        }
+        # A temporary file per writer: the same report may be stored by concurrent requests
+        handle, temp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=f"{key}.", suffix=".json.tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as file:
+                json.dump(entry, file)
+            os.replace(temp_path, f"{CACHE_DIR}/{key}.json")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def cached_report(*tables):
+    """
+    Decorator for ReportService methods: reuse the previous file and payload while `tables` are unchanged.
+
+    The decorated function must take the database session as `db`, and may take the requesting user as `user_id`;
+    its JSON payload is returned as encoded by `jsonable_encoder`, from the cache and when freshly generated alike.
+    Generated files are recorded in the report catalog.
+
+    Args:
+        *tables: The mapped classes the report reads.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in bound.arguments.items() if name not in IGNORED_ARGUMENTS}
+            return ReportCacheService.cached(
+                bound.arguments["db"], func.__name__, arguments, tables, lambda: func(*args, **kwargs),
+                bound.arguments.get("user_id"),
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,135 @@
+# src/app/services/report_catalog_service.py
+
+import os
+from datetime import datetime, UTC
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.app.models.report import Report
+from src.app.utils.report_writer import REPORTS_DIR
+
+
+class ReportCatalogService:
+    @staticmethod
+    def record(db: Session, file_path: str, report: str, params: dict, file_format: str, rows_written: int,
+               duration_ms: int, created_by: int = None):
+        """
+        Record a generated report file, replacing the entry of the file it overwrote.
+
+        Args:
+            db (Session): The database session.
+            file_path (str): The path of the report file.
+            report (str): The name of the report.
+            params (dict): The report parameters.
+            file_format (str): "xlsx", "csv" or "csv.gz".
+            rows_written (int): The number of rows in the file.
+            duration_ms (int): The generation time in milliseconds.
+            created_by (int): The ID of the requesting user, if any.
+        """
+        values = {
+            "name": os.path.basename(file_path),
+            "report": report,
+            "params": params,
+            "file_format": file_format,
+            "size_bytes": os.path.getsize(file_path),
+            "rows_written": rows_written,
+            "generated_at": datetime.now(UTC),
+            "duration_ms": duration_ms,
+            "created_by": created_by,
+        }
+        statement = insert(Report).values(**values)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[Report.name],
+            set_={name: statement.excluded[name] for name in values if name != "name"},
+        ))
+        db.commit()
+
+    @staticmethod
+    def list_reports(db: Session, page: int = 1, size: int = 50):
+        """
+        A page of the catalog, most recently generated first.
+
+        Args:
+            db (Session): The database session.
+            page (int): The page number, from 1.
+            size (int): The number of reports per page.
+
+        Returns:
+            list[dict]: The reports with name, parameters, size, row count, generation time, duration and creator.
+        """
+        page = max(page, 1)
+        size = min(max(size, 1), 500)
+        reports = (
+            db.query(Report)
+            .order_by(Report.generated_at.desc(), Report.id.desc())
+            .offset((page - 1) * size)
+            .limit(size)
+            .all()
+        )
+        return [
+            {
+                "name": report.name,
+                "file_name": report.name,
+                "report": report.report,
+                "params": report.params,
+                "format": report.file_format,
+                "size_bytes": report.size_bytes,
+                "rows_written": report.rows_written,
+                "generated_at": report.generated_at.isoformat() + "Z",
+                "duration_ms": report.duration_ms,
+                "created_by": report.created_by,
+            }
+            for report in reports
+        ]
+
+    @staticmethod
+    def remove(db: Session, file_name: str):
+        db.execute(delete(Report).where(Report.name == file_name))
+        db.commit()
+
+    @staticmethod
+    def reconcile(db: Session, dry_run: bool = False) -> dict:
+        """
+        Re-sync the catalog with the files in the reports directory.
+
+        Files without an entry are added, entries without a file are removed, and entries whose file was replaced
+        outside the application get its size and modification time.
+
+        Args:
+            db (Session): The database session.
+            dry_run (bool): Only count the differences.
+
+        Returns:
+            dict: The names of the added, removed and updated entries.
+        """
+        files = {}
+        if os.path.isdir(REPORTS_DIR):
+            with os.scandir(REPORTS_DIR) as entries:
+                for entry in entries:
+                    # Skips the report cache directory and files still being written
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_size, datetime.fromtimestamp(stat.st_mtime, UTC).replace(tzinfo=None))
+
+        catalog = {report.name: report for report in db.query(Report).all()}
+        added = sorted(set(files) - set(catalog))
+        removed = sorted(set(catalog) - set(files))
+        updated = sorted(
+            name for name in set(files) & set(catalog)
+            # Files written by the application are recorded just after their last modification
+            if catalog[name].size_bytes != files[name][0] or catalog[name].generated_at < files[name][1]
+        )
+
+        if not dry_run:
+            for name in added:
+                size_bytes, modified_at = files[name]
+                db.add(Report(name=name, size_bytes=size_bytes, generated_at=modified_at))
+            if removed:
+                db.execute(delete(Report).where(Report.name.in_(removed)))
+            for name in updated:
+                catalog[name].size_bytes, catalog[name].generated_at = files[name]
+            db.commit()
+
+        return {"added": added, "removed": removed, "updated": updated}
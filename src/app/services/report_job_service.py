@@ -0,0 +1,251 @@
+# src/app/services/report_job_service.py
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, UTC
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from src.app.core.config import get_settings
+from src.app.core.database import SessionLocal, engine
+from src.app.models.report_job import ReportJob, ReportJobStatus
+from src.app.services.report_service import ReportService
+from src.app.utils.report_writer import ReportProgress, report_progress, validate_format
+
+settings = get_settings()
+
+# Report name -> (required parameters, function generating the file for the requesting user)
+REPORTS = {
+    "stock": (
+        (), lambda db, params, file_format, user_id: ReportService.generate_stock_report(db, file_format, user_id)
+    ),
+    "entity": (
+        ("entity_type",),
+        lambda db, params, file_format, user_id: ReportService.entity_report(
+            params["entity_type"], user_id, db, file_format, generate_file=True
+        )
+    ),
+    "stock_by_entity_type": (
+        ("entity_type",),
+        lambda db, params, file_format, user_id: ReportService.get_stock_by_entity_type(
+            params["entity_type"], db, file_format, user_id, generate_file=True
+        )
+    ),
+    "stock_by_entity": (
+        ("entity_type", "entity_id"),
+        lambda db, params, file_format, user_id: ReportService.get_stock_by_entity_and_id(
+            params["entity_type"], params["entity_id"], db, file_format, user_id, generate_file=True
+        )
+    ),
+    "stock_by_item": (
+        ("item_id",),
+        lambda db, params, file_format, user_id: ReportService.get_stock_by_item(
+            params["item_id"], db, file_format, user_id, generate_file=True
+        )
+    ),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_job_process():
+    # Connections inherited from the parent must not be shared with it
+    engine.dispose(close=False)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    The worker's bounded pool of report processes, created on first use.
+
+    Processes are spawned rather than forked, since the web worker runs threads (event loop, cache listener).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.REPORT_JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_job_process,
+            )
+        return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def run_report_job(job_id: int):
+    """
+    Generate the file of a report job. Runs in a report process.
+
+    The report reads through its own session, while progress is committed through another, so the commits do not
+    close the report's server-side cursor.
+    """
+    job_db = SessionLocal()
+    db = SessionLocal()
+    try:
+        job = job_db.query(ReportJob).filter(ReportJob.id == job_id).first()
+        if not job or job.status != ReportJobStatus.QUEUED:
+            return
+        now = datetime.now(UTC)
+        job.status = ReportJobStatus.RUNNING
+        job.started_at = now
+        job.heartbeat_at = now
+        job_db.commit()
+
+        def on_rows(rows_written: int):
+            job_db.execute(
+                update(ReportJob).where(ReportJob.id == job_id)
+                .values(rows_written=rows_written, heartbeat_at=datetime.now(UTC))
+            )
+            job_db.commit()
+
+        progress = ReportProgress(on_rows)
+        token = report_progress.set(progress)
+        try:
+            _, generate = REPORTS[job.report]
+            generate(db, job.params, job.file_format, job.requested_by)
+            job.status = ReportJobStatus.DONE
+            job.rows_written = progress.rows_written
+            job.file_name = os.path.basename(progress.file_path) if progress.file_path else None
+        except Exception as e:
+            db.rollback()
+            job_db.rollback()
+            job.status = ReportJobStatus.FAILED
+            job.error = e.detail if isinstance(e, HTTPException) else str(e)
+            logging.error(f"Report job {job_id} failed: {job.error}")
+        finally:
+            report_progress.reset(token)
+
+        job.finished_at = datetime.now(UTC)
+        job.heartbeat_at = job.finished_at
+        job_db.commit()
+    finally:
+        db.close()
+        job_db.close()
+
+
+def _mark_failed(job_id: int, error: str):
+    db = SessionLocal()
+    try:
+        now = datetime.now(UTC)
+        db.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job_id, ReportJob.status.in_([ReportJobStatus.QUEUED, ReportJobStatus.RUNNING]))
+            .values(status=ReportJobStatus.FAILED, error=error, finished_at=now, heartbeat_at=now)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+class ReportJobService:
+    @staticmethod
+    def submit_job(db: Session, report: str, params: dict, file_format: str, requested_by: int):
+        """
+        Queue a report for background generation, or join the queued or running job of an identical request.
+
+        Args:
+            db (Session): The database session.
+            report (str): The report name, a key of `REPORTS`.
+            params (dict): The report parameters.
+            file_format (str): "xlsx", "csv" or "csv.gz".
+            requested_by (int): The ID of the requesting user.
+
+        Returns:
+            dict: The job status.
+        """
+        if report not in REPORTS:
+            raise HTTPException(status_code=400, detail=f"Invalid report. Must be one of: {', '.join(REPORTS)}.")
+        validate_format(file_format)
+        required, _ = REPORTS[report]
+        missing = [name for name in required if params.get(name) in (None, "")]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing report parameters: {', '.join(missing)}.")
+        try:
+            # Normalized, so that equivalent requests ("1" and 1) share a job
+            params = {name: int(params[name]) if name.endswith("_id") else str(params[name]) for name in required}
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Report ids must be integers.")
+
+        params_hash = hashlib.sha256(
+            json.dumps([report, params, file_format], sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        # Serialize identical submissions across workers until this transaction ends
+        lock_key = int.from_bytes(bytes.fromhex(params_hash[:16]), "big", signed=True)
+        db.execute(select(func.pg_advisory_xact_lock(lock_key)))
+        existing = (
+            db.query(ReportJob)
+            .filter(
+                ReportJob.params_hash == params_hash,
+                ReportJob.status.in_([ReportJobStatus.QUEUED, ReportJobStatus.RUNNING]),
+                ReportJob.heartbeat_at > datetime.now(UTC) - timedelta(seconds=settings.REPORT_JOB_STALE_SECONDS),
+            )
+            .order_by(ReportJob.id.desc())
+            .first()
+        )
+        if existing:
+            db.commit()
+            return ReportJobService.job_response(existing)
+
+        job = ReportJob(report=report, params=params, file_format=file_format, params_hash=params_hash,
+                        requested_by=requested_by)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        job_id = job.id
+        try:
+            future = get_executor().submit(run_report_job, job_id)
+        except (BrokenProcessPool, RuntimeError) as e:
+            shutdown_executor()
+            _mark_failed(job_id, f"Report workers unavailable: {e}")
+            raise HTTPException(status_code=503, detail="Report workers unavailable, try again.")
+
+        def on_done(done):
+            error = done.exception()
+            if error is not None:
+                # The report process died before recording the outcome
+                if isinstance(error, BrokenProcessPool):
+                    shutdown_executor()
+                _mark_failed(job_id, str(error) or type(error).__name__)
+
+        future.add_done_callback(on_done)
+        return ReportJobService.job_response(job)
+
+    @staticmethod
+    def get_job(db: Session, job_id: int):
+        job = db.query(ReportJob).filter(ReportJob.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Report job not found")
+        return ReportJobService.job_response(job)
+
+    @staticmethod
+    def job_response(job: ReportJob):
+        return {
+            "id": job.id,
+            "report": job.report,
+            "params": job.params,
+            "format": job.file_format,
+            "status": job.status.value,
+            "rows_written": job.rows_written,
+            "file_url": f"/reports/files/{job.file_name}" if job.file_name else None,
+            "error": job.error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
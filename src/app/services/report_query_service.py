@@ -0,0 +1,330 @@
+# src/app/services/report_query_service.py
+
+from typing import NamedTuple
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, literal, tuple_
+from sqlalchemy.orm import Query, Session
+from src.app.models.item import Item
+from src.app.models.location import Location
+from src.app.models.project import Project
+from src.app.models.stock import Stock
+from src.app.models.stock_balance import StockBalance
+from src.app.models.warehouse import Warehouse
+from src.app.utils.cursor import encode_cursor, decode_cursor
+
+# Rows fetched per round trip by the server-side cursors of the report queries
+REPORT_BATCH_SIZE = 1000
+
+# Rows returned per page of a report response, by default and at most
+REPORT_PAGE_SIZE = 100
+MAX_REPORT_PAGE_SIZE = 1000
+
+# GROUPING() of (warehouse_id, project_id, location_id, item_id) -> rollup level; a bit is set for each column the
+# level is not grouped by
+ROLLUP_LEVELS = {
+    0b0110: "warehouse",
+    0b1010: "project",
+    0b1100: "location",
+    0b1110: "item",
+    0b1111: "total",
+}
+
+# Name shown in reports for the referenced entity of a stock column
+STOCK_REFERENCE_NAMES = {
+    "item_id": ("item_name", Item.item_code),
+    "project_id": ("project_name", Project.name),
+    "warehouse_id": ("warehouse_name", Warehouse.name),
+}
+
+
+class ReportRows(NamedTuple):
+    """
+    The rows of a report: a query (joins, filters, grouping), the expression of each report column, and the
+    expressions of a unique sort key used to stream the rows in order and to paginate them.
+    """
+    query: Query
+    columns: dict
+    key: tuple
+
+
+class ReportQueryService:
+    """
+    Report rows built by one joined SQL statement each, so the number of queries does not depend on the number of
+    rows: item codes and holder names come from joins instead of per-row lookups.
+
+    The row methods return `ReportRows`: `stream` writes the whole report to a file from a server-side cursor
+    (`yield_per`) without loading it, while `page` returns one keyset page of selected columns for the response.
+    """
+
+    @staticmethod
+    def stream(rows: ReportRows):
+        """
+        All rows of a report in key order, fetched in batches.
+
+        Returns:
+            Iterator[dict]: One dict per row, with every report column.
+        """
+        labels = {name: f"c{index}" for index, name in enumerate(rows.columns)}
+        query = (
+            rows.query
+            .with_entities(*[expression.label(labels[name]) for name, expression in rows.columns.items()])
+            .order_by(*rows.key)
+            .yield_per(REPORT_BATCH_SIZE)
+        )
+        for row in query:
+            mapping = row._mapping
+            yield {name: mapping[label] for name, label in labels.items()}
+
+    @staticmethod
+    def page(rows: ReportRows, cursor: str = None, limit: int = REPORT_PAGE_SIZE, fields: str = None):
+        """
+        One page of a report, selecting only the requested columns.
+
+        Pages are read by keyset, continuing after the key of the last row of the previous page, so a page costs
+        the same however deep it is.
+
+        Args:
+            rows (ReportRows): The report rows.
+            cursor (str): The `next_cursor` of the previous page; None for the first page.
+            limit (int): The number of rows per page (at most `MAX_REPORT_PAGE_SIZE`).
+            fields (str): Comma-separated report columns to return; all columns by default.
+
+        Returns:
+            dict: The page rows (`data`), the returned `columns`, and the `next_cursor` (None on the last page).
+        """
+        if fields:
+            names = [name.strip() for name in fields.split(",") if name.strip()]
+            unknown = [name for name in names if name not in rows.columns]
+            if unknown:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown report fields: {', '.join(unknown)}. Available: {', '.join(rows.columns)}."
+                )
+        else:
+            names = list(rows.columns)
+        limit = min(max(limit, 1), MAX_REPORT_PAGE_SIZE)
+
+        query = rows.query.with_entities(
+            *[rows.columns[name].label(f"c{index}") for index, name in enumerate(names)],
+            *[expression.label(f"k{index}") for index, expression in enumerate(rows.key)],
+        )
+        if cursor:
+            values = decode_cursor(cursor, len(rows.key))
+            query = query.filter(tuple_(*rows.key) > tuple_(*[literal(value) for value in values]))
+        result = query.order_by(*rows.key).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(result) > limit:
+            result = result[:limit]
+            last = result[-1]._mapping
+            next_cursor = encode_cursor(last[f"k{index}"] for index in range(len(rows.key)))
+
+        return {
+            "columns": names,
+            "data": [{name: row._mapping[f"c{index}"] for index, name in enumerate(names)} for row in result],
+            "next_cursor": next_cursor,
+        }
+
+    @staticmethod
+    def stocks(db: Session):
+        """
+        The stocks, with their item, warehouse and project outer-joined.
+
+        Args:
+            db (Session): The database session.
+
+        Returns:
+            Query: The query, to select columns over Stock, Item, Warehouse and Project from.
+        """
+        return (
+            db.query(Stock)
+            .select_from(Stock)
+            .outerjoin(Item, Stock.item_id == Item.id)
+            .outerjoin(Warehouse, Stock.warehouse_id == Warehouse.id)
+            .outerjoin(Project, Stock.project_id == Project.id)
+        )
+
+    @staticmethod
+    def entity_rows(db: Session, model, column_names: list[str]) -> ReportRows:
+        """
+        Rows of an entity report: the given columns of the active rows of `model`.
+
+        Args:
+            db (Session): The database session.
+            model: The mapped class of the entity.
+            column_names (list[str]): The columns to report, in order.
+        """
+        return ReportRows(
+            query=db.query(model).select_from(model).filter(model.is_active == True),
+            columns={name: getattr(model, name) for name in column_names},
+            key=(model.id,),
+        )
+
+    @staticmethod
+    def stock_entity_rows(db: Session, column_names: list[str]) -> ReportRows:
+        """
+        Rows of the stock entity report: the given stock columns, with each `*_id` column replaced by the name of
+        the entity it references ("N/A" when unset).
+
+        Args:
+            db (Session): The database session.
+            column_names (list[str]): The stock columns to report, in order.
+        """
+        columns = {}
+        for column_name in column_names:
+            if "_id" in column_name:
+                label, name = STOCK_REFERENCE_NAMES.get(column_name, (column_name.replace("_id", "_name"), None))
+                columns[label] = func.coalesce(name, "N/A") if name is not None else literal("N/A")
+            else:
+                columns[column_name] = getattr(Stock, column_name)
+
+        return ReportRows(query=ReportQueryService.stocks(db), columns=columns, key=(Stock.id,))
+
+    @staticmethod
+    def stock_summary_rows(db: Session) -> ReportRows:
+        """
+        Rows of the general stock report: item code, quantity, warehouse and project of every stock.
+        """
+        return ReportRows(
+            query=ReportQueryService.stocks(db),
+            columns={
+                "Item ID": func.coalesce(Item.item_code, "N/A"),
+                "Quantity": Stock.quantity,
+                "Warehouse": func.coalesce(Warehouse.name, "N/A"),
+                "Project": func.coalesce(Project.name, "N/A"),
+            },
+            key=(Stock.id,),
+        )
+
+    @staticmethod
+    def stock_holder_rows(db: Session, *filters) -> ReportRows:
+        """
+        Rows of the per-entity stock report: item code, description, quantity and holder name of the stocks
+        matching `filters`.
+        """
+        return ReportRows(
+            query=ReportQueryService.stocks(db).filter(*filters),
+            columns={
+                "Item Code": Item.item_code,
+                "Description": Item.description,
+                "Quantity": Stock.quantity,
+                "Location": case((Stock.warehouse_id.isnot(None), Warehouse.name), else_=Project.name),
+            },
+            key=(Stock.id,),
+        )
+
+    @staticmethod
+    def item_holder_rows(db: Session, item_id: int) -> ReportRows:
+        """
+        Rows of the per-item stock report: the item's total quantity per warehouse and project name.
+        """
+        warehouse = func.coalesce(Warehouse.name, "N/A")
+        project = func.coalesce(Project.name, "N/A")
+        return ReportRows(
+            query=(
+                db.query(StockBalance)
+                .select_from(StockBalance)
+                .outerjoin(Warehouse, StockBalance.warehouse_id == Warehouse.id)
+                .outerjoin(Project, StockBalance.project_id == Project.id)
+                .filter(StockBalance.item_id == item_id, StockBalance.quantity != 0)
+                .group_by(Warehouse.name, Project.name)
+            ),
+            columns={
+                "Warehouse": warehouse,
+                "Project": project,
+                "Total Quantity": func.sum(StockBalance.quantity),
+            },
+            key=(warehouse, project),
+        )
+
+    @staticmethod
+    def entity_type_rows(db: Session, entity_type: str) -> ReportRows:
+        """
+        Rows of the per-entity-type stock report: the total quantity of each item per holder, over the balances
+        held by a location ("location"), a warehouse ("warehouse") or a project ("project").
+        """
+        holder_filter = {
+            "location": StockBalance.location_id.isnot(None),
+            "warehouse": StockBalance.warehouse_id.isnot(None),
+            "project": StockBalance.project_id.isnot(None),
+        }[entity_type]
+        return ReportRows(
+            query=(
+                db.query(StockBalance)
+                .select_from(StockBalance)
+                .join(Item, StockBalance.item_id == Item.id)
+                .outerjoin(Warehouse, StockBalance.warehouse_id == Warehouse.id)
+                .outerjoin(Project, StockBalance.project_id == Project.id)
+                .filter(StockBalance.quantity != 0, holder_filter)
+                .group_by(
+                    Item.item_code, Item.description, Item.unit_of_measure, Warehouse.name, Project.name,
+                    StockBalance.warehouse_id, StockBalance.project_id
+                )
+            ),
+            columns={
+                "Item Code": Item.item_code,
+                "Description": Item.description,
+                "Unit of Measure": Item.unit_of_measure,
+                "Total Quantity": func.sum(StockBalance.quantity),
+                "Entity Type": case(
+                    (StockBalance.warehouse_id.isnot(None), "Warehouse"),
+                    (StockBalance.project_id.isnot(None), "Project"),
+                    else_="Unknown",
+                ),
+                "Entity Name": case(
+                    (StockBalance.warehouse_id.isnot(None), Warehouse.name),
+                    (StockBalance.project_id.isnot(None), Project.name),
+                    else_="Unknown",
+                ),
+            },
+            key=(Item.item_code, func.coalesce(StockBalance.warehouse_id, 0), func.coalesce(StockBalance.project_id, 0)),
+        )
+
+    @staticmethod
+    def stock_rollup(db: Session):
+        """
+        Stock balance totals at every summary level, computed by a single `GROUPING SETS` aggregation: per item and
+        warehouse, item and project, item and location, per item, and the grand total.
+
+        Returns:
+            Iterator[dict]: Rows with the rollup `level` (a value of `ROLLUP_LEVELS`), the ids and names of the
+            grouped columns (None where not grouped), and the total `quantity`.
+        """
+        grouping = func.grouping(
+            StockBalance.warehouse_id, StockBalance.project_id, StockBalance.location_id, StockBalance.item_id
+        )
+        rows = (
+            db.query(
+                grouping.label("grouping"),
+                StockBalance.item_id,
+                func.max(Item.item_code).label("item_code"),
+                func.max(Item.description).label("description"),
+                func.max(Item.unit_of_measure).label("unit_of_measure"),
+                StockBalance.warehouse_id,
+                func.max(Warehouse.name).label("warehouse"),
+                StockBalance.project_id,
+                func.max(Project.name).label("project"),
+                StockBalance.location_id,
+                func.max(Location.name).label("location"),
+                func.sum(StockBalance.quantity).label("quantity"),
+            )
+            .select_from(StockBalance)
+            .join(Item, StockBalance.item_id == Item.id)
+            .outerjoin(Warehouse, StockBalance.warehouse_id == Warehouse.id)
+            .outerjoin(Project, StockBalance.project_id == Project.id)
+            .outerjoin(Location, StockBalance.location_id == Location.id)
+            .filter(StockBalance.quantity != 0)
+            .group_by(func.grouping_sets(
+                tuple_(StockBalance.item_id, StockBalance.warehouse_id),
+                tuple_(StockBalance.item_id, StockBalance.project_id),
+                tuple_(StockBalance.item_id, StockBalance.location_id),
+                tuple_(StockBalance.item_id),
+                tuple_(),
+            ))
+            .order_by(grouping, StockBalance.item_id, StockBalance.warehouse_id, StockBalance.project_id,
+                      StockBalance.location_id)
+            .yield_per(REPORT_BATCH_SIZE)
+        )
+        for row in rows:
+            yield {**row._asdict(), "level": ROLLUP_LEVELS[row.grouping]}
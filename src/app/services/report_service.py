@@ -1,56 +1,51 @@
 # src/app/routers/reports.py
 import os
 import re
-from datetime import datetime
 
-import pandas as pd
 from fastapi import HTTPException, Depends
-from sqlalchemy import func, or_, case
 from sqlalchemy.orm import Session
 from src.app.core.database import get_db
 from src.app.models.item import Item
 from src.app.models.project import Project
 from src.app.models.stock import Stock
+from src.app.models.stock_balance import StockBalance
 from src.app.models.warehouse import Warehouse
 from src.app.models.location import Location
+from src.app.services.stock_service import StockService
+from src.app.services.reference_data_service import ReferenceDataService
+from src.app.services.report_cache_service import ReportCacheService, cached_report
+from src.app.services.report_catalog_service import ReportCatalogService
+from src.app.services.report_query_service import REPORT_PAGE_SIZE, ReportQueryService, ReportRows
+from src.app.utils.report_writer import REPORTS_DIR, report_path, validate_format, write_report
 
 
 class ReportService:
     @staticmethod
-    def list_reports():
+    def list_reports(db: Session, page: int = 1, size: int = 50):
         """
-        Generate a list of reports based on files in a directory.
+        List generated reports from the report catalog, most recent first.
+
+        Args:
+            db (Session): The database session.
+            page (int): The page number, from 1.
+            size (int): The number of reports per page (at most 500).
 
         Returns:
-            list[dict]: List of reports with name, generated timestamp, and download URL.
+            list[dict]: List of reports with name, parameters, size, row count, generated timestamp and file name.
         """
-        base_url = "src/assets/reports/"
-
-        reports = []
-        if not os.path.exists(base_url):
-            print(f"Directory {base_url} does not exist.")
-            return reports
-
-        for file_name in os.listdir(base_url):
-            file_path = os.path.join(base_url, file_name)
-            if os.path.isfile(file_path):
-                generated_time = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat() + "Z"
-                reports.append({
-                    "name": file_name,
-                    "generated_at": generated_time,
-                    "file_name": file_name,
-                })
-
-        return reports
+        return ReportCatalogService.list_reports(db, page, size)
 
     @staticmethod
-    def generate_report(db: Session = Depends(get_db)):
+    def generate_report(db: Session = Depends(get_db), file_format: str = "xlsx"):
+        validate_format(file_format)
         # Generate a sample report
-        ReportService.generate_stock_report(db)
+        ReportService.generate_stock_report(db, file_format)
         return {"message": "Report generated successfully."}
 
     @staticmethod
-    def entity_report(entity_type: str, user_id: int, db: Session = Depends(get_db)):
+    def entity_report(entity_type: str, user_id: int, db: Session = Depends(get_db), file_format: str = "xlsx",
+                      cursor: str = None, limit: int = REPORT_PAGE_SIZE, fields: str = None,
+                      generate_file: bool = False):
 
         # # Check if the user has permission to access the report for the entity type
         # if user["role"] not in ["admin", "manager"]:
@@ -76,6 +71,7 @@ class ReportService:
             raise HTTPException(
                 status_code=400,
                 detail="Invalid entity type. Must be 'item', 'stock', 'location', 'warehouse', or 'project'.")
+        validate_format(file_format)
 
         # Map entity type to the respective table model
         entity_model_map = {
@@ -105,167 +101,88 @@ class ReportService:
         # Retrieve column names dynamically
         column_names = [column.name for column in model.__table__.columns if column.name not in hidden_column]
 
-        # Query all rows from the table
-        if entity_type != "stock":
-            query = db.query(model).filter(model.is_active == True).all()
-        else:
-            query = db.query(model).all()
-
-        # Format the data dynamically based on column names
-        data = [
-            {column: getattr(row, column) for column in column_names}
-            for row in query
-        ]
-
         if entity_type == "stock":
-            for row in data:
-                updated_row = {}
-                for key, value in row.items():
-                    if "_id" in key:
-                        new_key = key.replace("_id", "_name")
-                        if "item" in key and value:
-                            value = db.query(Item).filter(Item.id == value).first().item_code
-                        elif "project" in key and value:
-                            value = db.query(Project).filter(Project.id == value).first().name
-                        elif "warehouse" in key and value:
-                            value = db.query(Warehouse).filter(Warehouse.id == value).first().name
-                        else:
-                            value = "N/A"
-
-                        # Update the row with the new key-value pair
-                        updated_row[new_key] = value  # Add the new key-value pair
-                    else:
-                        updated_row[key] = value  # Keep the original key-value pair if it doesn't end with "_id"
-                # Replace the original row with the updated one
-                row.clear()
-                row.update(updated_row)
+            # Item codes and holder names are joined in, instead of being looked up row by row
+            rows = ReportQueryService.stock_entity_rows(db, column_names)
+        else:
+            rows = ReportQueryService.entity_rows(db, model, column_names)
 
         # Sanitize location name for the file path
         sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', entity_type)
 
-        df = pd.DataFrame(data)
-        file_path = f"src/assets/reports/{sanitized_name}s_report.xlsx"
-        df.to_excel(file_path, index=False)
-        return {"detail": f"Report generated at {file_path}", "data": data}
+        file_path = report_path(f"{sanitized_name}s_report", file_format)
+        return ReportService.paginated_report(
+            db, "entity_report", {"entity_type": entity_type, "file_format": file_format},
+            (Stock, Item, Warehouse, Project, Location), rows, file_path, file_format, user_id, cursor, limit, fields,
+            job=("entity", {"entity_type": entity_type}), generate_file=generate_file,
+        )
 
     @staticmethod
-    def get_stock_by_item(item_id: int, db: Session = Depends(get_db)):
+    def get_stock_by_item(item_id: int, db: Session = Depends(get_db), file_format: str = "xlsx", user_id: int = None,
+                          cursor: str = None, limit: int = REPORT_PAGE_SIZE, fields: str = None,
+                          generate_file: bool = False):
         """
         Get stock summary for a specific item across all locations, warehouses, and projects.
         """
+        validate_format(file_format)
         item = db.query(Item).filter(Item.id == item_id).first()
         if not item:
             raise HTTPException(status_code=404, detail="Item not found")
 
-        stocks = db.query(
-            func.coalesce(Warehouse.name, "N/A").label("warehouse"),
-            func.coalesce(Project.name, "N/A").label("project"),
-            func.sum(Stock.quantity).label("total_quantity")
-        ).outerjoin(Warehouse, Stock.warehouse_id == Warehouse.id).outerjoin(
-            Project, Stock.project_id == Project.id).filter(
-            Stock.item_id == item_id).group_by(Warehouse.name, Project.name).all()
-
-        data = [
-            {
-                "Warehouse": stock.warehouse,
-                "Project": stock.project,
-                "Total Quantity": stock.total_quantity,
-            }
-            for stock in stocks
-        ]
-        print(data)
+        rows = ReportQueryService.item_holder_rows(db, item_id)
+
         # Sanitize location name for the file path
         sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', item.item_code)
 
-        df = pd.DataFrame(data)
-        file_path = f"src/assets/reports/item_{sanitized_name}_stock_report.xlsx"
-        df.to_excel(file_path, index=False)
-        return {
-            "detail": f"Report generated at {file_path}",
-            "data": data
-            }
+        file_path = report_path(f"item_{sanitized_name}_stock_report", file_format)
+        return ReportService.paginated_report(
+            db, "get_stock_by_item", {"item_id": item_id, "file_format": file_format},
+            (StockBalance, Item, Warehouse, Project), rows, file_path, file_format, user_id, cursor, limit, fields,
+            job=("stock_by_item", {"item_id": item_id}), generate_file=generate_file,
+        )
 
     @staticmethod
-    def get_stock_by_entity_type(entity_type: str, db: Session = Depends(get_db)):
+    def get_stock_by_entity_type(entity_type: str, db: Session = Depends(get_db), file_format: str = "xlsx",
+                                 user_id: int = None, cursor: str = None, limit: int = REPORT_PAGE_SIZE,
+                                 fields: str = None, generate_file: bool = False):
         """
         Get stock summary for a specific entity type (location, warehouse, or project).
 
         Args:
             entity_type (str): The type of entity ("location", "warehouse", "project").
             db (Session): The database session.
+            file_format (str): The report file format ("xlsx", "csv" or "csv.gz").
+            user_id (int): The ID of the requesting user, recorded in the report catalog.
+            cursor (str): The `next_cursor` of the previous page of the response.
+            limit (int): The number of rows in the response.
+            fields (str): Comma-separated columns to return in the response.
+            generate_file (bool): Write the report file in this call, as report jobs do (see `paginated_report`).
 
         Returns:
-            dict: Stock summary grouped by entity type.
+            dict: A page of the stock summary grouped by entity type, the full summary being in the report file.
         """
         if entity_type not in ["location", "warehouse", "project"]:
             raise HTTPException(status_code=400, detail="Invalid entity type.")
+        validate_format(file_format)
 
-        query = db.query(
-            Item.item_code,
-            Item.description,
-            Item.unit_of_measure,
-            func.sum(Stock.quantity).label("total_quantity"),
-            case(
-                (Stock.warehouse_id.isnot(None), "Warehouse"),
-                (Stock.project_id.isnot(None), "Project"),
-                else_="Unknown",
-            ).label("entity_type"),
-            case(
-                (Stock.warehouse_id.isnot(None), Warehouse.name),
-                (Stock.project_id.isnot(None), Project.name),
-                else_="Unknown",
-            ).label("entity_name"),
-        ).join(Stock, Stock.item_id == Item.id, isouter=True
-               ).join(Warehouse, Stock.warehouse_id == Warehouse.id, isouter=True
-                      ).join(Project, Stock.project_id == Project.id, isouter=True)
-
-        if entity_type == "location":
-            query = query.filter(
-                or_(
-                    Warehouse.location_id.isnot(None),
-                    Project.location_id.isnot(None)
-                )
-            )
-        elif entity_type == "warehouse":
-            query = query.filter(Stock.warehouse_id.isnot(None))
-        elif entity_type == "project":
-            query = query.filter(Stock.project_id.isnot(None))
-
-        query = query.group_by(
-            Item.item_code, Item.description, Item.unit_of_measure, Warehouse.name, Project.name,
-            Stock.warehouse_id, Stock.project_id
-        )
-
-        stocks = query.all()
-
-        if not stocks:
-            raise HTTPException(status_code=404, detail="No stock found for the specified entity type.")
-
-        # Prepare response data
-        data = [
-            {
-                "Item Code": stock.item_code,
-                "Description": stock.description,
-                "Unit of Measure": stock.unit_of_measure,
-                "Total Quantity": stock.total_quantity,
-                "Entity Type": stock.entity_type,
-                "Entity Name": stock.entity_name
-            }
-            for stock in stocks
-        ]
+        rows = ReportQueryService.entity_type_rows(db, entity_type)
 
         # Sanitize location name for the file path
         sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', entity_type)
 
         # Save report to Excel
-        file_path = f"src/assets/reports/{sanitized_name}s_stock_report.xlsx"
-        df = pd.DataFrame(data)
-        df.to_excel(file_path, index=False)
-
-        return {"detail": f"Report generated at {file_path}", "data": data}
+        file_path = report_path(f"{sanitized_name}s_stock_report", file_format)
+        return ReportService.paginated_report(
+            db, "get_stock_by_entity_type", {"entity_type": entity_type, "file_format": file_format},
+            (StockBalance, Item, Warehouse, Project), rows, file_path, file_format, user_id, cursor, limit, fields,
+            not_found="No stock found for the specified entity type.",
+            job=("stock_by_entity_type", {"entity_type": entity_type}), generate_file=generate_file,
+        )
 
     @staticmethod
-    def get_stock_by_entity_and_id(entity_type: str, entity_id: int, db: Session = Depends(get_db)):
+    def get_stock_by_entity_and_id(entity_type: str, entity_id: int, db: Session = Depends(get_db),
+                                   file_format: str = "xlsx", user_id: int = None, cursor: str = None,
+                                   limit: int = REPORT_PAGE_SIZE, fields: str = None, generate_file: bool = False):
         """
         Get stock for a specific entity type and entity ID.
 
@@ -273,109 +190,167 @@ class ReportService:
             entity_type (str): The type of entity ("location", "warehouse", "project").
             entity_id (int): The ID of the entity.
             db (Session): The database session.
+            file_format (str): The report file format ("xlsx", "csv" or "csv.gz").
+            user_id (int): The ID of the requesting user, recorded in the report catalog.
+            cursor (str): The `next_cursor` of the previous page of the response.
+            limit (int): The number of rows in the response.
+            fields (str): Comma-separated columns to return in the response.
+            generate_file (bool): Write the report file in this call, as report jobs do (see `paginated_report`).
 
         Returns:
-            dict: Stock details grouped by item.
+            dict: A page of the stock details, the full details being in the report file.
         """
         if entity_type not in ["location", "warehouse", "project"]:
             raise HTTPException(status_code=400, detail="Invalid entity type.")
+        validate_format(file_format)
 
         entity_name = ""
 
-        query = db.query(Stock)
-        item = db.query(Item)
-
         if entity_type == "location":
             # Combine results from both sources
-            query = query.filter(
-                or_(
-                    Stock.warehouse_id.in_(
-                        db.query(Warehouse.id).filter(Warehouse.location_id == entity_id)
-                    ),
-                    Stock.project_id.in_(
-                        db.query(Project.id).filter(Project.location_id == entity_id)
-                    )
-                )
-            )
-            entity_name = db.query(Location).filter(Location.id == entity_id).first().name
+            entity_filter = StockService.location_filter(entity_id)
+            entity_name = ReferenceDataService.get_name(db, Location, entity_id)
         elif entity_type == "warehouse":
-            query = query.filter(Stock.warehouse_id == entity_id)
-            entity_name = db.query(Warehouse).filter(Warehouse.id == entity_id).first().name
-        elif entity_type == "project":
-            query = query.filter(Stock.project_id == entity_id)
-            entity_name = db.query(Project).filter(Project.id == entity_id).first().name
-        stocks = query.all()
-
-        if not stocks:
-            raise HTTPException(status_code=404, detail="No stock found for the specified entity.")
-
-        data = [
-            {
-                "Item Code": item.filter(Item.id == stock.item_id).first().item_code,
-                "Description": item.filter(Item.id == stock.item_id).first().description,
-                "Quantity": stock.quantity,
-                "Location": db.query(Warehouse.name if stock.warehouse_id else Project.name)
-                .filter(
-                    Warehouse.id == stock.warehouse_id if stock.warehouse_id else Project.id == stock.project_id
-                )
-                .scalar(),
-            }
-            for stock in stocks
-        ]
+            entity_filter = Stock.warehouse_id == entity_id
+            entity_name = ReferenceDataService.get_name(db, Warehouse, entity_id)
+        else:
+            entity_filter = Stock.project_id == entity_id
+            entity_name = ReferenceDataService.get_name(db, Project, entity_id)
+
+        rows = ReportQueryService.stock_holder_rows(db, entity_filter)
 
         # Sanitize location name for the file path
         sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', entity_name)
 
         # Generate the report
-        df = pd.DataFrame(data)
-        file_path = f"src/assets/reports/{sanitized_name}_stock_report.xlsx"
-        df.to_excel(file_path, index=False)
-        return {"detail": f"Report generated at {file_path}", "data": data}
+        file_path = report_path(f"{sanitized_name}_stock_report", file_format)
+        return ReportService.paginated_report(
+            db, "get_stock_by_entity_and_id",
+            {"entity_type": entity_type, "entity_id": entity_id, "file_format": file_format},
+            (Stock, Item, Warehouse, Project, Location), rows, file_path, file_format, user_id, cursor, limit, fields,
+            not_found="No stock found for the specified entity.",
+            job=("stock_by_entity", {"entity_type": entity_type, "entity_id": entity_id}),
+            generate_file=generate_file,
+        )
+
+    @staticmethod
+    @cached_report(StockBalance, Item, Warehouse, Project, Location)
+    def get_stock_rollup(db: Session = Depends(get_db), user_id: int = None):
+        """
+        Get every stock summary level in one payload: per item and warehouse, project and location, per item, and
+        the grand total, all from one aggregation.
+
+        Args:
+            db (Session): The database session.
+            user_id (int): The ID of the requesting user.
+
+        Returns:
+            dict: The grand total, the item totals (with item details), and the item totals per holder and location.
+        """
+        rollup = {"total": 0, "items": [], "warehouses": [], "projects": [], "locations": []}
+        for row in ReportQueryService.stock_rollup(db):
+            level = row["level"]
+            if level == "total":
+                rollup["total"] = row["quantity"]
+            elif level == "item":
+                rollup["items"].append({
+                    "item_id": row["item_id"],
+                    "item_code": row["item_code"],
+                    "description": row["description"],
+                    "unit_of_measure": row["unit_of_measure"],
+                    "quantity": row["quantity"],
+                })
+            elif row[f"{level}_id"] is not None:
+                # Balances without a holder of this kind are grouped under a NULL id, which is not a holder
+                rollup[f"{level}s"].append({
+                    "item_id": row["item_id"],
+                    f"{level}_id": row[f"{level}_id"],
+                    level: row[level],
+                    "quantity": row["quantity"],
+                })
+        return rollup
+
+    @staticmethod
+    @cached_report(Stock, Item, Warehouse, Project)
+    def generate_stock_report(db: Session, file_format: str = "xlsx", user_id: int = None):
+        # Streamed from a server-side cursor into the file, never held in memory as a whole
+        file_path = report_path("Stock_Report", file_format)
+        rows = ReportQueryService.stock_summary_rows(db)
+        write_report(file_path, ReportQueryService.stream(rows), columns=list(rows.columns), file_format=file_format)
 
     @staticmethod
-    def generate_stock_report(db: Session):
-        stocks = db.query(Stock).all()
-        data = [
-            {
-                "Item ID": stock.item_id,
-                "Quantity": stock.quantity,
-                "Warehouse": stock.warehouse_id,
-                "Project": stock.project_id,
-            }
-            for stock in stocks
-        ]
-
-        for row in data:
-            updated_row = {}
-            for key, value in row.items():
-                if key != "Quantity":
-                    if key == "Item ID" and value:
-                        value = db.query(Item).filter(Item.id == value).first().item_code
-                    elif key == "Warehouse" and value:
-                        value = db.query(Warehouse).filter(Warehouse.id == value).first().name
-                    elif key == "Project" and value:
-                        value = db.query(Project).filter(Project.id == value).first().name
-                    else:
-                        value = "N/A"
-
-                # Update the row with the new key-value pair
-                updated_row[key] = value  # Add the new key-value pair
-
-            # Replace the original row with the updated one
-            row.clear()
-            row.update(updated_row)
-
-        df = pd.DataFrame(data)
-        file_path = "src/assets/reports/Stock_Report.xlsx"
-        df.to_excel(file_path, index=False)
+    def paginated_report(db: Session, report: str, arguments: dict, tables, rows: ReportRows, file_path: str,
+                         file_format: str, user_id: int = None, cursor: str = None, limit: int = REPORT_PAGE_SIZE,
+                         fields: str = None, not_found: str = None, job: tuple = None, generate_file: bool = False):
+        """
+        Return one page of a report, and on the first page make sure its full file is, or will be, up to date.
+
+        The page is queried on its own and never waits for the file. Outside report jobs, the file is not written
+        either: when it is missing or stale, the report job `job` generating it is submitted, or joined if already
+        queued or running, and its status is returned to poll `/reports/jobs/{id}` until the file is written.
+        Continuation pages (`cursor`) leave the file alone, so paging through a report costs its page queries only.
+
+        Args:
+            db (Session): The database session.
+            report (str): The report name.
+            arguments (dict): The report parameters, including the file format.
+            tables: The mapped classes the report reads.
+            rows (ReportRows): The report rows.
+            file_path (str): The path of the report file.
+            file_format (str): "xlsx", "csv" or "csv.gz".
+            user_id (int): The ID of the requesting user.
+            cursor (str): The `next_cursor` of the previous page.
+            limit (int): The number of rows in the page.
+            fields (str): Comma-separated columns to return.
+            not_found (str): If set, the 404 detail raised when the report has no rows.
+            job (tuple): The report name and parameters of the report job writing the file.
+            generate_file (bool): Write the file in this call, unless it is unchanged since last written. Set by
+                report jobs.
+
+        Returns:
+            dict: The report file location, the report `job` writing it if it is not up to date (None if it is, left
+            out of continuation pages), and the page `columns`, `data` and `next_cursor`.
+        """
+        # Imported here: report jobs run the report methods of this module
+        from src.app.services.report_job_service import ReportJobService
+
+        page = ReportQueryService.page(rows, cursor, limit, fields)
+        if not_found and not cursor and not page["data"]:
+            raise HTTPException(status_code=404, detail=not_found)
+
+        file_url = f"/reports/files/{os.path.basename(file_path)}"
+        if cursor and not generate_file:
+            return {"file_url": file_url, **page}
+
+        if generate_file:
+            ReportCacheService.cached(
+                db, report, arguments, tables,
+                lambda: {"rows_written": write_report(file_path, ReportQueryService.stream(rows), list(rows.columns),
+                                                      file_format)},
+                user_id,
+            )
+            return {"detail": f"Report generated at {file_path}", "file_url": file_url, "job": None, **page}
+
+        if ReportCacheService.lookup(db, report, arguments, tables):
+            return {"detail": f"Report generated at {file_path}", "file_url": file_url, "job": None, **page}
+
+        report_job = ReportJobService.submit_job(db, *job, file_format, user_id)
+        return {
+            "detail": f"Report generation started, poll /reports/jobs/{report_job['id']}",
+            "file_url": file_url,
+            "job": report_job,
+            **page,
+        }
 
     @staticmethod
-    def delete_report(data: dict):
+    def delete_report(data: dict, db: Session):
         # Parse the file path from the path
-        file_path = f"src/assets/reports/{os.path.basename(data["file_name"])}"
+        file_name = os.path.basename(data["file_name"])
+        file_path = f"{REPORTS_DIR}/{file_name}"
 
         # Check if the file exists
         if not os.path.exists(file_path):
+            ReportCatalogService.remove(db, file_name)
             raise HTTPException(status_code=404, detail="Report not found")
 
         # Delete the file
@@ -384,4 +359,5 @@ class ReportService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to delete report: {str(e)}")
 
+        ReportCatalogService.remove(db, file_name)
         return {"detail": "Report deleted successfully"}
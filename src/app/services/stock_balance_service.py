@@ -0,0 +1,186 @@
+# src/app/services/stock_balance_service.py
+
+from datetime import datetime, UTC
+from sqlalchemy import event, func, inspect, select, delete, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.app.models.project import Project
+from src.app.models.stock import Stock
+from src.app.models.stock_balance import StockBalance
+from src.app.models.warehouse import Warehouse
+
+
+class StockBalanceService:
+    @staticmethod
+    def apply_deltas(db: Session, deltas: dict):
+        """
+        Add quantity deltas to the stock balance rollup without committing.
+
+        All deltas are applied by a single `INSERT ... ON CONFLICT DO UPDATE`; the holder's location is resolved
+        inside the statement, so no extra lookups are issued, and refreshed on the existing rows.
+
+        Args:
+            db (Session): The database session, in the transaction of the stock movement.
+            deltas (dict): Mapping of (item_id, project_id, warehouse_id) to the quantity change.
+
+        Returns:
+            dict: Mapping of (item_id, project_id, warehouse_id) to the balance after the change.
+        """
+        statement = StockBalanceService.deltas_statement(deltas)
+        if statement is None:
+            return {}
+        return {(row.item_id, row.project_id, row.warehouse_id): row.quantity for row in db.execute(statement)}
+
+    @staticmethod
+    async def apply_deltas_async(db: AsyncSession, deltas: dict):
+        """
+        `apply_deltas` on an AsyncSession.
+        """
+        statement = StockBalanceService.deltas_statement(deltas)
+        if statement is None:
+            return {}
+        return {(row.item_id, row.project_id, row.warehouse_id): row.quantity for row in await db.execute(statement)}
+
+    @staticmethod
+    def deltas_statement(deltas: dict):
+        """
+        The upsert applying `deltas` to the rollup and returning the new balances, or None without any change.
+        """
+        rows = [
+            {
+                "item_id": item_id,
+                "project_id": project_id,
+                "warehouse_id": warehouse_id,
+                "location_id": func.coalesce(
+                    select(Warehouse.location_id).where(Warehouse.id == warehouse_id).scalar_subquery(),
+                    select(Project.location_id).where(Project.id == project_id).scalar_subquery(),
+                ),
+                "quantity": delta,
+                "updated_at": datetime.now(UTC),
+            }
+            for (item_id, project_id, warehouse_id), delta in deltas.items()
+            if delta
+        ]
+        if not rows:
+            return None
+
+        statement = insert(StockBalance).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                StockBalance.item_id,
+                func.coalesce(StockBalance.project_id, 0),
+                func.coalesce(StockBalance.warehouse_id, 0),
+            ],
+            set_={
+                "quantity": StockBalance.quantity + statement.excluded.quantity,
+                "location_id": statement.excluded.location_id,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+        return statement.returning(
+            StockBalance.item_id, StockBalance.project_id, StockBalance.warehouse_id, StockBalance.quantity
+        )
+
+    @staticmethod
+    def apply_delta(db: Session, item_id: int, project_id: int, warehouse_id: int, delta: float):
+        """
+        Add a single quantity delta to the stock balance rollup without committing.
+
+        Returns:
+            float: The balance after the change.
+        """
+        key = (item_id, project_id, warehouse_id)
+        return StockBalanceService.apply_deltas(db, {key: delta}).get(key)
+
+    @staticmethod
+    async def apply_delta_async(db: AsyncSession, item_id: int, project_id: int, warehouse_id: int, delta: float):
+        """
+        `apply_delta` on an AsyncSession.
+        """
+        key = (item_id, project_id, warehouse_id)
+        return (await StockBalanceService.apply_deltas_async(db, {key: delta})).get(key)
+
+    @staticmethod
+    def aggregate_stocks(db: Session):
+        """
+        Recompute the balances from the stocks table.
+
+        Returns:
+            dict: Mapping of (item_id, project_id, warehouse_id) to the summed stock quantity.
+        """
+        rows = (
+            db.query(Stock.item_id, Stock.project_id, Stock.warehouse_id, func.sum(Stock.quantity).label("quantity"))
+            .group_by(Stock.item_id, Stock.project_id, Stock.warehouse_id)
+            .all()
+        )
+        return {(row.item_id, row.project_id, row.warehouse_id): row.quantity for row in rows}
+
+    @staticmethod
+    def verify(db: Session, tolerance: float = 1e-9):
+        """
+        Compare the rollup with the stocks table, and the location of each balance with its holder's.
+
+        Returns:
+            list[dict]: One entry per (item, holder) whose balance differs from the stocks table or whose location
+            differs from the holder's.
+        """
+        expected = StockBalanceService.aggregate_stocks(db)
+        actual = {}
+        locations = {}
+        for row in (
+            db.query(StockBalance.item_id, StockBalance.project_id, StockBalance.warehouse_id, StockBalance.quantity,
+                     StockBalance.location_id,
+                     func.coalesce(Warehouse.location_id, Project.location_id).label("holder_location_id"))
+            .outerjoin(Warehouse, StockBalance.warehouse_id == Warehouse.id)
+            .outerjoin(Project, StockBalance.project_id == Project.id)
+        ):
+            key = (row.item_id, row.project_id, row.warehouse_id)
+            actual[key] = row.quantity
+            locations[key] = (row.location_id, row.holder_location_id)
+
+        drift = []
+        for key in sorted(expected.keys() | actual.keys(), key=lambda k: tuple(v or 0 for v in k)):
+            stock_qty = expected.get(key, 0)
+            balance_qty = actual.get(key, 0)
+            location_id, holder_location_id = locations.get(key, (None, None))
+            if abs(stock_qty - balance_qty) > tolerance or location_id != holder_location_id:
+                item_id, project_id, warehouse_id = key
+                drift.append({
+                    "item_id": item_id,
+                    "project_id": project_id,
+                    "warehouse_id": warehouse_id,
+                    "stock_quantity": stock_qty,
+                    "balance_quantity": balance_qty,
+                    "location_id": location_id,
+                    "holder_location_id": holder_location_id,
+                })
+        return drift
+
+    @staticmethod
+    def rebuild(db: Session):
+        """
+        Replace the rollup with balances recomputed from the stocks table, in one transaction.
+
+        Returns:
+            int: The number of balance rows written.
+        """
+        # Block concurrent movements (but not readers) while the rollup is rebuilt
+        db.execute(text("LOCK TABLE stocks IN SHARE MODE"))
+        db.execute(delete(StockBalance))
+        expected = StockBalanceService.aggregate_stocks(db)
+        StockBalanceService.apply_deltas(db, expected)
+        db.commit()
+        return len([quantity for quantity in expected.values() if quantity])
+
+
+@event.listens_for(Session, "after_flush")
+def _move_holder_balances(session, flush_context):
+    # A warehouse or project moved to another location takes its balances along, in the same transaction
+    for obj in session.dirty:
+        if isinstance(obj, (Warehouse, Project)) and inspect(obj).attrs.location_id.history.has_changes():
+            holder_column = StockBalance.warehouse_id if isinstance(obj, Warehouse) else StockBalance.project_id
+            session.execute(
+                update(StockBalance).where(holder_column == obj.id).values(location_id=obj.location_id),
+                execution_options={"synchronize_session": False},
+            )
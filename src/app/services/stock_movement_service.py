@@ -0,0 +1,145 @@
+# src/app/services/stock_movement_service.py
+
+from datetime import datetime, UTC
+from sqlalchemy import func, insert, select, literal, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from src.app.models.item import Item
+from src.app.models.stock_balance import StockBalance
+from src.app.models.stock_movement import StockMovement, MovementType
+from src.app.models.stock_snapshot import StockSnapshot, StockSnapshotBalance
+
+
+class StockMovementService:
+    @staticmethod
+    def movement(item_id: int, project_id: int, warehouse_id: int, movement_type: MovementType,
+                 quantity_delta: float, cost_price: float, balance_after: float, moved_by: int,
+                 transfer_id: str = None):
+        """
+        Build a ledger row for `record`.
+        """
+        return {
+            "item_id": item_id,
+            "project_id": project_id,
+            "warehouse_id": warehouse_id,
+            "movement_type": movement_type,
+            "transfer_id": transfer_id,
+            "quantity_delta": quantity_delta,
+            "cost_price": cost_price,
+            "balance_after": balance_after,
+            "moved_by": moved_by,
+            "moved_at": datetime.now(UTC),
+        }
+
+    @staticmethod
+    def record(db: Session, movements: list[dict]):
+        """
+        Append movements to the ledger with one multi-row INSERT, in the caller's transaction.
+
+        Args:
+            db (Session): The database session of the stock movement.
+            movements (list[dict]): Rows built with `movement`.
+        """
+        if movements:
+            db.execute(insert(StockMovement), movements)
+
+    @staticmethod
+    async def record_async(db: AsyncSession, movements: list[dict]):
+        """
+        `record` on an AsyncSession.
+        """
+        if movements:
+            await db.execute(insert(StockMovement), movements)
+
+    @staticmethod
+    def take_snapshot(db: Session):
+        """
+        Copy every current stock balance into a new snapshot.
+
+        The balances table is share-locked for the duration, so the snapshot and its `last_movement_id` describe
+        the same committed state: movements update the balances and append to the ledger in one transaction.
+
+        Returns:
+            StockSnapshot: The new snapshot.
+        """
+        db.execute(text("LOCK TABLE stock_balances IN SHARE MODE"))
+
+        last_movement_id = db.query(func.coalesce(func.max(StockMovement.id), 0)).scalar()
+        snapshot = StockSnapshot(taken_at=datetime.now(UTC), last_movement_id=last_movement_id)
+        db.add(snapshot)
+        db.flush()
+
+        db.execute(
+            insert(StockSnapshotBalance).from_select(
+                ["snapshot_id", "item_id", "project_id", "warehouse_id", "quantity"],
+                select(
+                    literal(snapshot.id), StockBalance.item_id, StockBalance.project_id, StockBalance.warehouse_id,
+                    StockBalance.quantity
+                ).where(StockBalance.quantity != 0)
+            )
+        )
+        db.commit()
+        db.refresh(snapshot)
+        return snapshot
+
+    @staticmethod
+    def get_balance_as_of(db: Session, item_id: int, as_of: datetime, project_id: int = None,
+                          warehouse_id: int = None):
+        """
+        Get the stock of an item held by a project or warehouse at a point in time.
+
+        Reads the latest snapshot taken at or before `as_of`, then adds the ledger movements recorded after that
+        snapshot up to `as_of`, so only the movements of one snapshot interval are scanned.
+
+        Args:
+            db (Session): The database session.
+            item_id (int): The ID of the item.
+            as_of (datetime): The point in time.
+            project_id (int): The project holding the stock (optional).
+            warehouse_id (int): The warehouse holding the stock (optional).
+
+        Returns:
+            dict: The item, holder, point in time and quantity.
+        """
+        if bool(project_id) == bool(warehouse_id):
+            raise HTTPException(status_code=400, detail="Specify either project_id or warehouse_id.")
+        if not db.query(Item.id).filter(Item.id == item_id).first():
+            raise HTTPException(status_code=404, detail="Item not found")
+
+        if as_of.tzinfo is not None:
+            as_of = as_of.astimezone(UTC).replace(tzinfo=None)
+
+        snapshot = (
+            db.query(StockSnapshot.id, StockSnapshot.last_movement_id)
+            .filter(StockSnapshot.taken_at <= as_of)
+            .order_by(StockSnapshot.taken_at.desc())
+            .first()
+        )
+
+        quantity = 0
+        last_movement_id = 0
+        if snapshot:
+            last_movement_id = snapshot.last_movement_id
+            quantity = db.query(StockSnapshotBalance.quantity).filter(
+                StockSnapshotBalance.snapshot_id == snapshot.id,
+                StockSnapshotBalance.item_id == item_id,
+                StockSnapshotBalance.project_id == project_id,
+                StockSnapshotBalance.warehouse_id == warehouse_id,
+            ).scalar() or 0
+
+        quantity += db.query(func.coalesce(func.sum(StockMovement.quantity_delta), 0)).filter(
+            StockMovement.item_id == item_id,
+            StockMovement.project_id == project_id,
+            StockMovement.warehouse_id == warehouse_id,
+            StockMovement.id > last_movement_id,
+            StockMovement.moved_at <= as_of,
+        ).scalar()
+
+        return {
+            "item_id": item_id,
+            "project_id": project_id,
+            "warehouse_id": warehouse_id,
+            "as_of": as_of,
+            "quantity": quantity,
+        }
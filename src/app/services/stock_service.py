@@ -1,6 +1,13 @@
 # src/app/services/stock_service.py
-
-from sqlalchemy import func, or_
+#
+# The hot read and movement paths exist twice: as sync methods on a Session, and as `*_async` methods on an
+# AsyncSession (DATABASE_ASYNC), which await every query. Both build the same statements and share the validation,
+# merging and bookkeeping helpers, so only the database calls differ.
+
+import uuid
+from datetime import datetime
+from sqlalchemy import func, or_, and_, any_, select, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, Depends
 from src.app.core.database import get_db
@@ -8,53 +15,102 @@ from src.app.models.item import Item
 from src.app.models.location import Location
 from src.app.models.project import Project
 from src.app.models.stock import Stock
+from src.app.models.stock_balance import StockBalance
+from src.app.models.stock_movement import MovementType
 from src.app.models.warehouse import Warehouse
 from src.app.schemas.stock import StockCreate, StockDeduct, StockTransfer
 from src.app.services.history_log_service import HistoryLogService
+from src.app.services.stock_balance_service import StockBalanceService
+from src.app.services.stock_movement_service import StockMovementService
 
 
 class StockService:
+    @staticmethod
+    def references(item_id: int = None, warehouse_id: int = None, project_id: int = None, location_id: int = None):
+        """
+        The references `validate_references` checks: the item always, the others when given.
+
+        Returns:
+            list[tuple]: (existence query, 404 detail) pairs.
+        """
+        checks = [(Item, item_id, "Item not found")]
+        checks += [(model, entity_id, detail) for model, entity_id, detail in (
+            (Warehouse, warehouse_id, "Warehouse not found"),
+            (Project, project_id, "Project not found"),
+            (Location, location_id, "Location not found"),
+        ) if entity_id]
+        return [(select(model.id).where(model.id == entity_id), detail) for model, entity_id, detail in checks]
+
     @staticmethod
     def validate_references(db: Session, item_id: int = None, warehouse_id: int = None, project_id: int = None,
                             location_id: int = None):
-        # Validate item existence
-        if not db.query(Item).filter(Item.id == item_id).first():
-            raise HTTPException(status_code=404, detail="Item not found")
+        # Validate item existence, then warehouse, project, or location existence
+        for query, detail in StockService.references(item_id, warehouse_id, project_id, location_id):
+            if db.scalar(query) is None:
+                raise HTTPException(status_code=404, detail=detail)
 
-        # Validate warehouse, project, or location existence
-        if warehouse_id and not db.query(Warehouse).filter(Warehouse.id == warehouse_id).first():
-            raise HTTPException(status_code=404, detail="Warehouse not found")
-        if project_id and not db.query(Project).filter(Project.id == project_id).first():
-            raise HTTPException(status_code=404, detail="Project not found")
-        if location_id and not db.query(Location).filter(Location.id == location_id).first():
-            raise HTTPException(status_code=404, detail="Location not found")
+    @staticmethod
+    async def validate_references_async(db: AsyncSession, item_id: int = None, warehouse_id: int = None,
+                                        project_id: int = None, location_id: int = None):
+        for query, detail in StockService.references(item_id, warehouse_id, project_id, location_id):
+            if await db.scalar(query) is None:
+                raise HTTPException(status_code=404, detail=detail)
 
     @staticmethod
-    def add_stock(stock_data: StockCreate, requester_id: int, db: Session = Depends(get_db)):
-        StockService.validate_references(db, stock_data.item_id, stock_data.warehouse_id, stock_data.project_id)
+    def lock_statement(item_id: int, holders: list[tuple]):
+        """
+        `SELECT ... FOR UPDATE` of the stock rows of an item held by the given (project_id, warehouse_id) holders.
 
-        # Validate input
-        if stock_data.project_id and stock_data.warehouse_id:
-            raise HTTPException(status_code=400, detail="Specify either project_id or warehouse_id, not both.")
-        if not stock_data.quantity or stock_data.quantity <= 0:
-            raise HTTPException(status_code=400, detail="Quantity must be greater than zero.")
-        if not (stock_data.project_id or stock_data.warehouse_id):
-            raise HTTPException(status_code=400, detail="Specify either project_id or warehouse_id.")
+        Rows are always locked in (item_id, project_id, warehouse_id, id) order, so concurrent movements touching
+        the same rows acquire their locks in the same sequence and cannot deadlock each other.
+        """
+        return (
+            select(Stock)
+            .where(
+                Stock.item_id == item_id,
+                or_(*[and_(Stock.project_id == project_id, Stock.warehouse_id == warehouse_id)
+                      for project_id, warehouse_id in holders])
+            )
+            .order_by(Stock.item_id, Stock.project_id.nulls_first(), Stock.warehouse_id.nulls_first(), Stock.id)
+            .with_for_update()
+        )
 
-        # Check if stock already exists
-        stock = db.query(Stock).filter(
-            Stock.item_id == stock_data.item_id,
-            Stock.project_id == stock_data.project_id,
-            Stock.warehouse_id == stock_data.warehouse_id,
-        ).first()
+    @staticmethod
+    def by_holder(stocks, holders: list[tuple]) -> dict:
+        locked = {holder: [] for holder in holders}
+        for stock in stocks:
+            locked[(stock.project_id, stock.warehouse_id)].append(stock)
+        return locked
 
-        metadata = {
-            "item_id": stock_data.item_id,
-            "previous_qty": stock.quantity if stock else 0,
-            "added_qty": stock_data.quantity,
-            "project_id":  getattr(stock_data, "project_id", "N/A"),
-            "warehouse_id": getattr(stock_data, "warehouse_id", "N/A")
-        }
+    @staticmethod
+    def lock_stocks(db: Session, item_id: int, holders: list[tuple]):
+        """
+        Lock the stock rows of an item held by the given projects/warehouses with `SELECT ... FOR UPDATE`.
+
+        Args:
+            db (Session): The database session.
+            item_id (int): The ID of the item.
+            holders (list[tuple]): (project_id, warehouse_id) pairs identifying the holders to lock.
+
+        Returns:
+            dict: Locked stock rows grouped by their (project_id, warehouse_id) holder.
+        """
+        return StockService.by_holder(db.scalars(StockService.lock_statement(item_id, holders)), holders)
+
+    @staticmethod
+    async def lock_stocks_async(db: AsyncSession, item_id: int, holders: list[tuple]):
+        return StockService.by_holder(await db.scalars(StockService.lock_statement(item_id, holders)), holders)
+
+    @staticmethod
+    def apply_add(db: Session | AsyncSession, stocks: list[Stock], stock_data: StockCreate):
+        """
+        Add stock to already locked rows without committing.
+
+        Returns:
+            tuple: The quantity before the addition and the stock row that received it.
+        """
+        stock = stocks[0] if stocks else None
+        previous_qty = stock.quantity if stock else 0
 
         if stock:
             # Update cost_price using weighted average
@@ -67,47 +123,36 @@ class StockService:
 
             # Update stock quantity
             stock.quantity += stock_data.quantity
-
-            HistoryLogService.log_action(db, "stock", stock.item_id, "add", requester_id, metadata)
-            return stock
         else:
-            new_stock = Stock(**dict(stock_data))
-            db.add(new_stock)
+            stock = Stock(**dict(stock_data))
+            db.add(stock)
 
-            db.commit()
-            HistoryLogService.log_action(db, "stock", new_stock.item_id, "add", requester_id, metadata)
-            return new_stock
+        return previous_qty, stock
 
     @staticmethod
-    def deduct_stock(stock_data: StockDeduct, requester_id: int, db: Session = Depends(get_db)):
-        StockService.validate_references(db, stock_data.item_id, stock_data.warehouse_id, stock_data.project_id)
-        # Validate input
-        if stock_data.project_id and stock_data.warehouse_id:
-            raise HTTPException(status_code=400, detail="Specify either project_id or warehouse_id, not both.")
-        if not (stock_data.project_id or stock_data.warehouse_id):
-            raise HTTPException(status_code=400, detail="Specify either project_id or warehouse_id.")
-        if stock_data.quantity <= 0:
-            raise HTTPException(status_code=400, detail="Quantity must be greater than zero.")
-
-        # Aggregate stock across all entries for the given project or warehouse
-        stock_query = db.query(Stock).filter(
-            Stock.item_id == stock_data.item_id,
-            Stock.project_id == stock_data.project_id,
-            Stock.warehouse_id == stock_data.warehouse_id,
-        )
+    def apply_deduct(db: Session, stocks: list[Stock], quantity: float):
+        """
+        Deduct stock from already locked rows, oldest first, without committing.
 
-        total_stock = stock_query.with_entities(func.sum(Stock.quantity)).scalar() or 0
+        Async callers pass the AsyncSession's `sync_session`: marking rows deleted issues no query (stocks cascade
+        nothing on delete), the DELETEs are sent by the awaited flush.
 
-        if total_stock < stock_data.quantity:
+        Returns:
+            tuple: The total quantity before the deduction, the rows that still hold stock, and the unit cost of the
+            deducted quantity (the average of the deducted rows' costs, weighted by the quantity taken from each).
+        """
+        total_stock = sum(stock.quantity for stock in stocks)
+        if total_stock < quantity:
             raise HTTPException(status_code=400, detail="Insufficient stock.")
 
-        # Deduct stock from entries in order
-        stocks = stock_query.order_by(Stock.updated_at).all()
-        remaining_quantity = stock_data.quantity
+        # Deduct stock from entries in order (NULL updated_at sorts last, as in SQL)
+        remaining_quantity = quantity
         updated_stocks = []
+        deducted_cost = 0
 
-        for stock in stocks:
+        for stock in sorted(stocks, key=lambda s: (s.updated_at is None, s.updated_at or datetime.min)):
             if stock.quantity >= remaining_quantity:
+                deducted_cost += remaining_quantity * stock.cost_price
                 stock.quantity -= remaining_quantity
                 if stock.quantity == 0:
                     db.delete(stock)
@@ -115,27 +160,353 @@ class StockService:
                     updated_stocks.append(stock)
                 break
             else:
+                deducted_cost += stock.quantity * stock.cost_price
                 remaining_quantity -= stock.quantity
                 db.delete(stock)
 
-        db.commit()
+        return total_stock, updated_stocks, deducted_cost / quantity
+
+    @staticmethod
+    def check_line(stock_data: StockCreate, line: int = None):
+        """
+        Validate a stock line to receive, raising 400; `line` numbers the errors of a bulk receipt.
+        """
+        prefix = f"Line {line}: " if line else ""
+        if stock_data.project_id and stock_data.warehouse_id:
+            raise HTTPException(status_code=400,
+                                detail=f"{prefix}Specify either project_id or warehouse_id, not both.")
+        if not stock_data.quantity or stock_data.quantity <= 0:
+            raise HTTPException(status_code=400, detail=f"{prefix}Quantity must be greater than zero.")
+        if not (stock_data.project_id or stock_data.warehouse_id):
+            raise HTTPException(status_code=400, detail=f"{prefix}Specify either project_id or warehouse_id.")
 
-        metadata = {
+    @staticmethod
+    def add_metadata(stock_data: StockCreate, previous_qty: float) -> dict:
+        return {
             "item_id": stock_data.item_id,
-            "previous_qty": stock_query.first().quantity,
+            "previous_qty": previous_qty,
+            "added_qty": stock_data.quantity,
+            "project_id": getattr(stock_data, "project_id", "N/A"),
+            "warehouse_id": getattr(stock_data, "warehouse_id", "N/A")
+        }
+
+    @staticmethod
+    def deduct_metadata(stock_data: StockDeduct, previous_qty: float) -> dict:
+        return {
+            "item_id": stock_data.item_id,
+            "previous_qty": previous_qty,
             "deducted_qty": stock_data.quantity,
             "project_id": getattr(stock_data, "project_id", "N/A"),
             "warehouse_id": getattr(stock_data, "warehouse_id", "N/A")
         }
 
-        HistoryLogService.log_action(db, "stock", stock_data.item_id, "deduct", requester_id, metadata)
+    @staticmethod
+    def add_stock(stock_data: StockCreate, requester_id: int, db: Session = Depends(get_db)):
+        StockService.validate_references(db, stock_data.item_id, stock_data.warehouse_id, stock_data.project_id)
+        StockService.check_line(stock_data)
+
+        holder = (stock_data.project_id, stock_data.warehouse_id)
+        stocks = StockService.lock_stocks(db, stock_data.item_id, [holder])[holder]
+        previous_qty, stock = StockService.apply_add(db, stocks, stock_data)
+        balance = StockBalanceService.apply_delta(db, stock_data.item_id, *holder, stock_data.quantity)
+        StockMovementService.record(db, [StockMovementService.movement(
+            stock_data.item_id, *holder, MovementType.ADD, stock_data.quantity, stock_data.cost_price, balance,
+            requester_id
+        )])
+
+        HistoryLogService.log_action(db, "stock", stock_data.item_id, "add", requester_id,
+                                     StockService.add_metadata(stock_data, previous_qty), commit=False)
+        db.commit()
+        return stock
+
+    @staticmethod
+    async def add_stock_async(stock_data: StockCreate, requester_id: int, db: AsyncSession):
+        """
+        `add_stock` on an AsyncSession.
+        """
+        await StockService.validate_references_async(db, stock_data.item_id, stock_data.warehouse_id,
+                                                     stock_data.project_id)
+        StockService.check_line(stock_data)
+
+        holder = (stock_data.project_id, stock_data.warehouse_id)
+        stocks = (await StockService.lock_stocks_async(db, stock_data.item_id, [holder]))[holder]
+        previous_qty, stock = StockService.apply_add(db, stocks, stock_data)
+        balance = await StockBalanceService.apply_delta_async(db, stock_data.item_id, *holder, stock_data.quantity)
+        await StockMovementService.record_async(db, [StockMovementService.movement(
+            stock_data.item_id, *holder, MovementType.ADD, stock_data.quantity, stock_data.cost_price, balance,
+            requester_id
+        )])
+
+        # The requester's context is already on the session (rbac_check), so building the entry sends no query
+        await db.run_sync(HistoryLogService.log_action, "stock", stock_data.item_id, "add", requester_id,
+                          StockService.add_metadata(stock_data, previous_qty), False)
+        await db.commit()
+        return stock
+
+    @staticmethod
+    def bulk_references(item_ids: set = None, warehouse_ids: set = None, project_ids: set = None):
+        """
+        The references `validate_references_bulk` checks.
+
+        Returns:
+            list[tuple]: (query of the existing IDs, requested IDs, label) of each referenced table.
+        """
+        checks = []
+        for model, ids, label in ((Item, item_ids, "Item"), (Warehouse, warehouse_ids, "Warehouse"),
+                                  (Project, project_ids, "Project")):
+            ids = set(ids or ()) - {None}
+            if ids:
+                checks.append((select(model.id).where(model.id.in_(ids)), ids, label))
+        return checks
+
+    @staticmethod
+    def check_found(ids: set, found, label: str):
+        missing = ids - set(found)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"{label} not found: {sorted(missing)}")
+
+    @staticmethod
+    def validate_references_bulk(db: Session, item_ids: set = None, warehouse_ids: set = None,
+                                 project_ids: set = None):
+        """
+        Validate many references at once, issuing a single query per referenced table.
+
+        Args:
+            db (Session): The database session.
+            item_ids (set): Item IDs that must exist.
+            warehouse_ids (set): Warehouse IDs that must exist (optional).
+            project_ids (set): Project IDs that must exist (optional).
+        """
+        for query, ids, label in StockService.bulk_references(item_ids, warehouse_ids, project_ids):
+            StockService.check_found(ids, db.scalars(query), label)
+
+    @staticmethod
+    async def validate_references_bulk_async(db: AsyncSession, item_ids: set = None, warehouse_ids: set = None,
+                                             project_ids: set = None):
+        for query, ids, label in StockService.bulk_references(item_ids, warehouse_ids, project_ids):
+            StockService.check_found(ids, await db.scalars(query), label)
+
+    @staticmethod
+    def check_receipt(stocks_data: list[StockCreate]) -> dict:
+        """
+        Validate the lines of a bulk receipt.
+
+        Returns:
+            dict: The referenced IDs, as keyword arguments of `validate_references_bulk`.
+        """
+        if not stocks_data:
+            raise HTTPException(status_code=400, detail="At least one stock line is required.")
+        for line, stock_data in enumerate(stocks_data, start=1):
+            StockService.check_line(stock_data, line)
+        return {
+            "item_ids": {stock_data.item_id for stock_data in stocks_data},
+            "warehouse_ids": {stock_data.warehouse_id for stock_data in stocks_data},
+            "project_ids": {stock_data.project_id for stock_data in stocks_data},
+        }
+
+    @staticmethod
+    def receipt_rows_statement(item_ids: set):
+        # The existing rows of every item in the batch, loaded and locked with one query
+        return (
+            select(Stock.id, Stock.item_id, Stock.project_id, Stock.warehouse_id, Stock.quantity,
+                   Stock.cost_price, Stock.selling_price)
+            .where(Stock.item_id.in_(item_ids))
+            .order_by(Stock.item_id, Stock.project_id.nulls_first(), Stock.warehouse_id.nulls_first(), Stock.id)
+            .with_for_update()
+        )
+
+    @staticmethod
+    def merge_receipt(stocks_data: list[StockCreate], existing_rows, requester_id: int):
+        """
+        Merge the lines of a receipt into the existing rows, per (item, project/warehouse), with the weighted-average
+        cost rule of `add_stock`.
+
+        Returns:
+            tuple: The values of the rows to update and of the rows to insert, and the history log entries.
+        """
+        existing = {}
+        for row in existing_rows:
+            existing.setdefault((row.item_id, row.project_id, row.warehouse_id), row)
+
+        updates = {}
+        inserts = {}
+        history = []
+        for stock_data in stocks_data:
+            key = (stock_data.item_id, stock_data.project_id, stock_data.warehouse_id)
+
+            if key in inserts:
+                target = inserts[key]
+            elif key in existing:
+                row = existing[key]
+                target = updates.setdefault(key, {
+                    "id": row.id,
+                    "quantity": row.quantity,
+                    "cost_price": row.cost_price,
+                    "selling_price": row.selling_price,
+                    "updated_by": requester_id,
+                })
+            else:
+                target = None
+
+            history.append((stock_data.item_id,
+                            StockService.add_metadata(stock_data, target["quantity"] if target else 0)))
+
+            if target:
+                # Update cost_price using weighted average
+                target["cost_price"] = ((target["quantity"] * target["cost_price"]) +
+                                        (stock_data.quantity * stock_data.cost_price)) / (
+                                           target["quantity"] + stock_data.quantity)
+                if stock_data.selling_price is not None:
+                    target["selling_price"] = stock_data.selling_price
+                target["quantity"] += stock_data.quantity
+            else:
+                inserts[key] = stock_data.model_dump()
+
+        return list(updates.values()), list(inserts.values()), history
+
+    @staticmethod
+    def receipt_deltas(stocks_data: list[StockCreate]) -> dict:
+        deltas = {}
+        for stock_data in stocks_data:
+            key = (stock_data.item_id, stock_data.project_id, stock_data.warehouse_id)
+            deltas[key] = deltas.get(key, 0) + stock_data.quantity
+        return deltas
+
+    @staticmethod
+    def receipt_movements(stocks_data: list[StockCreate], balances: dict, requester_id: int) -> list[dict]:
+        # Replay the lines backwards from the final balances to get each line's running balance
+        balances = dict(balances)
+        movements = []
+        for stock_data in reversed(stocks_data):
+            key = (stock_data.item_id, stock_data.project_id, stock_data.warehouse_id)
+            movements.append(StockMovementService.movement(
+                *key, MovementType.ADD, stock_data.quantity, stock_data.cost_price, balances[key], requester_id
+            ))
+            balances[key] -= stock_data.quantity
+        return movements[::-1]
+
+    @staticmethod
+    def add_stock_bulk(stocks_data: list[StockCreate], requester_id: int, db: Session = Depends(get_db)):
+        """
+        Receive a batch of stock lines in a single transaction.
+
+        Lines are validated up front, references are checked with one query per table, and lines for the same
+        (item, project/warehouse) are merged using the same weighted-average cost rule as `add_stock`. Existing
+        rows are updated with one bulk UPDATE, new rows are created with one multi-row INSERT, history is written
+        in one batch and the whole receipt is committed once.
+
+        Args:
+            stocks_data (list[StockCreate]): The stock lines to receive.
+            requester_id (int): ID of the user receiving the stock.
+            db (Session): The database session.
+
+        Returns:
+            List[Stock]: The stock rows created or updated by the receipt.
+        """
+        references = StockService.check_receipt(stocks_data)
+        StockService.validate_references_bulk(db, **references)
+
+        existing_rows = db.execute(StockService.receipt_rows_statement(references["item_ids"]))
+        updates, inserts, history = StockService.merge_receipt(stocks_data, existing_rows, requester_id)
+
+        stock_ids = [values["id"] for values in updates]
+        if updates:
+            db.execute(update(Stock), updates)
+        if inserts:
+            stock_ids += db.scalars(insert(Stock).returning(Stock.id), inserts).all()
+
+        balances = StockBalanceService.apply_deltas(db, StockService.receipt_deltas(stocks_data))
+        StockMovementService.record(db, StockService.receipt_movements(stocks_data, balances, requester_id))
+
+        HistoryLogService.log_actions_bulk(db, "stock", "add", requester_id, history)
+        db.commit()
+
+        return db.scalars(select(Stock).where(Stock.id.in_(stock_ids)).order_by(Stock.id)).all()
+
+    @staticmethod
+    async def add_stock_bulk_async(stocks_data: list[StockCreate], requester_id: int, db: AsyncSession):
+        """
+        `add_stock_bulk` on an AsyncSession.
+        """
+        references = StockService.check_receipt(stocks_data)
+        await StockService.validate_references_bulk_async(db, **references)
+
+        existing_rows = await db.execute(StockService.receipt_rows_statement(references["item_ids"]))
+        updates, inserts, history = StockService.merge_receipt(stocks_data, existing_rows, requester_id)
+
+        stock_ids = [values["id"] for values in updates]
+        if updates:
+            await db.execute(update(Stock), updates)
+        if inserts:
+            stock_ids += (await db.scalars(insert(Stock).returning(Stock.id), inserts)).all()
+
+        balances = await StockBalanceService.apply_deltas_async(db, StockService.receipt_deltas(stocks_data))
+        await StockMovementService.record_async(db, StockService.receipt_movements(stocks_data, balances,
+                                                                                   requester_id))
+
+        await db.run_sync(HistoryLogService.log_actions_bulk, "stock", "add", requester_id, history)
+        await db.commit()
+
+        return (await db.scalars(select(Stock).where(Stock.id.in_(stock_ids)).order_by(Stock.id))).all()
+
+    @staticmethod
+    def check_deduct(stock_data: StockDeduct):
+        if stock_data.project_id and stock_data.warehouse_id:
+            raise HTTPException(status_code=400, detail="Specify either project_id or warehouse_id, not both.")
+        if not (stock_data.project_id or stock_data.warehouse_id):
+            raise HTTPException(status_code=400, detail="Specify either project_id or warehouse_id.")
+        if stock_data.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Quantity must be greater than zero.")
+
+    @staticmethod
+    def deduct_stock(stock_data: StockDeduct, requester_id: int, db: Session = Depends(get_db)):
+        StockService.validate_references(db, stock_data.item_id, stock_data.warehouse_id, stock_data.project_id)
+        StockService.check_deduct(stock_data)
+
+        holder = (stock_data.project_id, stock_data.warehouse_id)
+        stocks = StockService.lock_stocks(db, stock_data.item_id, [holder])[holder]
+        previous_qty, updated_stocks, cost_price = StockService.apply_deduct(db, stocks, stock_data.quantity)
+        balance = StockBalanceService.apply_delta(db, stock_data.item_id, *holder, -stock_data.quantity)
+        StockMovementService.record(db, [StockMovementService.movement(
+            stock_data.item_id, *holder, MovementType.DEDUCT, -stock_data.quantity, cost_price, balance, requester_id
+        )])
+
+        HistoryLogService.log_action(db, "stock", stock_data.item_id, "deduct", requester_id,
+                                     StockService.deduct_metadata(stock_data, previous_qty), commit=False)
+        db.commit()
         return updated_stocks
 
     @staticmethod
-    def transfer_stock(stock_data: StockTransfer, requester_id: int, db: Session = Depends(get_db)):
-        StockService.validate_references(db, stock_data.item_id, stock_data.from_warehouse_id, stock_data.from_project_id)
-        StockService.validate_references(db, stock_data.item_id, stock_data.to_warehouse_id, stock_data.to_project_id)
+    async def deduct_stock_async(stock_data: StockDeduct, requester_id: int, db: AsyncSession):
+        """
+        `deduct_stock` on an AsyncSession.
+        """
+        await StockService.validate_references_async(db, stock_data.item_id, stock_data.warehouse_id,
+                                                     stock_data.project_id)
+        StockService.check_deduct(stock_data)
+
+        holder = (stock_data.project_id, stock_data.warehouse_id)
+        stocks = (await StockService.lock_stocks_async(db, stock_data.item_id, [holder]))[holder]
+        previous_qty, updated_stocks, cost_price = StockService.apply_deduct(db.sync_session, stocks,
+                                                                             stock_data.quantity)
+        balance = await StockBalanceService.apply_delta_async(db, stock_data.item_id, *holder, -stock_data.quantity)
+        await StockMovementService.record_async(db, [StockMovementService.movement(
+            stock_data.item_id, *holder, MovementType.DEDUCT, -stock_data.quantity, cost_price, balance, requester_id
+        )])
+
+        await db.run_sync(HistoryLogService.log_action, "stock", stock_data.item_id, "deduct", requester_id,
+                          StockService.deduct_metadata(stock_data, previous_qty), False)
+        await db.commit()
+        return updated_stocks
 
+    @staticmethod
+    def transfer_holders(stock_data: StockTransfer) -> tuple:
+        """
+        Validate a transfer.
+
+        Returns:
+            tuple: The (project_id, warehouse_id) source and destination holders.
+        """
         if not stock_data.quantity or stock_data.quantity <= 0:
             raise HTTPException(status_code=400, detail="Quantity must be greater than zero.")
 
@@ -148,67 +519,175 @@ class StockService:
             raise HTTPException(status_code=400,
                                 detail="A destination (location, project, or warehouse) must be specified.")
 
-        # Check if stock already exists
-        stock = db.query(Stock).filter(
-            Stock.item_id == stock_data.item_id,
-            Stock.project_id == stock_data.from_project_id,
-            Stock.warehouse_id == stock_data.from_warehouse_id,
-        ).first()
+        # A holder is either a project or a warehouse, with the project taking precedence
+        source = ((stock_data.from_project_id, None) if stock_data.from_project_id
+                  else (None, stock_data.from_warehouse_id))
+        destination = ((stock_data.to_project_id, None) if stock_data.to_project_id
+                       else (None, stock_data.to_warehouse_id))
+        if source == destination:
+            raise HTTPException(status_code=400, detail="The source and the destination must differ.")
+        return source, destination
 
-        if not stock:
-            raise HTTPException(status_code=404, detail="Stock not found")
+    @staticmethod
+    def transfer_legs(stock_data: StockTransfer, source: tuple, destination: tuple, cost_price: float) -> tuple:
+        """
+        The deduction from the source and the addition to the destination, at the cost of the deducted rows.
 
-        if stock_data.from_project_id:
-            stock_dict = stock_data.model_dump()
-            stock_dict["project_id"] = stock_data.from_project_id
-            stock_dict["warehouse_id"] = None
-            del stock_dict["from_project_id"]  # Remove the field dynamically
-            del stock_dict["from_warehouse_id"]  # Remove the field dynamically
-            stock_data_deduct = StockDeduct(**stock_dict)
-        else:
-            stock_dict = stock_data.model_dump()
-            stock_dict["warehouse_id"] = stock_data.from_warehouse_id
-            stock_dict["project_id"] = None
-            del stock_dict["from_project_id"]  # Remove the field dynamically
-            del stock_dict["from_warehouse_id"]  # Remove the field dynamically
-            stock_data_deduct = StockDeduct(**stock_dict)
-
-        if stock_data.to_project_id:
-            stock_dict = stock_data.model_dump()
-            stock_dict["project_id"] = stock_data.to_project_id
-            stock_dict["warehouse_id"] = None
-            stock_dict["cost_price"] = stock.cost_price
-            del stock_dict["from_project_id"]  # Remove the field dynamically
-            del stock_dict["from_warehouse_id"]  # Remove the field dynamically
-            stock_data_add = StockCreate(**stock_dict)
-        else:
-            stock_dict = stock_data.model_dump()
-            stock_dict["warehouse_id"] = stock_data.to_warehouse_id
-            stock_dict["project_id"] = None
-            stock_dict["cost_price"] = stock.cost_price
-            del stock_dict["from_project_id"]  # Remove the field dynamically
-            del stock_dict["from_warehouse_id"]  # Remove the field dynamically
-            stock_data_add = StockCreate(**stock_dict)
+        Returns:
+            tuple: The StockDeduct and StockCreate of the legs.
+        """
+        stock_dict = stock_data.model_dump(exclude={"from_project_id", "from_warehouse_id",
+                                                    "to_project_id", "to_warehouse_id"})
+        return (
+            StockDeduct(**stock_dict, project_id=source[0], warehouse_id=source[1]),
+            StockCreate(**stock_dict, project_id=destination[0], warehouse_id=destination[1], cost_price=cost_price),
+        )
+
+    @staticmethod
+    def transfer_deltas(stock_data: StockTransfer, source: tuple, destination: tuple) -> dict:
+        deltas = {}
+        for holder, delta in ((source, -stock_data.quantity), (destination, stock_data.quantity)):
+            key = (stock_data.item_id, *holder)
+            deltas[key] = deltas.get(key, 0) + delta
+        return deltas
+
+    @staticmethod
+    def transfer_movements(stock_data: StockTransfer, source: tuple, destination: tuple, cost_price: float,
+                           balances: dict, requester_id: int) -> list[dict]:
+        transfer_id = uuid.uuid4().hex
+        return [
+            StockMovementService.movement(
+                stock_data.item_id, *source, MovementType.TRANSFER_OUT, -stock_data.quantity, cost_price,
+                balances[(stock_data.item_id, *source)], requester_id, transfer_id
+            ),
+            StockMovementService.movement(
+                stock_data.item_id, *destination, MovementType.TRANSFER_IN, stock_data.quantity, cost_price,
+                balances[(stock_data.item_id, *destination)], requester_id, transfer_id
+            ),
+        ]
+
+    @staticmethod
+    def transfer_history(stock_data: StockTransfer, deduct: StockDeduct, add: StockCreate,
+                         previous_source_qty: float, previous_destination_qty: float) -> list[tuple]:
+        """
+        The history log entries of a transfer.
+
+        Returns:
+            list[tuple]: (action, metadata) of each entry.
+        """
+        return [
+            ("deduct", StockService.deduct_metadata(deduct, previous_source_qty)),
+            ("add", StockService.add_metadata(add, previous_destination_qty)),
+            ("transfer", {
+                "item_id": stock_data.item_id,
+                "previous_qty": previous_source_qty,
+                "added_qty": stock_data.quantity,
+                "from_project_id": getattr(deduct, "project_id", "N/A"),
+                "from_warehouse_id": getattr(deduct, "warehouse_id", "N/A"),
+                "to_project_id": getattr(add, "project_id", "N/A"),
+                "to_warehouse_id": getattr(add, "warehouse_id", "N/A"),
+            }),
+        ]
 
-        # Remove stock from the source
-        StockService.deduct_stock(stock_data_deduct, requester_id, db)
+    @staticmethod
+    def transfer_stock(stock_data: StockTransfer, requester_id: int, db: Session = Depends(get_db)):
+        StockService.validate_references(db, stock_data.item_id, stock_data.from_warehouse_id, stock_data.from_project_id)
+        StockService.validate_references(db, stock_data.item_id, stock_data.to_warehouse_id, stock_data.to_project_id)
+        source, destination = StockService.transfer_holders(stock_data)
+
+        # Lock source and destination rows together, in a deterministic order
+        locked = StockService.lock_stocks(db, stock_data.item_id, [source, destination])
+
+        if not locked[source]:
+            raise HTTPException(status_code=404, detail="Stock not found")
+
+        # Remove stock from the source; the destination receives it at the cost of the rows it came from
+        previous_source_qty, _, cost_price = StockService.apply_deduct(db, locked[source], stock_data.quantity)
+        deduct, add = StockService.transfer_legs(stock_data, source, destination, cost_price)
 
         # Add stock to the destination
-        added_stock = StockService.add_stock(stock_data_add, requester_id, db)
+        previous_destination_qty, added_stock = StockService.apply_add(db, locked[destination], add)
 
-        metadata = {
-            "item_id": stock.item_id,
-            "previous_qty": stock.quantity,
-            "added_qty": stock_data.quantity,
-            "from_project_id": getattr(stock_data_deduct, "project_id", "N/A"),
-            "from_warehouse_id": getattr(stock_data_deduct, "warehouse_id", "N/A"),
-            "to_project_id": getattr(stock_data_add, "project_id", "N/A"),
-            "to_warehouse_id": getattr(stock_data_add, "warehouse_id", "N/A"),
-        }
+        balances = StockBalanceService.apply_deltas(db, StockService.transfer_deltas(stock_data, source, destination))
+        StockMovementService.record(db, StockService.transfer_movements(
+            stock_data, source, destination, cost_price, balances, requester_id
+        ))
 
-        HistoryLogService.log_action(db, "stock", stock_data.item_id, "transfer", requester_id, metadata)
+        for action, metadata in StockService.transfer_history(stock_data, deduct, add, previous_source_qty,
+                                                              previous_destination_qty):
+            HistoryLogService.log_action(db, "stock", stock_data.item_id, action, requester_id, metadata, commit=False)
+        db.commit()
         return added_stock
 
+    @staticmethod
+    async def transfer_stock_async(stock_data: StockTransfer, requester_id: int, db: AsyncSession):
+        """
+        `transfer_stock` on an AsyncSession.
+        """
+        await StockService.validate_references_async(db, stock_data.item_id, stock_data.from_warehouse_id,
+                                                     stock_data.from_project_id)
+        await StockService.validate_references_async(db, stock_data.item_id, stock_data.to_warehouse_id,
+                                                     stock_data.to_project_id)
+        source, destination = StockService.transfer_holders(stock_data)
+
+        locked = await StockService.lock_stocks_async(db, stock_data.item_id, [source, destination])
+
+        if not locked[source]:
+            raise HTTPException(status_code=404, detail="Stock not found")
+
+        previous_source_qty, _, cost_price = StockService.apply_deduct(db.sync_session, locked[source],
+                                                                       stock_data.quantity)
+        deduct, add = StockService.transfer_legs(stock_data, source, destination, cost_price)
+        previous_destination_qty, added_stock = StockService.apply_add(db, locked[destination], add)
+
+        balances = await StockBalanceService.apply_deltas_async(
+            db, StockService.transfer_deltas(stock_data, source, destination)
+        )
+        await StockMovementService.record_async(db, StockService.transfer_movements(
+            stock_data, source, destination, cost_price, balances, requester_id
+        ))
+
+        for action, metadata in StockService.transfer_history(stock_data, deduct, add, previous_source_qty,
+                                                              previous_destination_qty):
+            await db.run_sync(HistoryLogService.log_action, "stock", stock_data.item_id, action, requester_id,
+                              metadata, False)
+        await db.commit()
+        return added_stock
+
+    @staticmethod
+    def location_filter(location_id: int):
+        """
+        Filter stock held by any warehouse or project at a location.
+
+        The holder ids are collected into arrays (`= ANY(ARRAY(SELECT ...))`) rather than `IN (SELECT ...)`, which
+        Postgres can only evaluate as a hashed subplan over a sequential scan of stocks when the two are OR-ed;
+        arrays let it combine the per-warehouse and per-project indexes.
+        """
+        return or_(
+            Stock.warehouse_id == any_(
+                func.array(select(Warehouse.id).where(Warehouse.location_id == location_id).scalar_subquery())
+            ),
+            Stock.project_id == any_(
+                func.array(select(Project.id).where(Project.location_id == location_id).scalar_subquery())
+            ),
+        )
+
+    @staticmethod
+    def holder_stocks(location_id: int = None, project_id: int = None, warehouse_id: int = None):
+        """
+        The stocks held at a location (by its warehouses and projects), by a project or by a warehouse, the first
+        given; every stock if none is.
+        """
+        query = select(Stock)
+        if location_id:
+            # Combine results from both sources
+            return query.where(StockService.location_filter(location_id))
+        if project_id:
+            return query.where(Stock.project_id == project_id)
+        if warehouse_id:
+            return query.where(Stock.warehouse_id == warehouse_id)
+        return query
+
     @staticmethod
     def get_stock_by_location_or_project_or_warehouse(
         db: Session,
@@ -228,27 +707,22 @@ class StockService:
         Returns:
             List[Stock]: List of stock entries filtered by the criteria.
         """
-        query = db.query(Stock)
-
-        if location_id:
-            # Combine results from both sources
-            query = query.filter(
-                or_(
-                    Stock.warehouse_id.in_(
-                        db.query(Warehouse.id).filter(Warehouse.location_id == location_id)
-                    ),
-                    Stock.project_id.in_(
-                        db.query(Project.id).filter(Project.location_id == location_id)
-                    )
-                )
-            )
+        return db.scalars(StockService.holder_stocks(location_id, project_id, warehouse_id)).all()
 
-        elif project_id:
-            query = query.filter(Stock.project_id == project_id)
-        elif warehouse_id:
-            query = query.filter(Stock.warehouse_id == warehouse_id)
+    @staticmethod
+    async def get_stock_by_location_or_project_or_warehouse_async(
+        db: AsyncSession,
+        location_id: int = None,
+        project_id: int = None,
+        warehouse_id: int = None
+    ):
+        return (await db.scalars(StockService.holder_stocks(location_id, project_id, warehouse_id))).all()
 
-        return query.all()
+    @staticmethod
+    def check_item_stock(stock: list[Stock]) -> list[Stock]:
+        if not stock:
+            raise HTTPException(status_code=404, detail="No stock found for the specified criteria")
+        return stock
 
     @staticmethod
     def get_stock_of_item_by_location_or_project_or_warehouse(
@@ -272,32 +746,42 @@ class StockService:
             Stock: The stock entry for the specified item and criteria.
         """
         StockService.validate_references(db, item_id, warehouse_id, project_id, location_id)
+        query = StockService.holder_stocks(location_id, project_id, warehouse_id).where(Stock.item_id == item_id)
+        return StockService.check_item_stock(db.scalars(query).all())
 
-        query = db.query(Stock).filter(Stock.item_id == item_id)
-
-        if location_id:
-            # Combine results from both sources
-            query = query.filter(
-                or_(
-                    Stock.warehouse_id.in_(
-                        db.query(Warehouse.id).filter(Warehouse.location_id == location_id)
-                    ),
-                    Stock.project_id.in_(
-                        db.query(Project.id).filter(Project.location_id == location_id)
-                    )
-                )
-            )
-        elif project_id:
-            query = query.filter(Stock.project_id == project_id)
-        elif warehouse_id:
-            query = query.filter(Stock.warehouse_id == warehouse_id)
-
-        stock = query.all()
+    @staticmethod
+    async def get_stock_of_item_by_location_or_project_or_warehouse_async(
+        db: AsyncSession,
+        item_id: int,
+        location_id: int = None,
+        project_id: int = None,
+        warehouse_id: int = None
+    ):
+        await StockService.validate_references_async(db, item_id, warehouse_id, project_id, location_id)
+        query = StockService.holder_stocks(location_id, project_id, warehouse_id).where(Stock.item_id == item_id)
+        return StockService.check_item_stock((await db.scalars(query)).all())
 
-        if not stock:
-            raise HTTPException(status_code=404, detail="No stock found for the specified criteria")
+    @staticmethod
+    def item_holder_statements(item_id: int) -> tuple:
+        """
+        The location, name and quantity of the stocks of an item held by warehouses, and by projects.
+        """
+        return tuple(
+            select(Location.name.label("location"), holder.name.label("name"), Stock.quantity.label("quantity"))
+            .join(holder, holder_id == holder.id)
+            .join(Location, holder.location_id == Location.id)
+            .where(Stock.item_id == item_id)
+            for holder, holder_id in ((Warehouse, Stock.warehouse_id), (Project, Stock.project_id))
+        )
 
-        return stock
+    @staticmethod
+    def holder_locations(warehouse_data, project_data) -> list[dict]:
+        # Combine results
+        return [
+            {"location": data.location, "type": holder_type, "name": data.name, "quantity": data.quantity}
+            for holder_type, rows in (("warehouse", warehouse_data), ("project", project_data))
+            for data in rows
+        ]
 
     @staticmethod
     def get_item_location_and_qty(
@@ -315,62 +799,47 @@ class StockService:
             List[Dict]: List of dictionaries containing location, warehouse/project, and quantity.
         """
         # Validate the item exists
-        item = db.query(Item).filter(Item.id == item_id).first()
-        if not item:
-            raise HTTPException(status_code=404, detail="Item not found")
+        StockService.validate_references(db, item_id)
 
         # Query stocks for warehouses and projects
-        warehouse_data = (
-            db.query(
-                Location.name.label("location"),
-                Warehouse.name.label("warehouse"),
-                Stock.quantity.label("quantity")
-            )
-            .join(Warehouse, Stock.warehouse_id == Warehouse.id)
-            .join(Location, Warehouse.location_id == Location.id)
-            .filter(Stock.item_id == item_id)
-            .all()
-        )
+        warehouse_query, project_query = StockService.item_holder_statements(item_id)
+        return StockService.holder_locations(db.execute(warehouse_query).all(), db.execute(project_query).all())
 
-        project_data = (
-            db.query(
-                Location.name.label("location"),
-                Project.name.label("project"),
-                Stock.quantity.label("quantity")
-            )
-            .join(Project, Stock.project_id == Project.id)
-            .join(Location, Project.location_id == Location.id)
-            .filter(Stock.item_id == item_id)
-            .all()
-        )
+    @staticmethod
+    async def get_item_location_and_qty_async(db: AsyncSession, item_id: int):
+        await StockService.validate_references_async(db, item_id)
 
-        # Combine results
-        results = []
-        for data in warehouse_data:
-            results.append({
-                "location": data.location,
-                "type": "warehouse",
-                "name": data.warehouse,
-                "quantity": data.quantity
-            })
-
-        for data in project_data:
-            results.append({
-                "location": data.location,
-                "type": "project",
-                "name": data.project,
-                "quantity": data.quantity
-            })
-
-        return results
+        warehouse_query, project_query = StockService.item_holder_statements(item_id)
+        return StockService.holder_locations((await db.execute(warehouse_query)).all(),
+                                             (await db.execute(project_query)).all())
 
     @staticmethod
-    def get_total_stock_by_item(db: Session, item_id: int):
-        StockService.validate_references(db, item_id)
-        item = db.query(Item).filter(Item.id == item_id).first()
+    def item_total_statement(item_id: int):
+        """
+        The item's details with its total quantity over the stock balances.
+        """
+        total = (
+            select(func.sum(StockBalance.quantity)).where(StockBalance.item_id == item_id).scalar_subquery()
+        )
+        return select(Item.item_code, Item.description, Item.unit_of_measure, total.label("total_quantity")).where(
+            Item.id == item_id
+        )
+
+    @staticmethod
+    def item_total(row) -> dict:
+        if row is None:
+            raise HTTPException(status_code=404, detail="Item not found")
         return {
-            "item_code": item.item_code,
-            "item_description": item.description,
-            "total_quantity": db.query(func.sum(Stock.quantity)).filter(Stock.item_id == item_id).scalar(),
-            "unit_of_measure": item.unit_of_measure
+            "item_code": row.item_code,
+            "item_description": row.description,
+            "total_quantity": row.total_quantity,
+            "unit_of_measure": row.unit_of_measure
         }
+
+    @staticmethod
+    def get_total_stock_by_item(db: Session, item_id: int):
+        return StockService.item_total(db.execute(StockService.item_total_statement(item_id)).first())
+
+    @staticmethod
+    async def get_total_stock_by_item_async(db: AsyncSession, item_id: int):
+        return StockService.item_total((await db.execute(StockService.item_total_statement(item_id))).first())
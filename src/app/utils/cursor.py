@@ -0,0 +1,26 @@
+# src/app/utils/cursor.py
+#
+# Opaque keyset pagination cursors: the sort key values of the last returned row, as URL-safe base64 JSON.
+
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException
+
+
+def encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values), default=str).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Decode a cursor of `size` key values, raising a 400 error if it is malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
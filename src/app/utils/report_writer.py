@@ -0,0 +1,129 @@
+# src/app/utils/report_writer.py
+#
+# Streaming report files: rows are written as they are read, so memory does not grow with the report size.
+
+import csv
+import gzip
+import itertools
+import os
+import tempfile
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+from fastapi import HTTPException
+from openpyxl import Workbook
+
+REPORTS_DIR = "src/assets/reports"
+
+# Report format -> file extension
+REPORT_FORMATS = {
+    "xlsx": "xlsx",
+    "csv": "csv",
+    "csv.gz": "csv.gz",
+}
+
+# Rows written between two progress callbacks
+PROGRESS_INTERVAL = 1000
+
+
+class ReportProgress:
+    """
+    Observer of the report files written in the current context, set by background report jobs.
+    """
+
+    def __init__(self, on_rows: Optional[Callable[[int], None]] = None):
+        self.on_rows = on_rows
+        self.file_path = None
+        self.rows_written = 0
+
+    def update(self, rows_written: int):
+        self.rows_written = rows_written
+        if self.on_rows:
+            self.on_rows(rows_written)
+
+
+report_progress: ContextVar[Optional[ReportProgress]] = ContextVar("report_progress", default=None)
+
+
+def validate_format(file_format: str) -> str:
+    if file_format not in REPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid report format. Must be one of: {', '.join(REPORT_FORMATS)}."
+        )
+    return file_format
+
+
+def report_path(name: str, file_format: str = "xlsx") -> str:
+    """
+    Path of a report file in the reports directory, e.g. `report_path("Stock_Report", "csv")`.
+    """
+    return f"{REPORTS_DIR}/{name}.{REPORT_FORMATS[validate_format(file_format)]}"
+
+
+def write_report(file_path: str, rows: Iterable[dict], columns: Optional[list[str]] = None,
+                 file_format: str = "xlsx") -> int:
+    """
+    Write rows to a report file without holding them in memory.
+
+    The file is written to a temporary file of its own next to its final path and moved into place once complete,
+    so a report being regenerated is never served half-written, and concurrent writers of the same report do not
+    write into each other's file.
+
+    Args:
+        file_path (str): The path of the report file.
+        rows (Iterable[dict]): The rows, e.g. a generator over a `yield_per` query.
+        columns (list[str]): The header; defaults to the keys of the first row.
+        file_format (str): "xlsx", "csv" or "csv.gz".
+
+    Returns:
+        int: The number of rows written.
+    """
+    validate_format(file_format)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if columns is None:
+        columns = list(first) if first else []
+    if first is not None:
+        rows = itertools.chain([first], rows)
+    values = ([row.get(column) for column in columns] for row in rows)
+
+    progress = report_progress.get()
+    if progress:
+        progress.file_path = file_path
+
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix=f"{os.path.basename(file_path)}.",
+                                         suffix=".tmp")
+    os.close(handle)
+    count = 0
+    try:
+        if file_format == "xlsx":
+            # Write-only workbooks serialize each row as it is appended instead of keeping the sheet in memory
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet()
+            sheet.append(columns)
+            for row in values:
+                sheet.append(row)
+                count += 1
+                if progress and count % PROGRESS_INTERVAL == 0:
+                    progress.update(count)
+            workbook.save(temp_path)
+        else:
+            opener = gzip.open if file_format == "csv.gz" else open
+            with opener(temp_path, "wt", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(columns)
+                for row in values:
+                    writer.writerow(row)
+                    count += 1
+                    if progress and count % PROGRESS_INTERVAL == 0:
+                        progress.update(count)
+        os.replace(temp_path, file_path)
+        if progress:
+            progress.update(count)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return count
@@ -1,15 +1,20 @@
 # src/main.py
 
+import logging
+
 import uvicorn
-from fastapi import FastAPI, Request, APIRouter
+from fastapi import FastAPI, APIRouter
 from fastapi.staticfiles import StaticFiles
-from src.app.core.database import Base, engine
+from src.app.core.database import Base, engine, SessionLocal
 from src.app.routers import (base, users, items, stocks, locations, warehouses, projects, permissions, reports,
                              departments, invoices, pending_approvals, history_logs, stock_permissions, restore)
+from src.app.core.cache_invalidation import listener as cache_invalidation_listener
 from src.app.core.config import get_settings
+from src.app.core.history_log_writer import history_log_writer
+from src.app.services.history_log_partition_service import HistoryLogPartitionService
+from src.app.services.report_job_service import shutdown_executor as shutdown_report_jobs
 from src.app.core.rbac import rbac_check
-from starlette.responses import RedirectResponse
-from src.app.core.security import decode_access_token
+from src.app.core.auth_middleware import AuthMiddleware
 from src.app.routers import login
 
 app = FastAPI()
@@ -56,25 +61,52 @@ app.mount("/reports/files", StaticFiles(directory="src/assets/reports"), name="r
 app.mount("/photos", StaticFiles(directory="src/assets/photos"), name="item_photos")
 
 
-@app.middleware("http")
-async def restrict_unauthenticated_access(request: Request, call_next):
-    session_token = request.cookies.get("session_token")
+# Authenticates every request but those of the public paths, e.g. the CSS and JS of the pages
+app.add_middleware(AuthMiddleware, public_paths=settings.AUTH_PUBLIC_PATHS)
 
-    if not session_token:
-        if not request.url.path.startswith("/login"):
-            return RedirectResponse("/login", status_code=307)
 
-    try:
-        payload = decode_access_token(session_token)
-        request.state.user = payload["sub"]  # Pass user info to subsequent requests
-        request.state.role = payload["role"]  # Save role in request state
-        request.state.user_id = payload["id"]  # Save id in request state
+@app.on_event("startup")
+def start_cache_invalidation_listener():
+    # Each worker evicts its cached permissions and reference data when another worker changes them
+    if settings.CACHE_INVALIDATION_LISTENER:
+        cache_invalidation_listener.start()
+
+
+@app.on_event("shutdown")
+def stop_cache_invalidation_listener():
+    cache_invalidation_listener.stop()
+
+
+@app.on_event("shutdown")
+def stop_report_jobs():
+    shutdown_report_jobs()
+
 
-        # Check if the user has permission for the requested route
+@app.on_event("startup")
+def start_history_log_writer():
+    # History log entries logged outside a transaction are written in batches in the background
+    if settings.HISTORY_LOG_WRITER:
+        history_log_writer.start()
+
+
+@app.on_event("shutdown")
+def stop_history_log_writer():
+    # Writes the entries still queued
+    history_log_writer.stop()
+
+
+@app.on_event("startup")
+def ensure_history_log_partitions():
+    # Creates the coming months' partitions; the archival of old ones is left to the history_log_partitions script
+    db = SessionLocal()
+    try:
+        if HistoryLogPartitionService.is_partitioned(db):
+            HistoryLogPartitionService.ensure_partitions(db)
     except Exception as e:
-        if not request.url.path.startswith("/login"):
-            return RedirectResponse(url="/login", status_code=307)
-    return await call_next(request)
+        logging.error(f"Failed to create history log partitions: {e}")
+    finally:
+        db.close()
+
 
 # Include Web Router
 app.include_router(login.router, tags=["Log In"])
@@ -0,0 +1,232 @@
+# src/scripts/endpoint_benchmark.py
+#
+# Measure the throughput of the application's endpoints. The scenarios:
+#   endpoints  the async-capable stock and item read endpoints, in the deployment mode set by DATABASE_ASYNC: the sync
+#              engine's threadpool (false) or the asyncpg engine (true)
+#   static     a page's JS file, public, and an item photo, behind the login: the cost of the auth middleware, with or
+#              without the public paths and the token cache (set AUTH_PUBLIC_PATHS='[]' and AUTH_TOKEN_CACHE_TTL=0 to
+#              measure without them)
+#   json       a plain JSON endpoint (/health)
+#   download   a large report file from /reports/files, written for the run
+#
+# In-process, --base-http-middleware swaps the ASGI AuthMiddleware for the `@app.middleware("http")` function it
+# replaced, which Starlette runs through BaseHTTPMiddleware, to compare the two on the json and download scenarios.
+#
+# Requests are sent concurrently, as an existing user, and only read data. By default they go to the application
+# in-process, so no HTTP server or network is measured; with --url they go over HTTP to running workers, started with
+# the same settings. Run it once per mode to compare them:
+#
+# Usage:
+#   DATABASE_ASYNC=false python -m src.scripts.endpoint_benchmark                  # 10000 requests, 1000 concurrent
+#   DATABASE_ASYNC=true  python -m src.scripts.endpoint_benchmark --requests 5000 --concurrency 100
+#   DATABASE_ASYNC=true  uvicorn src.main:app --port 8000 --workers 2 --timeout-keep-alive 60 &
+#   DATABASE_ASYNC=true  python -m src.scripts.endpoint_benchmark --url http://localhost:8000
+#   AUTH_PUBLIC_PATHS='[]' AUTH_TOKEN_CACHE_TTL=0 python -m src.scripts.endpoint_benchmark --scenario static
+#   python -m src.scripts.endpoint_benchmark --scenario static --requests 3000 --concurrency 16
+#   python -m src.scripts.endpoint_benchmark --scenario json --requests 3000 --concurrency 16 --base-http-middleware
+#   python -m src.scripts.endpoint_benchmark --scenario download --requests 40 --concurrency 4 --download-mib 50
+#
+# With 1000 requests in flight a connection can sit idle past uvicorn's default 5 s keep-alive, and be closed by the
+# server as the client reuses it; raise --timeout-keep-alive above the expected latency.
+
+import argparse
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+
+import httpx
+from fastapi import Request
+from fastapi.responses import RedirectResponse
+
+from src.app.core.auth_middleware import AuthMiddleware
+from src.app.core.config import get_settings
+from src.app.core.database import SessionLocal
+from src.app.core.security import create_access_token, decode_session_token
+from src.app.models import Stock, User
+
+settings = get_settings()
+
+# The read endpoints exercised, filled in with ids of existing data
+PATHS = ("/stocks/item/{item_id}/total", "/stocks/warehouse/{warehouse_id}", "/items/{item_id}")
+
+STATIC_FILE = "/static/js/dashboard.js"
+PHOTO_FILE = "benchmark.png"
+PHOTO_SIZE = 20 * 1024
+JSON_PATH = "/health"
+DOWNLOAD_FILE = "benchmark_download.csv"
+
+
+def session_token(user_id: int = None) -> str:
+    """
+    The session token of the user to send the requests as, the first active admin by default.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(User).filter(User.is_active == True)
+        user = query.filter(User.id == user_id).first() if user_id else query.filter(User.role == "admin").first()
+        if not user:
+            raise SystemExit("No active user to send the requests as; pass --user-id.")
+        return create_access_token({"sub": user.username, "id": user.id, "role": user.role})
+    finally:
+        db.close()
+
+
+@contextmanager
+def endpoint_paths():
+    """
+    The stock and item endpoints, for the first stock held by a warehouse.
+    """
+    db = SessionLocal()
+    try:
+        stock = db.query(Stock).filter(Stock.warehouse_id.isnot(None)).order_by(Stock.id).first()
+    finally:
+        db.close()
+    if not stock:
+        raise SystemExit("No stock held by a warehouse to request.")
+    yield [path.format(item_id=stock.item_id, warehouse_id=stock.warehouse_id) for path in PATHS]
+
+
+@contextmanager
+def static_paths():
+    """
+    A page's JS file and an item photo, written for the run and removed afterwards.
+    """
+    file_path = os.path.join("src/assets/photos", PHOTO_FILE)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as file:
+        file.write(os.urandom(PHOTO_SIZE))
+    try:
+        yield [STATIC_FILE, f"/photos/{PHOTO_FILE}"]
+    finally:
+        os.remove(file_path)
+
+
+@contextmanager
+def json_paths():
+    yield [JSON_PATH]
+
+
+@contextmanager
+def download_paths(size_mib: int = 50):
+    """
+    A report file of `size_mib` MiB, written for the run and removed afterwards.
+    """
+    file_path = os.path.join("src/assets/reports", DOWNLOAD_FILE)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    line = b"item_code,warehouse,quantity,cost_price\n" * 1024
+    with open(file_path, "wb") as file:
+        for _ in range(size_mib * 1024 * 1024 // len(line)):
+            file.write(line)
+    try:
+        yield [f"/reports/files/{DOWNLOAD_FILE}"]
+    finally:
+        os.remove(file_path)
+
+
+SCENARIOS = {"endpoints": endpoint_paths, "static": static_paths, "json": json_paths, "download": download_paths}
+
+
+def use_base_http_middleware(app):
+    """
+    Replace AuthMiddleware with the `@app.middleware("http")` function it replaced, for comparison. Must run before
+    the application's first request, which builds its middleware stack.
+    """
+    app.user_middleware = [middleware for middleware in app.user_middleware if middleware.cls is not AuthMiddleware]
+    public_paths = tuple(settings.AUTH_PUBLIC_PATHS)
+
+    @app.middleware("http")
+    async def restrict_unauthenticated_access(request: Request, call_next):
+        if request.url.path.startswith(public_paths):
+            return await call_next(request)
+
+        session_token = request.cookies.get("session_token")
+        if not session_token:
+            if not request.url.path.startswith("/login"):
+                return RedirectResponse("/login", status_code=307)
+
+        try:
+            session = decode_session_token(session_token)
+            request.state.user = session.username
+            request.state.role = session.role
+            request.state.user_id = session.user_id
+        except Exception:
+            if not request.url.path.startswith("/login"):
+                return RedirectResponse(url="/login", status_code=307)
+        return await call_next(request)
+
+
+async def run(app, url: str, token: str, paths: list[str], requests: int, concurrency: int):
+    """
+    Send `requests` GET requests, cycling through `paths`, with at most `concurrency` in flight, to the application
+    in-process, or to the server at `url` when given.
+
+    Returns:
+        tuple: The elapsed seconds, and the sorted latencies of the requests in seconds.
+    """
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    if url:
+        # One connection per request in flight, none waiting on the client's pool
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=concurrency))
+    else:
+        transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url=url or "http://benchmark", timeout=None,
+                                 cookies={"session_token": token}) as client:
+        async def send(path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise SystemExit(f"GET {path}: {response.status_code} {response.text[:200]}")
+
+        # Warm up the pools and caches before measuring
+        await asyncio.gather(*(send(path) for path in paths))
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(paths[index % len(paths)]) for index in range(requests)))
+        return time.perf_counter() - started, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput of the application's endpoints.")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="endpoints", help="Requests to send.")
+    parser.add_argument("--requests", type=int, default=10000, help="Requests sent in total.")
+    parser.add_argument("--concurrency", type=int, default=1000, help="Requests in flight at once.")
+    parser.add_argument("--user-id", type=int, default=None, help="User to send the requests as.")
+    parser.add_argument("--url", default=None,
+                        help="Base URL of running workers to send the requests to, instead of in-process.")
+    parser.add_argument("--base-http-middleware", action="store_true",
+                        help="Authenticate through the previous BaseHTTPMiddleware function (in-process only).")
+    parser.add_argument("--download-mib", type=int, default=50, help="Size of the downloaded file, in MiB.")
+    args = parser.parse_args()
+    if args.base_http_middleware and args.url:
+        parser.error("--base-http-middleware only applies in-process.")
+
+    token = session_token(args.user_id)
+
+    app = None
+    if not args.url:
+        from src.main import app
+        if args.base_http_middleware:
+            use_base_http_middleware(app)
+    scenario = SCENARIOS[args.scenario]
+    with scenario(args.download_mib) if scenario is download_paths else scenario() as paths:
+        elapsed, latencies = asyncio.run(run(app, args.url, token, paths, args.requests, args.concurrency))
+
+    if args.scenario == "endpoints":
+        mode = "async (asyncpg)" if settings.DATABASE_ASYNC else "sync (threadpool)"
+    elif args.scenario == "static":
+        mode = f"public paths {settings.AUTH_PUBLIC_PATHS}, token cache TTL {settings.AUTH_TOKEN_CACHE_TTL} s"
+    else:
+        mode = "BaseHTTPMiddleware" if args.base_http_middleware else "ASGI AuthMiddleware"
+    target = args.url or "in-process"
+    print(f"{mode}, {target}: {args.requests} requests, {args.concurrency} concurrent, over {', '.join(paths)}")
+    print(f"{args.requests / elapsed:.0f} requests/s, latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# src/scripts/history_log_benchmark.py
+#
+# Measure the throughput of history logging (`HistoryLogService.log_action`) against the per-entry writes it replaced.
+#
+# Each case logs the same number of stock entries for a privileged user (approved on the spot) and a regular user:
+#   per entry       the previous write path: INSERT and commit per entry, the requester read to check their approval
+#                   privileges, and the entry updated, committed and refreshed again when they have them
+#   queued          `log_action(commit=True)`: the entry is queued for the background writer; also times how long the
+#                   writer takes to write the queue
+#   in transaction  `log_action(commit=False)`, 10 entries per committed transaction
+#
+# The benchmark commits its entries, as the writer writes through its own sessions: it creates two users of its own,
+# and deletes them and their entries at the end.
+#
+# Usage:
+#   python -m src.scripts.history_log_benchmark                  # 2000 entries per case
+#   python -m src.scripts.history_log_benchmark --entries 10000
+
+import argparse
+import threading
+import time
+import uuid
+from datetime import datetime, UTC
+
+from sqlalchemy import event
+
+from src.app.core.database import SessionLocal, engine
+from src.app.core.history_log_writer import history_log_writer
+from src.app.models import HistoryLog, User
+from src.app.services.history_log_service import HistoryLogService
+
+ENTRIES_PER_TRANSACTION = 10
+
+
+def create_users() -> tuple[int, int]:
+    """
+    Create a privileged user and a regular user managed by them.
+
+    Returns:
+        tuple: The IDs of the privileged and the regular user.
+    """
+    run = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        users = [
+            User(employee_id=-int(run[:7], 16) - index, username=f"benchmark-{run}-{role}",
+                 email=f"benchmark-{run}-{role}@example.com", hashed_password="-", role=role,
+                 is_superuser=role == "admin", is_active=True)
+            for index, role in enumerate(("admin", "user"))
+        ]
+        db.add_all(users)
+        db.flush()
+        users[1].direct_manager_id = users[0].id
+        db.commit()
+        return users[0].id, users[1].id
+    finally:
+        db.close()
+
+
+def delete_users(user_ids: tuple[int, int]):
+    db = SessionLocal()
+    try:
+        db.query(HistoryLog).filter(HistoryLog.requested_by.in_(user_ids)).delete(synchronize_session=False)
+        db.query(User).filter(User.id == user_ids[1]).update({"direct_manager_id": None})
+        db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def log_per_entry(db, entity_id: int, requester_id: int):
+    """
+    The previous `log_action(commit=True)`: every entry is written, committed and re-read on its own.
+    """
+    log_entry = HistoryLog(entity="stock", entity_id=entity_id, action="benchmark", requested_by=requester_id,
+                           request_at=datetime.now(UTC))
+    db.add(log_entry)
+    db.commit()
+
+    user = db.query(User).filter(User.id == requester_id).first()
+    if user.is_superuser or user.role == "admin" or user.direct_manager_id is None:
+        entry = db.query(HistoryLog).filter(HistoryLog.id == log_entry.id).first()
+        entry.details = "Done with privileges"
+        entry.approved_by = requester_id
+        entry.approval_at = datetime.now(UTC)
+        db.commit()
+        db.refresh(entry)
+
+
+def log_queued(db, entity_id: int, requester_id: int):
+    HistoryLogService.log_action(db, "stock", entity_id, "benchmark", requester_id)
+
+
+def log_in_transaction(db, entity_id: int, requester_id: int):
+    HistoryLogService.log_action(db, "stock", entity_id, "benchmark", requester_id, commit=False)
+    if entity_id % ENTRIES_PER_TRANSACTION == ENTRIES_PER_TRANSACTION - 1:
+        db.commit()
+
+
+def measure(log, entries: int, requester_id: int) -> tuple[float, int]:
+    """
+    Time logging `entries` entries in this thread and count the statements it sends to the database; the statements
+    of the background writer are not counted.
+
+    Returns:
+        tuple: The elapsed seconds and the number of statements.
+    """
+    statements = 0
+    caller = threading.current_thread()
+
+    def count(*args):
+        nonlocal statements
+        if threading.current_thread() is caller:
+            statements += 1
+
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        started = time.perf_counter()
+        for entity_id in range(entries):
+            log(db, entity_id, requester_id)
+        db.commit()
+        return time.perf_counter() - started, statements
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput of history logging.")
+    parser.add_argument("--entries", type=int, default=2000, help="Entries logged by each case and user.")
+    args = parser.parse_args()
+
+    user_ids = create_users()
+    try:
+        print(f"{args.entries} entries per case and user")
+        for name, log in (("per entry", log_per_entry), ("queued", log_queued),
+                          ("in transaction", log_in_transaction)):
+            for user, requester_id in zip(("privileged", "regular"), user_ids):
+                if log is log_queued:
+                    history_log_writer.start()
+                elapsed, statements = measure(log, args.entries, requester_id)
+                print(f"{name:>14}, {user:>10}: {args.entries / elapsed:9.0f} calls/s "
+                      f"{statements / args.entries:5.2f} statements per entry")
+                if log is log_queued:
+                    # `stop` writes what is still queued
+                    started = time.perf_counter()
+                    history_log_writer.stop()
+                    written = time.perf_counter() - started + elapsed
+                    print(f"{'':>14}  {'':>10}  {args.entries / written:9.0f} entries/s written by the writer")
+    finally:
+        delete_users(user_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# src/scripts/history_log_page_benchmark.py
+#
+# Time the history page (`HistoryLogService.list_page`) on the first page and on a deep page, against the same page
+# read with OFFSET.
+#
+# The entries are inserted inside one transaction that is rolled back at the end: the benchmark leaves no data
+# behind, and can be run against a copy of production data to measure with realistic table and index sizes.
+#
+# Usage:
+#   python -m src.scripts.history_log_page_benchmark                          # 50000 entries, page 40000 rows deep
+#   python -m src.scripts.history_log_page_benchmark --entries 200000 --depth 150000
+
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from src.app.core.database import engine
+from src.app.models import HistoryLog, User
+from src.app.services.history_log_service import HistoryLogService
+from src.app.utils.cursor import encode_cursor
+
+PAGE_SIZE = 10
+
+
+def create_entries(db: Session, entries: int) -> datetime:
+    """
+    Create a requester and `entries` history entries over the last 30 days.
+
+    Returns:
+        datetime: The oldest request time of the entries.
+    """
+    run = uuid.uuid4().hex[:8]
+    user = User(employee_id=-int(run[:7], 16), username=f"benchmark-{run}", email=f"benchmark-{run}@example.com",
+                hashed_password="-", role="admin", is_superuser=True, is_active=True)
+    db.add(user)
+    db.flush()
+
+    now = datetime.now(UTC).replace(tzinfo=None)
+    step = timedelta(days=30) / entries
+    for start in range(0, entries, 5000):
+        db.execute(insert(HistoryLog), [
+            {"entity": "stock", "entity_id": index, "entity_name": str(index), "action": "add",
+             "requested_by": user.id, "requester_name": user.username, "request_at": now - step * index}
+            for index in range(start, min(start + 5000, entries))
+        ])
+    db.execute(text("ANALYZE history_logs"))
+    return now - timedelta(days=30)
+
+
+def median_ms(run, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the first and a deep page of the history page.")
+    parser.add_argument("--entries", type=int, default=50000, help="History entries created.")
+    parser.add_argument("--depth", type=int, default=40000, help="Rows before the deep page.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed reads of each page; the median is shown.")
+    args = parser.parse_args()
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        since = create_entries(db, args.entries)
+        newest_first = (HistoryLog.request_at.desc(), HistoryLog.id.desc())
+        # The cursor a reader paging from the top would hold at that depth
+        last = db.query(HistoryLog.request_at, HistoryLog.id).filter(HistoryLog.request_at >= since).order_by(
+            *newest_first
+        ).offset(args.depth - 1).first()
+        cursor = encode_cursor((last.request_at.isoformat(), last.id))
+
+        def offset_page(offset: int):
+            return db.query(HistoryLog).filter(HistoryLog.request_at >= since).order_by(*newest_first).offset(
+                offset
+            ).limit(PAGE_SIZE).all()
+
+        print(f"{args.entries} entries, pages of {PAGE_SIZE}, median of {args.repeat} reads")
+        for name, run in (
+            ("keyset, first page", lambda: HistoryLogService.list_page(db, since, PAGE_SIZE)),
+            (f"keyset, {args.depth} deep", lambda: HistoryLogService.list_page(db, since, PAGE_SIZE, after=cursor)),
+            ("offset, first page", lambda: offset_page(0)),
+            (f"offset, {args.depth} deep", lambda: offset_page(args.depth)),
+        ):
+            print(f"{name:>22}: {median_ms(run, args.repeat):8.1f} ms")
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
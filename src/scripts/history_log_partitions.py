@@ -0,0 +1,51 @@
+# src/scripts/history_log_partitions.py
+#
+# Maintain the monthly partitions of the `history_logs` table.
+#
+# Usage:
+#   python -m src.scripts.history_log_partitions            # create the coming months' partitions
+#   python -m src.scripts.history_log_partitions --archive  # also archive the partitions past the retention period
+#   python -m src.scripts.history_log_partitions --convert  # partition an existing unpartitioned table (once)
+#   python -m src.scripts.history_log_partitions --backfill-names  # name the entries written before names were kept
+
+import argparse
+
+from src.app.core.database import SessionLocal
+from src.app.services.history_log_partition_service import HistoryLogPartitionService, ARCHIVE_DIR
+from src.app.services.history_log_service import HistoryLogService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the monthly partitions of the history_logs table.")
+    parser.add_argument("--archive", action="store_true",
+                        help=f"Detach the partitions past the retention period and export them to {ARCHIVE_DIR}.")
+    parser.add_argument("--retention-months", type=int, default=None,
+                        help="Months kept before the current one (defaults to HISTORY_LOG_RETENTION_MONTHS).")
+    parser.add_argument("--convert", action="store_true",
+                        help="Copy an unpartitioned history_logs table into a partitioned one. Locks the table.")
+    parser.add_argument("--backfill-names", action="store_true",
+                        help="Fill the entity, requester and approver names of entries written without them.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.convert:
+            copied = HistoryLogPartitionService.convert(db)
+            print("history_logs is already partitioned." if copied < 0 else f"{copied} entries copied.")
+        elif not HistoryLogPartitionService.is_partitioned(db):
+            parser.exit(1, "history_logs is not partitioned; run with --convert first.\n")
+
+        for name in HistoryLogPartitionService.ensure_partitions(db):
+            print(f"created: {name}")
+        if args.backfill_names:
+            print(f"{HistoryLogService.backfill_names(db)} names filled in.")
+        if args.archive:
+            for file_path in HistoryLogPartitionService.archive(db, args.retention_months):
+                print(f"archived: {file_path}")
+        print(f"{len(HistoryLogPartitionService.partitions(db))} partitions.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
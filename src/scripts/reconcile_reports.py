@@ -0,0 +1,34 @@
+# src/scripts/reconcile_reports.py
+#
+# Re-sync the reports catalog with the files in the reports directory, e.g. after files were copied to or removed
+# from the volume outside the application.
+#
+# Usage:
+#   python -m src.scripts.reconcile_reports            # add, remove and update catalog entries
+#   python -m src.scripts.reconcile_reports --dry-run  # report the differences only
+
+import argparse
+
+from src.app.core.database import SessionLocal
+from src.app.services.report_catalog_service import ReportCatalogService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-sync the reports catalog with the reports directory.")
+    parser.add_argument("--dry-run", action="store_true", help="Report the differences without changing the catalog.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        changes = ReportCatalogService.reconcile(db, dry_run=args.dry_run)
+        for change, names in changes.items():
+            for name in names:
+                print(f"{change}: {name}")
+        print(f"{len(changes['added'])} added, {len(changes['removed'])} removed, {len(changes['updated'])} updated"
+              + (" (dry run)." if args.dry_run else "."))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# src/scripts/report_writer_benchmark.py
+#
+# Measure the memory used by `write_report` as the report grows, to check that streaming keeps it flat.
+#
+# Each format is written at increasing row counts (by default up to 1M rows) from a generator of report-like rows,
+# and the peak of the memory allocated while writing is traced (`tracemalloc`). The files are written to a
+# temporary directory and removed. Tracing slows the writes down: the times are for comparison between runs only.
+#
+# Usage:
+#   python -m src.scripts.report_writer_benchmark
+#   python -m src.scripts.report_writer_benchmark --rows 10000 100000 1000000 --formats csv.gz
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.app.utils.report_writer import REPORT_FORMATS, write_report
+
+COLUMNS = ["Item Code", "Description", "Quantity", "Warehouse", "Project"]
+
+
+def report_rows(count: int):
+    for index in range(count):
+        yield {
+            "Item Code": f"ITEM-{index % 20000:06}",
+            "Description": f"Generated item {index % 20000} for the report writer benchmark",
+            "Quantity": index % 997,
+            "Warehouse": f"Warehouse {index % 200}" if index % 2 else "N/A",
+            "Project": f"Project {index % 200}" if not index % 2 else "N/A",
+        }
+
+
+def measure(file_path: str, rows: int, file_format: str) -> tuple[float, int, int]:
+    """
+    Write a report of `rows` rows and trace the memory allocated meanwhile.
+
+    Returns:
+        tuple: The elapsed seconds, the peak of the traced memory in bytes, and the file size in bytes.
+    """
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        write_report(file_path, report_rows(rows), columns=COLUMNS, file_format=file_format)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, os.path.getsize(file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory used to write reports of growing size.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Report sizes to measure, in rows.")
+    parser.add_argument("--formats", nargs="+", default=list(REPORT_FORMATS), choices=list(REPORT_FORMATS),
+                        help="Report formats to measure.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'format':>7} {'rows':>10} {'seconds':>9} {'peak memory':>12} {'file size':>12}")
+        for file_format in args.formats:
+            for rows in args.rows:
+                file_path = os.path.join(directory, f"report.{REPORT_FORMATS[file_format]}")
+                elapsed, peak, size = measure(file_path, rows, file_format)
+                print(f"{file_format:>7} {rows:>10} {elapsed:9.1f} {peak / 2 ** 20:9.2f} MiB {size / 2 ** 20:8.1f} MiB")
+                os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# src/scripts/snapshot_stock_balances.py
+#
+# Snapshot every stock balance so as-of queries only replay the ledger since the last snapshot.
+# Intended to run periodically (e.g. nightly from cron).
+#
+# Usage:
+#   python -m src.scripts.snapshot_stock_balances
+
+from src.app.core.database import SessionLocal
+from src.app.services.stock_movement_service import StockMovementService
+
+
+def main():
+    db = SessionLocal()
+    try:
+        snapshot = StockMovementService.take_snapshot(db)
+        print(f"Snapshot {snapshot.id} taken at {snapshot.taken_at.isoformat()} "
+              f"up to movement {snapshot.last_movement_id}.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# src/scripts/stock_ingest_benchmark.py
+#
+# Compare receiving stock line by line (`StockService.add_stock`, one request per line) with the set-based bulk
+# receipt (`StockService.add_stock_bulk`).
+#
+# Both runs receive the same lines, each into its own new warehouse, so they start from the same state. Everything
+# runs inside one transaction that is rolled back at the end: the benchmark leaves no data behind, and can be run
+# against a copy of production data to measure with realistic table and index sizes.
+#
+# Usage:
+#   python -m src.scripts.stock_ingest_benchmark                          # 10000 lines over 1000 items
+#   python -m src.scripts.stock_ingest_benchmark --lines 1000 --items 100
+
+import argparse
+import time
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.app.core.database import engine
+from src.app.models import Item, Location, User, Warehouse
+from src.app.schemas.stock import StockCreate
+from src.app.services.stock_service import StockService
+
+
+def create_fixtures(db: Session, items: int):
+    """
+    Create the requester, the items and the location of the warehouses received into.
+
+    Returns:
+        tuple: The requester ID, the item IDs and the location ID.
+    """
+    run = uuid.uuid4().hex[:8]
+    user = User(employee_id=-int(run[:7], 16), username=f"benchmark-{run}", email=f"benchmark-{run}@example.com",
+                hashed_password="-", role="admin", is_superuser=True, is_active=True)
+    location = Location(name=f"benchmark-{run}", is_active=True)
+    new_items = [Item(item_code=f"benchmark-{run}-{index}", name=f"Benchmark item {index}", unit_of_measure="pcs",
+                      is_active=True) for index in range(items)]
+    db.add_all([user, location, *new_items])
+    db.flush()
+    return user.id, [item.id for item in new_items], location.id
+
+
+def new_warehouse(db: Session, location_id: int) -> int:
+    warehouse = Warehouse(name=f"benchmark-{uuid.uuid4().hex}", location_id=location_id, is_active=True)
+    db.add(warehouse)
+    db.flush()
+    return warehouse.id
+
+
+def receipt_lines(item_ids: list[int], lines: int, warehouse_id: int) -> list[StockCreate]:
+    # Items repeat once every item has a line, so a receipt both creates and updates stock rows
+    return [
+        StockCreate(item_id=item_ids[index % len(item_ids)], warehouse_id=warehouse_id, quantity=1 + index % 7,
+                    cost_price=10 + index % 5, selling_price=20)
+        for index in range(lines)
+    ]
+
+
+def measure(connection, run) -> tuple[float, int]:
+    """
+    Time `run()` and count the statements it sends to the database.
+
+    Returns:
+        tuple: The elapsed seconds and the number of statements.
+    """
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(connection, "before_cursor_execute", count)
+    try:
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started, statements
+    finally:
+        event.remove(connection, "before_cursor_execute", count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-line and bulk stock receipts.")
+    parser.add_argument("--lines", type=int, default=10000, help="Stock lines received by each run.")
+    parser.add_argument("--items", type=int, default=1000, help="Distinct items among the lines.")
+    args = parser.parse_args()
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    # Every commit of the services releases a savepoint; the outer transaction is rolled back at the end
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        requester_id, item_ids, location_id = create_fixtures(db, args.items)
+
+        lines = receipt_lines(item_ids, args.lines, new_warehouse(db, location_id))
+        per_line = measure(connection, lambda: [StockService.add_stock(line, requester_id, db=db) for line in lines])
+
+        lines = receipt_lines(item_ids, args.lines, new_warehouse(db, location_id))
+        bulk = measure(connection, lambda: StockService.add_stock_bulk(lines, requester_id, db=db))
+
+        print(f"{args.lines} lines over {args.items} items")
+        for name, (elapsed, statements) in (("per line", per_line), ("bulk", bulk)):
+            print(f"{name:>8}: {elapsed:8.3f} s {args.lines / elapsed:10.0f} lines/s {statements:7} statements")
+        print(f" speedup: {per_line[0] / bulk[0]:.1f}x")
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# src/scripts/verify_stock_balances.py
+#
+# Verify the stock_balances rollup against the stocks table and report drift.
+#
+# Usage:
+#   python -m src.scripts.verify_stock_balances            # report drift only
+#   python -m src.scripts.verify_stock_balances --rebuild  # rebuild the rollup from stocks
+
+import argparse
+import sys
+
+from src.app.core.database import SessionLocal
+from src.app.services.stock_balance_service import StockBalanceService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify the stock_balances rollup against the stocks table.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the rollup from the stocks table.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = StockBalanceService.verify(db)
+        for row in drift:
+            print(f"item={row['item_id']} project={row['project_id']} warehouse={row['warehouse_id']}: "
+                  f"stocks={row['stock_quantity']} balance={row['balance_quantity']} "
+                  f"location={row['location_id']} holder location={row['holder_location_id']}")
+        print(f"{len(drift)} balance(s) drifted from the stocks table.")
+
+        if args.rebuild:
+            db.rollback()
+            written = StockBalanceService.rebuild(db)
+            print(f"Rollup rebuilt with {written} balance(s).")
+            return 0
+
+        return 1 if drift else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,7 +18,7 @@ async function fetchReports() {
     reportsTable.innerHTML = "<tr><td colspan='3'>Loading...</td></tr>";
 
     try {
-        const response = await fetch("/reports/list");
+        const response = await fetch("/reports/list?size=100");
         if (response.ok) {
             const reports = await response.json();
              reportsTable.innerHTML = reports.map(report => `
@@ -46,8 +46,14 @@ async function generateReport() {
     try {
         const response = await fetch("/reports/generate", { method: "POST" });
         if (response.ok) {
-            alert("Report generated successfully!");
-            fetchReports();
+            const result = await response.json();
+            const job = await waitForReportJob(result.job);
+            if (job.status === "done") {
+                alert("Report generated successfully!");
+                fetchReports();
+            } else {
+                alert("Error generating report: " + (job.error || "Unknown error"));
+            }
         } else {
             alert("Error generating report.");
         }
@@ -57,6 +63,19 @@ async function generateReport() {
     }
 }
 
+// Poll a background report job until it is done or failed
+async function waitForReportJob(job, interval = 1000) {
+    while (job.status === "queued" || job.status === "running") {
+        await new Promise(resolve => setTimeout(resolve, interval));
+        const response = await fetch(`/reports/jobs/${job.id}`);
+        if (!response.ok) {
+            throw new Error("Failed to fetch report job status.");
+        }
+        job = await response.json();
+    }
+    return job;
+}
+
 // Load reports on page load
 document.addEventListener("DOMContentLoaded", fetchReports);
 
@@ -204,12 +223,12 @@ document.addEventListener("DOMContentLoaded", () => {
     const dynamicReportTableBody = document.getElementById("dynamicReportTableBody");
 
     // Function to fetch and populate the dynamic table
-    async function fetchAndPopulateReportData(url) {
+    async function fetchAndPopulateReportData(url, toRows = result => result["data"]) {
         try {
             const response = await fetch(url);
             if (response.ok) {
                 const result = await response.json();
-                const data = result["data"]
+                const data = toRows(result)
                 console.log(data)
                 if (data.length > 0) {
                     // Generate table headers from object keys
@@ -243,6 +262,26 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     }
 
+    // Flatten the stock rollup into table rows, each item total followed by its totals per holder and location
+    function rollupRows(rollup) {
+        const byItem = new Map();
+        [["warehouses", "warehouse", "Warehouse"], ["projects", "project", "Project"], ["locations", "location", "Location"]]
+            .forEach(([key, name, level]) => rollup[key].forEach(row => {
+                if (!byItem.has(row.item_id)) byItem.set(row.item_id, []);
+                byItem.get(row.item_id).push({"Level": level, "Name": row[name], "Quantity": row.quantity});
+            }));
+
+        const rows = [];
+        rollup.items.forEach(item => {
+            rows.push({"Item Code": item.item_code, "Level": "Item", "Name": "All", "Quantity": item.quantity});
+            (byItem.get(item.item_id) || []).forEach(row => rows.push({"Item Code": item.item_code, ...row}));
+        });
+        if (rows.length > 0) {
+            rows.push({"Item Code": "All", "Level": "Total", "Name": "All", "Quantity": rollup.total});
+        }
+        return rows;
+    }
+
     // Event listener for generating report
     const viewReportButton = document.getElementById("viewReport");
     viewReportButton.addEventListener("click", () => {
@@ -262,7 +301,10 @@ document.addEventListener("DOMContentLoaded", () => {
             url = `/reports/stock/item/${itemId}`;
         }
 
-        if (url) {
+        if (reportType === "stock_rollup_report") {
+            // Every summary level comes from one request
+            fetchAndPopulateReportData("/reports/stock/rollup", rollupRows);
+        } else if (url) {
             fetchAndPopulateReportData(url); // Fetch and populate table
 
         } else {
@@ -0,0 +1,182 @@
+# tests/conftest.py
+#
+# The tests run against the Postgres database of TEST_DATABASE_URL, whose public schema they drop and recreate: never
+# point it at a database holding data. Without it, the tests needing a database are skipped.
+#
+# Usage (from the repository root):
+#   pip install pytest
+#   TEST_DATABASE_URL=postgresql://postgres@localhost/warehouse_test python -m pytest -q
+
+import os
+import shutil
+from contextlib import contextmanager
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+# Settings the application requires but the tests do not use; background threads stay off
+for name, value in {
+    "APP_NAME": "Warehouse Management", "APP_VERSION": "test", "APP_HOST": "localhost", "APP_PORT": "8000",
+    "ENV": "test", "DATABASE_URL": "postgresql://localhost/unused", "POSTGRES_USER": "", "POSTGRES_PASSWORD": "",
+    "POSTGRES_SERVER": "localhost", "POSTGRES_PORT": "5432", "POSTGRES_DB": "", "PGADMIN_DEFAULT_EMAIL": "",
+    "PGADMIN_DEFAULT_PASSWORD": "", "PGADMIN_LISTEN_PORT": "80", "SECRET_KEY": "test", "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60", "CACHE_INVALIDATION_LISTENER": "false", "HISTORY_LOG_WRITER": "false",
+}.items():
+    os.environ.setdefault(name, value)
+
+ASSET_DIRS = ("src/assets/reports", "src/assets/photos")
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """
+    The application's engine, on a freshly created schema.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from sqlalchemy import text
+    import src.app.models  # noqa: F401 (registers every table)
+    from src.app.core.database import Base, engine
+
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE; CREATE SCHEMA public"))
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """
+    A session on emptied tables, with every in-process cache cleared.
+    """
+    from sqlalchemy import text
+    from src.app.core.cache import caches
+    from src.app.core.database import Base, SessionLocal
+
+    tables = ", ".join(table.name for table in Base.metadata.tables.values())
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    for cache in caches.values():
+        cache.invalidate()
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def seed(db):
+    """
+    An admin (id 1), a clerk (id 2) managed by the admin, a location with two warehouses and a project, and five
+    items.
+    """
+    from src.app.models import Item, Location, Project, User, Warehouse
+
+    admin = User(employee_id=1, username="admin", email="admin@example.com", hashed_password="-", role="admin",
+                 is_superuser=True, is_active=True)
+    clerk = User(employee_id=2, username="clerk", email="clerk@example.com", hashed_password="-", role="user",
+                 is_active=True)
+    db.add_all([admin, clerk])
+    db.flush()
+    clerk.direct_manager_id = admin.id
+
+    location = Location(name="Main", is_active=True)
+    db.add(location)
+    db.flush()
+    db.add_all([
+        Warehouse(name="Warehouse 1", location_id=location.id, is_active=True),
+        Warehouse(name="Warehouse 2", location_id=location.id, is_active=True),
+        Project(name="Project 1", location_id=location.id, is_active=True),
+        *[Item(item_code=f"I{index}", name=f"Item {index}", description=f"Item {index}", unit_of_measure="pcs",
+               is_active=True) for index in range(1, 6)],
+    ])
+    db.commit()
+    return db
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+    The application, with the asset directories it serves.
+    """
+    created = [path for path in ASSET_DIRS if not os.path.isdir(path)]
+    for path in created:
+        os.makedirs(path)
+
+    import src.main
+    yield src.main.app
+
+    for path in created:
+        shutil.rmtree(path, ignore_errors=True)
+    if created and os.path.isdir("src/assets") and not os.listdir("src/assets"):
+        os.rmdir("src/assets")
+
+
+@pytest.fixture
+def client_for(app):
+    """
+    Build a test client logged in as a user: `client_for(user_id, username, role)`.
+    """
+    from fastapi.testclient import TestClient
+    from src.app.core.security import create_access_token
+
+    def build(user_id: int, username: str, role: str):
+        client = TestClient(app, follow_redirects=False)
+        client.cookies.set("session_token", create_access_token({"sub": username, "id": user_id, "role": role}))
+        return client
+
+    return build
+
+
+@pytest.fixture
+def count_statements(engine):
+    """
+    Count the statements sent to the database within a block: `with count_statements() as statements:`, then
+    `len(statements)`.
+    """
+    from sqlalchemy import event
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(connection, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counting
+
+
+@pytest.fixture
+def run_async(engine):
+    """
+    Await an async service function on an AsyncSession of the test database: `run_async(func, *args, **kwargs)`
+    passes the session as `db`.
+    """
+    pytest.importorskip("asyncpg")
+    import asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.pool import NullPool
+    from src.app.core.database import make_async_engine
+
+    # Connections are not shared across the event loops of the calls
+    async_engine = make_async_engine(engine.url.set(drivername="postgresql+asyncpg"), poolclass=NullPool)
+
+    def run(func, *args, **kwargs):
+        async def call():
+            async with AsyncSession(async_engine, autoflush=False, expire_on_commit=False) as db:
+                return await func(*args, db=db, **kwargs)
+
+        return asyncio.run(call())
+
+    return run
@@ -0,0 +1,102 @@
+# tests/test_auth.py
+
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from src.app.core import security
+from src.app.core.security import create_access_token, decode_session_token, token_cache
+
+ADMIN_ID = 1
+CLAIMS = {"sub": "admin", "id": ADMIN_ID, "role": "admin"}
+
+
+@pytest.fixture
+def tokens():
+    """
+    The token cache, emptied; `lookups()` returns its (hits, misses) since.
+    """
+    token_cache.invalidate()
+    start = token_cache.stats()
+
+    class Tokens:
+        @staticmethod
+        def size():
+            return token_cache.stats()["size"]
+
+        @staticmethod
+        def lookups():
+            stats = token_cache.stats()
+            return stats["hits"] - start["hits"], stats["misses"] - start["misses"]
+
+    yield Tokens
+    token_cache.invalidate()
+
+
+def signed(claims: dict, key: str = security.SECRET_KEY) -> str:
+    return jwt.encode(claims, key, algorithm=security.ALGORITHM)
+
+
+def test_a_token_is_verified_once(tokens, monkeypatch):
+    token = create_access_token(CLAIMS)
+    decoded = []
+    decode = security.decode_access_token
+    monkeypatch.setattr(security, "decode_access_token", lambda value: decoded.append(value) or decode(value))
+
+    sessions = [decode_session_token(token) for _ in range(3)]
+
+    assert decoded == [token]
+    assert sessions[0] == sessions[2] and sessions[0][:3] == ("admin", "admin", ADMIN_ID)
+
+
+def test_a_cached_token_is_rejected_once_it_expires(tokens, monkeypatch):
+    token = create_access_token(CLAIMS)
+    session = decode_session_token(token)
+
+    # Still cached, but past its expiry
+    monkeypatch.setattr(security.time, "time", lambda: session.expires_at + 1)
+    with pytest.raises(HTTPException) as error:
+        decode_session_token(token)
+    assert (error.value.status_code, error.value.detail) == (401, "Token has expired")
+    assert tokens.lookups() == (1, 1)
+
+
+@pytest.mark.parametrize("token", [
+    "not a token",
+    signed({**CLAIMS, "exp": datetime.now(UTC) + timedelta(minutes=5)}, key="another key"),
+    signed({**CLAIMS, "exp": datetime.now(UTC) - timedelta(minutes=5)}),
+])
+def test_invalid_tokens_are_never_cached(tokens, token):
+    for _ in range(2):
+        with pytest.raises(HTTPException) as error:
+            decode_session_token(token)
+        assert error.value.status_code == 401
+    assert tokens.size() == 0 and tokens.lookups() == (0, 2)
+
+
+@pytest.fixture
+def anonymous(app):
+    return TestClient(app, follow_redirects=False)
+
+
+@pytest.mark.parametrize("cookies", [{}, {"session_token": "not a token"}])
+def test_static_files_bypass_auth(tokens, anonymous, cookies):
+    response = anonymous.get("/static/js/dashboard.js", cookies=cookies)
+    assert response.status_code == 200 and response.text
+    assert tokens.lookups() == (0, 0)
+
+
+@pytest.mark.parametrize("path", ["/photos/1_photo.png", "/reports/files/stocks_report.csv"])
+@pytest.mark.parametrize("cookies", [{}, {"session_token": "not a token"}])
+def test_photos_and_report_files_need_a_login(tokens, anonymous, path, cookies):
+    response = anonymous.get(path, cookies=cookies)
+    assert (response.status_code, response.headers["location"]) == (307, "/login")
+
+
+@pytest.mark.parametrize("path", ["/photos/1_photo.png", "/reports/files/stocks_report.csv"])
+def test_photos_and_report_files_are_served_after_login(tokens, client_for, path):
+    # Past the login, the missing file is the static files' answer
+    assert client_for(ADMIN_ID, "admin", "admin").get(path).status_code == 404
@@ -0,0 +1,90 @@
+# tests/test_auth_middleware.py
+#
+# AuthMiddleware in front of a small app echoing the request state, called through a test client or as raw ASGI.
+
+import asyncio
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.app.core.auth_middleware import AuthMiddleware
+from src.app.core.security import create_access_token
+
+TOKEN = create_access_token({"sub": "clerk", "id": 2, "role": "user"})
+CHUNKS = [b"first", b"second", b"third"]
+
+
+def state(request: Request):
+    return JSONResponse({name: getattr(request.state, name, None) for name in ("user", "role", "user_id")})
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[Route("/items", state), Route("/login", state), Route("/static/app.js", state)])
+    return TestClient(AuthMiddleware(app, public_paths=["/static/"]), follow_redirects=False)
+
+
+@pytest.mark.parametrize("cookies", [{}, {"session_token": "not a token"}])
+def test_requests_without_a_valid_token_are_redirected_to_login(client, cookies):
+    response = client.get("/items", cookies=cookies)
+    assert (response.status_code, response.headers["location"]) == (307, "/login")
+
+
+def test_the_token_sets_the_request_state(client):
+    response = client.get("/items", cookies={"session_token": TOKEN})
+    assert response.json() == {"user": "clerk", "role": "user", "user_id": 2}
+
+
+@pytest.mark.parametrize("cookies, user", [
+    ({}, None),
+    ({"session_token": "not a token"}, None),
+    ({"session_token": TOKEN}, "clerk"),
+])
+def test_login_page_is_served_whatever_the_cookie(client, cookies, user):
+    response = client.get("/login", cookies=cookies)
+    assert response.status_code == 200 and response.json()["user"] == user
+
+
+def test_public_paths_are_served_without_reading_the_cookie(client):
+    response = client.get("/static/app.js", cookies={"session_token": TOKEN})
+    assert response.json() == {"user": None, "role": None, "user_id": None}
+
+
+def test_streamed_bodies_pass_through_as_they_are_sent():
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for index, chunk in enumerate(CHUNKS):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(CHUNKS) - 1})
+            # Each chunk has reached the server before the next one is produced
+            assert sent[-1]["body"] == chunk
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/reports/files/report.csv", "headers": [
+        (b"cookie", f"session_token={TOKEN}".encode()),
+    ]}
+    asyncio.run(AuthMiddleware(app)(scope, receive, send))
+
+    assert [message.get("body") for message in sent] == [None, *CHUNKS]
+    assert scope["state"] == {"user": "clerk", "role": "user", "user_id": 2}
+
+
+def test_other_scopes_pass_through():
+    scopes = []
+
+    async def app(scope, receive, send):
+        scopes.append(scope)
+
+    scope = {"type": "lifespan"}
+    asyncio.run(AuthMiddleware(app)(scope, None, None))
+    assert scopes == [scope] and "state" not in scope
@@ -0,0 +1,103 @@
+# tests/test_cache_invalidation.py
+
+import select
+
+import pytest
+
+from src.app.core import rbac
+from src.app.core.cache_invalidation import CHANNEL, _decode
+from src.app.models import Permission, User
+
+
+@pytest.fixture
+def notifications(engine):
+    """
+    A function returning the (cache, keys) notifications delivered on the invalidation channel so far.
+    """
+    connection = engine.raw_connection()
+    connection.dbapi_connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(f"LISTEN {CHANNEL}")
+
+    def delivered():
+        raw = connection.dbapi_connection
+        select.select([raw], [], [], 1)
+        raw.poll()
+        messages = [_decode(notification.payload) for notification in raw.notifies]
+        raw.notifies.clear()
+        return messages
+
+    yield delivered
+    # The connection goes back to the pool: stop listening so later tests do not see these notifications
+    with connection.cursor() as cursor:
+        cursor.execute(f"UNLISTEN {CHANNEL}")
+    connection.dbapi_connection.notifies.clear()
+    connection.dbapi_connection.autocommit = False
+    connection.close()
+
+
+@pytest.fixture
+def users(seed):
+    db = seed
+    db.add(User(employee_id=3, username="clerk2", email="clerk2@example.com", hashed_password="-", role="user",
+                is_active=True))
+    db.add(Permission(user_id=2, entity="item", entity_id="*", access_type="read"))
+    db.commit()
+    return db
+
+
+def cache_permissions(db, *user_ids):
+    for user_id in user_ids:
+        rbac.get_permission_index(user_id, db)
+    db.info.pop("user_contexts", None)
+
+
+def cached_users():
+    return {key for key in rbac.permission_cache._entries}
+
+
+def test_moved_permission_evicts_both_users(users, notifications):
+    db = users
+    permission = db.query(Permission).one()
+    cache_permissions(db, 1, 2, 3)
+
+    permission.user_id = 3
+    db.commit()
+
+    assert cached_users() == {1}
+    assert ("permissions", [2, 3]) in notifications()
+
+
+def test_change_without_loaded_previous_value_clears_cache(users, notifications):
+    db = users
+    permission = db.query(Permission).one()
+    db.expire(permission, ["user_id"])
+    cache_permissions(db, 1, 2, 3)
+
+    permission.user_id = 3
+    db.commit()
+
+    assert cached_users() == set()
+    assert ("permissions", None) in notifications()
+
+
+def test_bulk_statements_clear_cache(users, notifications):
+    db = users
+    cache_permissions(db, 1, 2, 3)
+
+    db.query(Permission).filter(Permission.user_id == 2).update({Permission.user_id: 3})
+    db.commit()
+
+    assert cached_users() == set()
+    assert ("permissions", None) in notifications()
+
+
+def test_rolled_back_changes_are_not_announced(users, notifications):
+    db = users
+    cache_permissions(db, 1, 2, 3)
+
+    db.query(Permission).delete()
+    db.rollback()
+
+    assert cached_users() == {1, 2, 3}
+    assert notifications() == []
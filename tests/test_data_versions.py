@@ -0,0 +1,62 @@
+# tests/test_data_versions.py
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.app.core.data_versions import get_versions
+from src.app.models import Stock
+from src.app.services import report_cache_service  # noqa: F401 (tracks the versions of the report tables)
+
+STOCK = dict(item_id=1, warehouse_id=1, quantity=1, cost_price=1, selling_price=1)
+
+
+def test_versions_are_bumped_after_the_write_transaction_commits(seed, engine):
+    db = seed
+    before = get_versions(db, ["stocks"])["stocks"]
+    db.commit()
+
+    events = []
+    listeners = {
+        "before_cursor_execute": lambda connection, cursor, statement, *args: events.append(statement.split()[2]),
+        "commit": lambda connection: events.append("COMMIT"),
+    }
+    for name, listener in listeners.items():
+        event.listen(engine, name, listener)
+    try:
+        db.add(Stock(**STOCK))
+        db.commit()
+    finally:
+        for name, listener in listeners.items():
+            event.remove(engine, name, listener)
+
+    # The stock is committed before the counter row is written, in a transaction of its own
+    assert events == ["stocks", "COMMIT", "data_versions", "COMMIT"]
+    assert get_versions(db, ["stocks"])["stocks"] == before + 1
+
+
+def test_rolled_back_writes_are_not_counted(seed):
+    db = seed
+    before = get_versions(db, ["stocks"])["stocks"]
+
+    db.add(Stock(**STOCK))
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert get_versions(db, ["stocks"])["stocks"] == before
+
+
+def test_session_joined_to_a_transaction_bumps_within_it(seed, engine):
+    before = get_versions(seed, ["stocks"])["stocks"]
+    seed.commit()
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+        db.add(Stock(**STOCK))
+        db.commit()
+        assert get_versions(db, ["stocks"])["stocks"] == before + 1
+        db.close()
+        transaction.rollback()
+
+    assert get_versions(seed, ["stocks"])["stocks"] == before
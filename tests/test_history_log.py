@@ -0,0 +1,73 @@
+# tests/test_history_log.py
+
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from src.app.core.history_log_writer import history_log_writer
+from src.app.models import HistoryLog, PendingApproval
+from src.app.services.history_log_service import HistoryLogService
+from src.app.services.pending_approval_service import PendingApprovalService
+
+ADMIN_ID, CLERK_ID, ITEM_ID = 1, 2, 1
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """
+    The rows queued for the background writer, held as if by another worker's writer: never written or flushed here.
+    """
+    rows = []
+    monkeypatch.setattr(history_log_writer, "submit", rows.extend)
+    monkeypatch.setattr(history_log_writer, "flush", lambda: None)
+    return rows
+
+
+def test_approval_request_entry_is_written_with_the_request(seed, queued):
+    db = seed
+    request = PendingApprovalService.submit_approval_request(db, "item", "soft_delete", CLERK_ID, {}, ITEM_ID)
+
+    entry = db.query(HistoryLog).filter(HistoryLog.entity == "item", HistoryLog.entity_id == ITEM_ID).one()
+    assert (entry.action, entry.requested_by, entry.approved_by) == ("soft_delete", CLERK_ID, None)
+    assert queued == []
+
+    result = PendingApprovalService.approval_request(db, request.id, ADMIN_ID, "approve")
+
+    assert result == {"detail": "Request for soft_delete approved successfully"}
+    db.refresh(entry)
+    assert (entry.details, entry.approved_by) == ("soft_delete - approved", ADMIN_ID)
+    assert db.query(PendingApproval).count() == 0
+
+
+def test_approval_updates_the_entry_of_its_own_request(seed, queued):
+    db = seed
+    # An older entry of the same action left unapproved, and an approved entry of the same item
+    stale = HistoryLog(entity="item", entity_id=ITEM_ID, action="archive", requested_by=CLERK_ID,
+                       request_at=datetime.now(UTC) - timedelta(days=1))
+    db.add(stale)
+    db.commit()
+    HistoryLogService.log_action(db, "item", ITEM_ID, "update", ADMIN_ID, commit=False)
+    archive = PendingApprovalService.submit_approval_request(db, "item", "archive", CLERK_ID, {}, ITEM_ID)
+    delete = PendingApprovalService.submit_approval_request(db, "item", "soft_delete", CLERK_ID, {}, ITEM_ID)
+
+    PendingApprovalService.approval_request(db, delete.id, ADMIN_ID, "reject")
+    PendingApprovalService.approval_request(db, archive.id, ADMIN_ID, "approve")
+
+    entries = db.query(HistoryLog).order_by(HistoryLog.id).all()
+    assert [(entry.action, entry.details, entry.approved_by) for entry in entries] == [
+        ("archive", None, None),
+        ("update", "Done with privileges", ADMIN_ID),
+        ("archive", "archive - approved", ADMIN_ID),
+        ("soft_delete", "soft_delete - rejected", ADMIN_ID),
+    ]
+
+
+@pytest.mark.parametrize("commit", [True, False])
+def test_log_action_returns_the_entry(seed, queued, commit):
+    db = seed
+    entry = HistoryLogService.log_action(db, "item", ITEM_ID, "update", ADMIN_ID, {"name": "Item 1"}, commit=commit)
+
+    assert isinstance(entry, HistoryLog)
+    assert (entry.entity, entry.entity_id, entry.entity_name, entry.action) == ("item", ITEM_ID, "I1", "update")
+    assert (entry.requested_by, entry.approved_by, entry.details) == (ADMIN_ID, ADMIN_ID, "Done with privileges")
+    assert entry not in db
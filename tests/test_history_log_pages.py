@@ -0,0 +1,123 @@
+# tests/test_history_log_pages.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from src.app.models import HistoryLog, Item, Location
+from src.app.services.history_log_service import HistoryLogService
+from src.app.utils.cursor import encode_cursor
+
+ADMIN_ID, CLERK_ID, ITEM_ID, LOCATION_ID = 1, 2, 1, 1
+
+NOW = datetime.now().replace(microsecond=0)
+SINCE = NOW - timedelta(days=30)
+
+
+@pytest.fixture
+def entries(seed):
+    """
+    Seven entries, three of them requested at the same time. Listed newest first, and by id among those, they are
+    1, 4, 3, 2, 5, 6; entry 7, of 40 days ago, is outside the listed window.
+    """
+    db = seed
+    times = [NOW - timedelta(hours=1), NOW - timedelta(hours=2), NOW - timedelta(hours=2), NOW - timedelta(hours=2),
+             NOW - timedelta(hours=3), NOW - timedelta(hours=4), NOW - timedelta(days=40)]
+    db.add_all([HistoryLog(entity="stock", entity_id=index, action="add", requested_by=CLERK_ID, request_at=at)
+                for index, at in enumerate(times)])
+    db.commit()
+    return db
+
+
+def page_ids(page) -> list[int]:
+    return [row.id for row in page["logs"]]
+
+
+def test_cursors_walk_every_entry_once_in_both_directions(entries):
+    db = entries
+
+    pages = [HistoryLogService.list_page(db, SINCE, size=2)]
+    while pages[-1]["next_cursor"]:
+        pages.append(HistoryLogService.list_page(db, SINCE, size=2, after=pages[-1]["next_cursor"]))
+
+    assert [page_ids(page) for page in pages] == [[1, 4], [3, 2], [5, 6]]
+    assert pages[0]["prev_cursor"] is None and pages[-1]["next_cursor"] is None
+
+    # Back from the last page to the first
+    back = [pages[-1]]
+    while back[-1]["prev_cursor"]:
+        back.append(HistoryLogService.list_page(db, SINCE, size=2, before=back[-1]["prev_cursor"]))
+    assert [page_ids(page) for page in back] == [[5, 6], [3, 2], [1, 4]]
+    assert back[-1]["prev_cursor"] is None and back[-1]["next_cursor"]
+
+
+def test_a_page_can_end_among_entries_of_the_same_time(entries):
+    db = entries
+    first = HistoryLogService.list_page(db, SINCE, size=3)
+    second = HistoryLogService.list_page(db, SINCE, size=3, after=first["next_cursor"])
+
+    assert (page_ids(first), page_ids(second)) == ([1, 4, 3], [2, 5, 6])
+    assert page_ids(HistoryLogService.list_page(db, SINCE, size=3, before=second["prev_cursor"])) == [1, 4, 3]
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor(["yesterday", 1]), encode_cursor([NOW, "one"]),
+                                    encode_cursor([NOW.isoformat()])])
+def test_invalid_cursor_is_a_bad_request(entries, client_for, cursor):
+    db = entries
+    for direction in ("after", "before"):
+        with pytest.raises(HTTPException) as error:
+            HistoryLogService.list_page(db, SINCE, **{direction: cursor})
+        assert (error.value.status_code, error.value.detail) == (400, "Invalid cursor.")
+
+    response = client_for(ADMIN_ID, "admin", "admin").get("/history_logs/", params={"after": cursor})
+    assert response.status_code == 400
+
+
+def test_names_are_captured_at_write_time(seed):
+    db = seed
+    HistoryLogService.log_action(db, "item", ITEM_ID, "update", CLERK_ID, commit=False)
+    HistoryLogService.log_action(db, "location", LOCATION_ID, "update", ADMIN_ID, commit=False)
+    HistoryLogService.log_action(db, "stock", 42, "add", ADMIN_ID, commit=False)
+    db.commit()
+    HistoryLogService.approval_log_action(db, "item", ITEM_ID, ADMIN_ID, "update - approved", action="update")
+
+    # Renaming the entities later leaves the entries as written
+    db.query(Item).filter(Item.id == ITEM_ID).update({"item_code": "RENAMED"})
+    db.query(Location).filter(Location.id == LOCATION_ID).update({"name": "Renamed"})
+    db.commit()
+
+    rows = HistoryLogService.list_page(db, SINCE)["logs"]
+    assert [(row.entity_display_name, row.requester_name, row.approver_name) for row in rows[::-1]] == [
+        ("I1", "clerk", "admin"),
+        ("Main", "admin", "admin"),
+        ("42", "admin", "admin"),
+    ]
+
+
+def test_backfill_names_fills_the_entries_written_without_them(seed):
+    db = seed
+    db.add_all([
+        HistoryLog(entity="item", entity_id=ITEM_ID, action="update", requested_by=CLERK_ID, approved_by=ADMIN_ID,
+                   request_at=NOW),
+        # A permanently deleted item is named from its metadata
+        HistoryLog(entity="item", entity_id=99, action="delete_permanent", requested_by=ADMIN_ID,
+                   entity_metadata={"item_code": "GONE"}, request_at=NOW),
+        HistoryLog(entity="stock", entity_id=7, action="add", requested_by=CLERK_ID, request_at=NOW),
+        # Names already captured are kept
+        HistoryLog(entity="item", entity_id=ITEM_ID, entity_name="Old", action="update", requested_by=CLERK_ID,
+                   requester_name="old clerk", request_at=NOW),
+    ])
+    db.commit()
+
+    # Entity names of the first three entries, requester names of the first three, approver name of the first
+    assert HistoryLogService.backfill_names(db) == 7
+
+    rows = db.query(HistoryLog).order_by(HistoryLog.id).all()
+    assert [(row.entity_name, row.requester_name, row.approver_name) for row in rows] == [
+        ("I1", "clerk", "admin"),
+        ("GONE", "admin", None),
+        ("7", "clerk", None),
+        ("Old", "old clerk", None),
+    ]
+    assert HistoryLogService.backfill_names(db) == 0
@@ -0,0 +1,167 @@
+# tests/test_history_log_partitions.py
+
+import csv
+import gzip
+import os
+from datetime import datetime, time, UTC
+
+import pytest
+from sqlalchemy import text
+
+from src.app.models import HistoryLog
+from src.app.services import history_log_partition_service
+from src.app.services.history_log_partition_service import (HistoryLogPartitionService, DEFAULT_PARTITION,
+                                                            add_months, month_start, partition_name)
+
+CLERK_ID, ITEM_ID = 2, 1
+
+CURRENT = month_start(datetime.now(UTC))
+
+LEGACY_TABLE = """
+    CREATE TABLE history_logs (
+        id SERIAL PRIMARY KEY,
+        entity VARCHAR NOT NULL,
+        entity_id INTEGER,
+        entity_metadata JSONB,
+        action VARCHAR NOT NULL,
+        details TEXT,
+        requested_by INTEGER NOT NULL REFERENCES users (id),
+        request_at TIMESTAMP,
+        approved_by INTEGER REFERENCES users (id),
+        approval_at TIMESTAMP
+    );
+    CREATE INDEX ix_history_logs_id ON history_logs (id)
+"""
+
+
+def drop_partitions(db):
+    for attached in (True, False):
+        for name, _ in HistoryLogPartitionService.partitions(db, attached):
+            db.execute(text(f"DROP TABLE {name}"))
+    db.commit()
+
+
+@pytest.fixture
+def partitions(seed, engine):
+    """
+    `history_logs` with its default partition only, restored to the application's table afterwards.
+    """
+    db = seed
+    drop_partitions(db)
+    yield db
+    db.rollback()
+    if not HistoryLogPartitionService.is_partitioned(db):
+        db.execute(text("DROP TABLE IF EXISTS history_logs, history_logs_unpartitioned CASCADE"))
+        db.commit()
+        HistoryLog.__table__.create(bind=engine)
+    drop_partitions(db)
+
+
+def log_in(db, *months, entity_id: int = ITEM_ID):
+    db.add_all([HistoryLog(entity="stock", entity_id=entity_id, action="add", requested_by=CLERK_ID,
+                           request_at=datetime.combine(month, time(12))) for month in months])
+    db.commit()
+
+
+def row_partitions(db) -> dict[int, str]:
+    return dict(db.execute(text("SELECT id, tableoid::regclass::text FROM history_logs")).all())
+
+
+def test_ensure_partitions_moves_stray_rows_out_of_the_default_partition(partitions):
+    db = partitions
+    stray = add_months(CURRENT, -3)
+    log_in(db, stray, stray, CURRENT)
+    assert set(row_partitions(db).values()) == {DEFAULT_PARTITION}
+
+    created = HistoryLogPartitionService.ensure_partitions(db, months_ahead=1)
+
+    assert created == [partition_name(stray), partition_name(CURRENT), partition_name(add_months(CURRENT, 1))]
+    assert row_partitions(db) == {1: partition_name(stray), 2: partition_name(stray), 3: partition_name(CURRENT)}
+    assert db.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar() == 0
+
+    # Nothing left to create
+    assert HistoryLogPartitionService.ensure_partitions(db, months_ahead=1) == []
+
+
+def archived_ids(file_path: str) -> list[int]:
+    with gzip.open(file_path, "rt", encoding="utf-8", newline="") as file:
+        return [int(row["id"]) for row in csv.DictReader(file)]
+
+
+def test_archive_exports_and_drops_only_the_partitions_past_retention(partitions, tmp_path):
+    db = partitions
+    old, older, kept = add_months(CURRENT, -13), add_months(CURRENT, -14), add_months(CURRENT, -12)
+    HistoryLogPartitionService.ensure_partitions(db, months_ahead=0, months=[older, old, kept])
+    log_in(db, older, old, old, kept, CURRENT)
+
+    files = HistoryLogPartitionService.archive(db, retention_months=12, archive_dir=str(tmp_path))
+
+    assert files == [f"{tmp_path}/{partition_name(older)}.csv.gz", f"{tmp_path}/{partition_name(old)}.csv.gz"]
+    assert [archived_ids(file_path) for file_path in files] == [[1], [2, 3]]
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(file_path) for file_path in files)
+    assert HistoryLogPartitionService.partitions(db) == [(partition_name(kept), kept),
+                                                         (partition_name(CURRENT), CURRENT)]
+    assert HistoryLogPartitionService.partitions(db, attached=False) == []
+    assert sorted(row_partitions(db)) == [4, 5]
+
+
+def test_archive_picks_up_a_partition_left_detached(partitions, tmp_path, monkeypatch):
+    db = partitions
+    old = add_months(CURRENT, -13)
+    HistoryLogPartitionService.ensure_partitions(db, months_ahead=0, months=[old])
+    log_in(db, old, CURRENT)
+
+    def failing_open(*args, **kwargs):
+        raise OSError("disk full")
+
+    # The export fails once the partition is detached
+    monkeypatch.setattr(history_log_partition_service.gzip, "open", failing_open)
+    with pytest.raises(OSError):
+        HistoryLogPartitionService.archive(db, retention_months=12, archive_dir=str(tmp_path))
+    db.rollback()
+    assert HistoryLogPartitionService.partitions(db, attached=False) == [(partition_name(old), old)]
+    assert os.listdir(tmp_path) == []
+
+    monkeypatch.undo()
+    files = HistoryLogPartitionService.archive(db, retention_months=12, archive_dir=str(tmp_path))
+
+    assert [archived_ids(file_path) for file_path in files] == [[1]]
+    assert HistoryLogPartitionService.partitions(db, attached=False) == []
+    assert HistoryLogPartitionService.partitions(db) == [(partition_name(CURRENT), CURRENT)]
+
+
+def test_convert_keeps_the_rows_and_the_id_sequence(partitions):
+    db = partitions
+    db.execute(text("DROP TABLE history_logs CASCADE"))
+    db.execute(text(LEGACY_TABLE))
+    approved = datetime.combine(add_months(CURRENT, -2), time(9))
+    db.execute(text("""
+        INSERT INTO history_logs (id, entity, entity_id, action, requested_by, request_at, approved_by, approval_at)
+        VALUES (1, 'item', :item_id, 'update', :clerk_id, :requested, NULL, NULL),
+               (2, 'stock', 10, 'add', :clerk_id, NULL, 1, :approved),
+               (7, 'stock', 11, 'add', :clerk_id, NULL, NULL, NULL)
+    """), {"item_id": ITEM_ID, "clerk_id": CLERK_ID, "requested": datetime.combine(CURRENT, time(8)),
+           "approved": approved})
+    db.execute(text("SELECT setval('history_logs_id_seq', 7)"))
+    db.commit()
+
+    assert HistoryLogPartitionService.convert(db) == 3
+
+    assert HistoryLogPartitionService.is_partitioned(db)
+    rows = {entry.id: entry for entry in db.query(HistoryLog)}
+    assert sorted(rows) == [1, 2, 7]
+    assert (rows[1].request_at, rows[1].entity_name, rows[1].requester_name) == (
+        datetime.combine(CURRENT, time(8)), "I1", "clerk"
+    )
+    # Rows without a request time are filed under their approval time, or the conversion time
+    assert (rows[2].request_at, rows[2].approver_name, rows[2].entity_name) == (approved, "admin", "10")
+    assert month_start(rows[7].request_at) == CURRENT
+    assert row_partitions(db)[2] == partition_name(add_months(CURRENT, -2))
+    assert db.execute(text("SELECT to_regclass('history_logs_unpartitioned')")).scalar() is None
+
+    # New entries continue the id sequence
+    db.add(HistoryLog(entity="stock", entity_id=12, action="add", requested_by=CLERK_ID))
+    db.commit()
+    assert max(entry.id for entry in db.query(HistoryLog)) == 8
+
+    assert HistoryLogPartitionService.convert(db) == -1
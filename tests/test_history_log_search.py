@@ -0,0 +1,111 @@
+# tests/test_history_log_search.py
+
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from src.app.core.config import get_settings
+from src.app.models import HistoryLog, PendingApproval
+
+ADMIN_ID, CLERK_ID = 1, 2
+
+NOW = datetime.now().replace(microsecond=0)
+# Outside the default window of the search
+OLD = NOW - timedelta(days=get_settings().HISTORY_LOG_DEFAULT_DAYS + 10)
+
+SUPPLIER_PATH = '$.supplier ? (@ like_regex "^X")'
+
+
+@pytest.fixture
+def entries(seed):
+    db = seed
+    metadata = [
+        ({"warehouse_id": 12, "quantity": 3}, NOW - timedelta(hours=3)),
+        ({"warehouse_id": 13, "supplier": "X Corp"}, NOW - timedelta(hours=2)),
+        ({"warehouse_id": 12, "supplier": "X Ltd"}, NOW - timedelta(hours=1)),
+        ({"supplier": "Y Corp"}, NOW),
+        (None, NOW),
+        ({"warehouse_id": 12}, OLD),
+    ]
+    db.add_all([HistoryLog(entity="stock", entity_id=index, action="add", requested_by=CLERK_ID, request_at=at,
+                           entity_metadata=value) for index, (value, at) in enumerate(metadata, 1)])
+    db.add_all([
+        PendingApproval(entity="item", action="create", requested_by=CLERK_ID, requested_at=NOW - timedelta(hours=1),
+                        new_value={"item_code": "A1", "supplier": "X Corp"}),
+        PendingApproval(entity="item", entity_id=1, action="update", requested_by=CLERK_ID, requested_at=NOW,
+                        new_value={"supplier": "Y Corp"}),
+    ])
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def admin(client_for):
+    return client_for(ADMIN_ID, "admin", "admin")
+
+
+def search(client, **params) -> list[int]:
+    response = client.get("/history_logs/search", params=params)
+    assert response.status_code == 200, response.text
+    return [entry["id"] for entry in response.json()["data"]]
+
+
+def test_containment(entries, admin):
+    assert search(admin, contains='{"warehouse_id": 12}') == [3, 1]
+    assert search(admin, contains='{"warehouse_id": 12, "supplier": "X Ltd"}') == [3]
+    assert search(admin, contains='{"warehouse_id": 99}') == []
+
+
+def test_jsonpath(entries, admin):
+    assert search(admin, path=SUPPLIER_PATH) == [3, 2]
+    assert search(admin, path="$.quantity ? (@ > 2)") == [1]
+    # Both filters apply
+    assert search(admin, contains='{"warehouse_id": 13}', path=SUPPLIER_PATH) == [2]
+
+
+@pytest.mark.parametrize("params, detail", [
+    ({"path": "$.supplier ? (@ =="}, "Invalid jsonpath."),
+    ({"contains": "warehouse 12"}, "contains must be a JSON object or array."),
+    ({"contains": "12"}, "contains must be a JSON object or array."),
+    ({"source": "invoices"}, "Unknown source: invoices"),
+    ({"cursor": "not a cursor"}, "Invalid cursor."),
+])
+def test_invalid_filters_are_bad_requests(entries, admin, params, detail):
+    response = admin.get("/history_logs/search", params=params)
+    assert (response.status_code, response.json()["detail"]) == (400, detail)
+
+
+def test_pending_approvals_source(entries, admin):
+    response = admin.get("/history_logs/search", params={"source": "pending_approvals", "path": SUPPLIER_PATH})
+    (approval,) = response.json()["data"]
+    assert (approval["action"], approval["new_value"], approval["status"]) == (
+        "create", {"item_code": "A1", "supplier": "X Corp"}, "pending"
+    )
+    assert len(search(admin, source="pending_approvals", contains='{"supplier": "Y Corp"}')) == 1
+
+
+def test_default_time_window(entries, admin):
+    # The entry older than the default window is only found with an explicit `since`
+    assert search(admin, contains='{"warehouse_id": 12}') == [3, 1]
+    assert search(admin, contains='{"warehouse_id": 12}', since=(OLD - timedelta(days=1)).isoformat()) == [3, 1, 6]
+    # `until` is excluded
+    assert search(admin, contains='{"warehouse_id": 12}', until=(NOW - timedelta(hours=1)).isoformat()) == [1]
+
+
+def test_next_cursor_continues_the_search(entries, admin):
+    first = admin.get("/history_logs/search", params={"path": "$.supplier", "limit": 2}).json()
+    assert [entry["id"] for entry in first["data"]] == [4, 3] and first["next_cursor"]
+
+    rest = admin.get("/history_logs/search", params={"path": "$.supplier", "cursor": first["next_cursor"]}).json()
+    assert [entry["id"] for entry in rest["data"]] == [2] and rest["next_cursor"] is None
+
+
+def test_pending_approval_is_stamped_when_requested(seed):
+    # The default used to be evaluated once, at import, stamping every request with the process start time
+    db = seed
+    before = datetime.now(UTC).replace(tzinfo=None)
+    pending = PendingApproval(entity="item", action="create", requested_by=CLERK_ID, new_value={})
+    db.add(pending)
+    db.commit()
+
+    assert before <= pending.requested_at <= datetime.now(UTC).replace(tzinfo=None)
@@ -0,0 +1,108 @@
+# tests/test_history_log_timelines.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from src.app.models import HistoryLog
+from src.app.services.history_log_service import HistoryLogService
+
+ADMIN_ID, CLERK_ID, ITEM_ID = 1, 2, 1
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+def hours_ago(hours: int) -> datetime:
+    return NOW - timedelta(hours=hours)
+
+
+@pytest.fixture
+def entries(seed):
+    """
+    Entries 1 to 4 are item 1's, 2 and 3 requested at the same time; the admin approved 1, 3 and 5 in the order 3, 5,
+    1, unlike the order they were requested in.
+    """
+    db = seed
+    db.add_all([
+        HistoryLog(entity="item", entity_id=ITEM_ID, action="create", requested_by=CLERK_ID, request_at=hours_ago(5),
+                   approved_by=ADMIN_ID, approval_at=hours_ago(1)),
+        HistoryLog(entity="item", entity_id=ITEM_ID, action="update", requested_by=CLERK_ID, request_at=hours_ago(4)),
+        HistoryLog(entity="item", entity_id=ITEM_ID, action="archive", requested_by=ADMIN_ID, request_at=hours_ago(4),
+                   approved_by=ADMIN_ID, approval_at=hours_ago(4)),
+        HistoryLog(entity="item", entity_id=ITEM_ID, action="restore", requested_by=CLERK_ID, request_at=hours_ago(3)),
+        HistoryLog(entity="item", entity_id=2, action="update", requested_by=CLERK_ID, request_at=hours_ago(2),
+                   approved_by=ADMIN_ID, approval_at=hours_ago(2)),
+    ])
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def admin(client_for):
+    return client_for(ADMIN_ID, "admin", "admin")
+
+
+TIMELINES = {
+    f"/history_logs/timeline/entity/item/{ITEM_ID}": [4, 3, 2, 1],
+    f"/history_logs/timeline/requester/{CLERK_ID}": [5, 4, 2, 1],
+    # Most recently approved first, unapproved entries left out
+    f"/history_logs/timeline/approver/{ADMIN_ID}": [1, 5, 3],
+}
+
+
+@pytest.mark.parametrize("url", TIMELINES)
+def test_timeline_streams_its_entries_newest_first(entries, admin, url):
+    response = admin.get(url)
+
+    assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+    assert [entry["id"] for entry in response.json()["data"]] == TIMELINES[url]
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.parametrize("url", TIMELINES)
+def test_next_cursor_continues_the_timeline(entries, admin, url):
+    ids, cursor = [], None
+    while True:
+        page = admin.get(url, params={"limit": 1, **({"cursor": cursor} if cursor else {})}).json()
+        ids += [entry["id"] for entry in page["data"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        assert len(page["data"]) == 1
+
+    assert ids == TIMELINES[url]
+
+
+def test_timeline_entries_carry_their_names_and_times(entries, admin):
+    entry = admin.get(f"/history_logs/timeline/approver/{ADMIN_ID}", params={"limit": 1}).json()["data"][0]
+    assert (entry["id"], entry["entity"], entry["entity_id"], entry["action"]) == (1, "item", ITEM_ID, "create")
+    assert (entry["request_at"], entry["approval_at"]) == (hours_ago(5).isoformat(), hours_ago(1).isoformat())
+
+
+def test_invalid_cursor_or_timeline_is_a_bad_request(entries, admin):
+    response = admin.get(f"/history_logs/timeline/requester/{CLERK_ID}", params={"cursor": "not a cursor"})
+    assert (response.status_code, response.json()["detail"]) == (400, "Invalid cursor.")
+
+    with pytest.raises(HTTPException) as error:
+        HistoryLogService.stream_timeline("department", 1)
+    assert error.value.status_code == 400
+
+
+def test_timelines_are_admin_only(entries, client_for):
+    clerk = client_for(CLERK_ID, "clerk", "user")
+    assert clerk.get(f"/history_logs/timeline/requester/{CLERK_ID}").status_code == 403
+
+
+def test_legacy_getters_return_the_timelines(entries):
+    # They used to order by a column that does not exist, failing on every call
+    db = entries
+
+    def ids(logs):
+        return [log.id for log in logs]
+
+    assert ids(HistoryLogService.get_logs_by_entity(db, "item", ITEM_ID)) == [4, 3, 2, 1]
+    assert ids(HistoryLogService.get_logs_by_requester(db, CLERK_ID)) == [5, 4, 2, 1]
+    assert ids(HistoryLogService.get_logs_by_approver(db, ADMIN_ID)) == [1, 5, 3]
+    assert ids(HistoryLogService.get_all_logs(db)) == [5, 4, 3, 2, 1]
+    assert ids(HistoryLogService.get_all_logs(db, limit=2)) == [5, 4]
@@ -0,0 +1,71 @@
+# tests/test_item_service.py
+
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from src.app.core.database import run_db
+from src.app.models import Item
+from src.app.services.item_service import ItemService
+
+ADMIN_ID, ITEM_ID = 1, 1
+
+
+def photo(name: str, content: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=name, headers=Headers({"content-type": "image/png"}))
+
+
+def test_async_reads_match_the_sync_ones(seed, run_async):
+    db = seed
+    assert run_async(ItemService.get_item_async, ITEM_ID).item_code == ItemService.get_item(ITEM_ID, db=db).item_code
+    assert ([item.id for item in run_async(ItemService.list_items_async, ADMIN_ID)] ==
+            [item.id for item in ItemService.list_items(ADMIN_ID, db=db)])
+
+
+@pytest.mark.parametrize("archived, detail", [(True, "Item is archived"), (False, "Item not found")])
+def test_get_item_of_an_inactive_item_is_not_found(seed, run_async, archived, detail):
+    db = seed
+    db.query(Item).filter(Item.id == ITEM_ID).update({"is_active": False, "is_archived": archived})
+    db.commit()
+
+    for get in (lambda: ItemService.get_item(ITEM_ID, db=db), lambda: run_async(ItemService.get_item_async, ITEM_ID)):
+        with pytest.raises(HTTPException) as error:
+            get()
+        assert (error.value.status_code, error.value.detail) == (404, detail)
+
+    # A missing item is not found either, rather than failing on its archived flag
+    with pytest.raises(HTTPException) as error:
+        run_async(ItemService.get_item_async, 99)
+    assert error.value.detail == "Item not found"
+
+
+def test_async_photo_upload_replaces_the_previous_file(seed, run_async, tmp_path, monkeypatch):
+    db = seed
+    monkeypatch.chdir(tmp_path)
+
+    run_async(ItemService.upload_item_photo_async, ITEM_ID, photo("first.png", b"first"))
+    run_async(ItemService.upload_item_photo_async, ITEM_ID, photo("second.png", b"second"))
+
+    db.expire_all()
+    assert db.get(Item, ITEM_ID).photo == os.path.join("photos", f"{ITEM_ID}_second.png")
+    assert os.listdir("src/assets/photos") == [f"{ITEM_ID}_second.png"]
+    with open(f"src/assets/photos/{ITEM_ID}_second.png", "rb") as file:
+        assert file.read() == b"second"
+
+
+def test_run_db_awaits_the_async_variant_on_an_async_session(seed, run_async):
+    async def list_items_async(user_id, db):
+        return ["async"]
+
+    async def call(db):
+        return await run_db(db, ItemService.list_items, ADMIN_ID, async_func=list_items_async)
+
+    assert run_async(call) == ["async"]
+    # A sync session still runs the sync function
+    assert asyncio.run(run_db(seed, ItemService.list_items, ADMIN_ID, async_func=list_items_async)) == (
+        ItemService.list_items(ADMIN_ID, db=seed)
+    )
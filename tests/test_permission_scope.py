@@ -0,0 +1,114 @@
+# tests/test_permission_scope.py
+#
+# The clerk (id 2) holds stock of item 1 in warehouse 1, item 2 in warehouse 2 and item 3 in project 1; the grants of
+# each test decide which of them the clerk sees.
+
+import pytest
+
+from src.app.core.permission_scope import PermissionScope
+from src.app.models import Permission, Stock, StockBalance, User
+from src.app.models.permission import AccessType
+from src.app.services.item_service import ItemService
+
+CLERK_ID = 2
+HOLDERS = {1: {"warehouse_id": 1}, 2: {"warehouse_id": 2}, 3: {"project_id": 1}}
+
+
+@pytest.fixture
+def stocked(seed):
+    db = seed
+    db.add_all([
+        *[Stock(item_id=item_id, quantity=item_id, cost_price=1, selling_price=1, **holder)
+          for item_id, holder in HOLDERS.items()],
+        *[StockBalance(item_id=item_id, location_id=1, quantity=item_id, **holder)
+          for item_id, holder in HOLDERS.items()],
+    ])
+    db.commit()
+    return db
+
+
+def grant(db, *grants):
+    db.add_all([Permission(user_id=CLERK_ID, entity=entity, entity_id=entity_id, access_type=access_type)
+                for entity, entity_id, access_type in grants])
+    db.commit()
+
+
+def visible_stock(db) -> list[int]:
+    query = PermissionScope.apply(db.query(Stock.item_id), db, CLERK_ID, PermissionScope.stocks)
+    return sorted(item_id for item_id, in query)
+
+
+def visible_items(db) -> list[int]:
+    return [item.id for item in ItemService.list_items(CLERK_ID, db=db)]
+
+
+def test_no_grants_see_nothing(stocked):
+    db = stocked
+    assert visible_stock(db) == [] and visible_items(db) == []
+
+
+@pytest.mark.parametrize("grants, stock, items", [
+    # A wildcard entity matches the id on any entity
+    ([("*", "1", AccessType.READ)], [1, 3], [1]),
+    # A wildcard id matches every row of the entity
+    ([("warehouse", "*", AccessType.READ)], [1, 2], []),
+    ([("item", "*", AccessType.READ)], [], [1, 2, 3, 4, 5]),
+    ([("*", "*", AccessType.READ)], [1, 2, 3], [1, 2, 3, 4, 5]),
+    ([("project", "1", AccessType.READ), ("warehouse", "2", AccessType.READ), ("item", "4", AccessType.READ)],
+     [2, 3], [4]),
+])
+def test_wildcard_grants(stocked, grants, stock, items):
+    db = stocked
+    grant(db, *grants)
+    assert visible_stock(db) == stock and visible_items(db) == items
+
+
+@pytest.mark.parametrize("access_type, visible", [
+    # Any access type whose methods include GET reads
+    (AccessType.READ, True),
+    (AccessType.EXPORT, True),
+    (AccessType.MANAGE, True),
+    (AccessType.ALL, True),
+    (AccessType.WRITE, False),
+    (AccessType.CREATE, False),
+    (AccessType.DELETE, False),
+    (AccessType.APPROVE, False),
+])
+def test_grants_read_only_with_get(stocked, access_type, visible):
+    db = stocked
+    grant(db, ("warehouse", "1", access_type), ("item", "1", access_type))
+    assert visible_stock(db) == ([1] if visible else [])
+    assert visible_items(db) == ([1] if visible else [])
+
+
+@pytest.mark.parametrize("role, is_superuser", [("admin", False), ("user", True)])
+def test_admins_and_superusers_are_unrestricted(stocked, role, is_superuser):
+    db = stocked
+    db.query(User).filter(User.id == CLERK_ID).update({"role": role, "is_superuser": is_superuser})
+    db.commit()
+
+    assert PermissionScope.is_unrestricted(db, CLERK_ID)
+    assert visible_stock(db) == [1, 2, 3] and visible_items(db) == [1, 2, 3, 4, 5]
+
+
+def test_async_item_list_is_scoped(stocked, run_async):
+    db = stocked
+    grant(db, ("item", "2", AccessType.READ))
+    assert [item.id for item in run_async(ItemService.list_items_async, CLERK_ID)] == [2]
+
+
+def test_dashboard_counts_only_readable_rows(stocked, client_for):
+    db = stocked
+    grant(db, ("warehouse", "2", AccessType.READ), ("project", "1", AccessType.EXPORT))
+
+    metrics = client_for(CLERK_ID, "clerk", "user").get("/dashboard/metrics").json()
+    assert metrics == {
+        "total_items": 0,
+        "total_warehouses": 1,
+        "total_projects": 1,
+        "total_stock": 5,
+        "stock_distribution": {"Warehouse 2": 2, "Project 1": 3},
+    }
+
+    admin = client_for(1, "admin", "admin").get("/dashboard/metrics").json()
+    assert (admin["total_items"], admin["total_warehouses"], admin["total_stock"]) == (5, 2, 6)
@@ -0,0 +1,62 @@
+# tests/test_rbac.py
+
+import pytest
+
+from src.app.core import rbac
+from src.app.models import Permission
+
+ADMIN_ID, CLERK_ID = 1, 2
+
+
+@pytest.fixture
+def clerk(seed):
+    db = seed
+    db.add(Permission(user_id=CLERK_ID, entity="*", entity_id="*", access_type="create"))
+    db.commit()
+    return db
+
+
+def permission_lookups():
+    return rbac.permission_cache.hits + rbac.permission_cache.misses
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_request_looks_up_permissions_once(clerk, client_for, count_statements, cached):
+    client = client_for(CLERK_ID, "clerk", "user")
+    if cached:
+        rbac.get_permission_index(CLERK_ID, clerk)
+
+    # The permission check, the approval request and its history entry all read the clerk's permissions
+    lookups = permission_lookups()
+    with count_statements() as statements:
+        response = client.post("/items/add", json={"item_code": "I6", "name": "Item 6", "description": "Item 6",
+                                                   "unit_of_measure": "pcs"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["requested_by"] == CLERK_ID
+    assert permission_lookups() - lookups == 1
+    assert sum("FROM permissions" in statement for statement in statements) == (0 if cached else 1)
+
+
+def test_moved_permission_is_read_again_for_both_users(clerk):
+    db = clerk
+    permission = db.query(Permission).one()
+    assert rbac.has_permission(db, CLERK_ID, "items", "1", "post")
+
+    permission.user_id = ADMIN_ID
+    db.flush()
+
+    assert not rbac.has_permission(db, CLERK_ID, "items", "1", "post")
+    assert ("*", "*", "create") in rbac.get_permissions_for_user(ADMIN_ID, db)
+
+
+def test_permission_moved_from_an_unloaded_user_is_read_again(clerk):
+    db = clerk
+    permission = db.query(Permission).one()
+    assert rbac.has_permission(db, CLERK_ID, "items", "1", "post")
+    db.expire(permission, ["user_id"])
+
+    permission.user_id = ADMIN_ID
+    db.flush()
+
+    assert not rbac.has_permission(db, CLERK_ID, "items", "1", "post")
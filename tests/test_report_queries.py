@@ -0,0 +1,82 @@
+# tests/test_report_queries.py
+#
+# Each stock report is built from one joined statement: the statements sent while building a report do not grow
+# with the number of stock rows.
+
+import pytest
+from sqlalchemy import func
+
+from src.app.models import Stock, StockBalance
+from src.app.services.report_query_service import ReportQueryService
+from src.app.services.report_service import ReportService
+from src.app.services.stock_service import StockService
+
+WAREHOUSE_ID, PROJECT_ID, LOCATION_ID = 1, 1, 1
+
+
+def add_stocks(db, count: int):
+    # Alternately held by a warehouse and by the project, over the five seeded items; the balances are rebuilt
+    for index in range(db.query(Stock).count(), count):
+        db.add(Stock(item_id=index % 5 + 1, warehouse_id=None if index % 2 else WAREHOUSE_ID,
+                     project_id=PROJECT_ID if index % 2 else None, quantity=1, cost_price=1, selling_price=1))
+    db.query(StockBalance).delete()
+    db.flush()
+    for item_id, warehouse_id, project_id, quantity in (
+        db.query(Stock.item_id, Stock.warehouse_id, Stock.project_id, func.sum(Stock.quantity))
+        .group_by(Stock.item_id, Stock.warehouse_id, Stock.project_id)
+    ):
+        db.add(StockBalance(item_id=item_id, warehouse_id=warehouse_id, project_id=project_id,
+                            location_id=LOCATION_ID, quantity=quantity))
+    db.commit()
+
+
+REPORT_ROWS = {
+    "stock entity": lambda db: ReportQueryService.stock_entity_rows(db, ["item_id", "warehouse_id", "quantity"]),
+    "stock summary": ReportQueryService.stock_summary_rows,
+    "location stocks": lambda db: ReportQueryService.stock_holder_rows(db, StockService.location_filter(LOCATION_ID)),
+    "warehouse stocks": lambda db: ReportQueryService.stock_holder_rows(db, Stock.warehouse_id == WAREHOUSE_ID),
+    "item holders": lambda db: ReportQueryService.item_holder_rows(db, 1),
+    "holders per location": lambda db: ReportQueryService.entity_type_rows(db, "location"),
+}
+
+
+@pytest.mark.parametrize("report", REPORT_ROWS)
+def test_report_rows_take_one_statement(seed, count_statements, report):
+    db = seed
+    add_stocks(db, 50)
+    rows = REPORT_ROWS[report](db)
+
+    with count_statements() as statements:
+        streamed = list(ReportQueryService.stream(rows))
+    assert streamed and len(statements) == 1
+
+    with count_statements() as statements:
+        page = ReportQueryService.page(rows, limit=10)
+    assert page["data"] and len(statements) == 1
+
+
+REPORTS = {
+    "entity report": lambda db: ReportService.entity_report("stock", 1, db, "csv", generate_file=True),
+    "stock report": lambda db: ReportService.generate_stock_report(db, "csv", 1),
+    "location report": lambda db: ReportService.get_stock_by_entity_and_id("location", LOCATION_ID, db, "csv", 1,
+                                                                           generate_file=True),
+    "warehouse report": lambda db: ReportService.get_stock_by_entity_and_id("warehouse", WAREHOUSE_ID, db, "csv", 1,
+                                                                            generate_file=True),
+}
+
+
+@pytest.mark.parametrize("report", REPORTS)
+def test_report_statements_do_not_grow_with_rows(app, seed, count_statements, report):
+    db = seed
+    # Warm the reference data caches, whose lookups are not repeated by later reports
+    add_stocks(db, 1)
+    REPORTS[report](db)
+
+    counts = []
+    for stocks in (10, 200):
+        add_stocks(db, stocks)
+        with count_statements() as statements:
+            REPORTS[report](db)
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
@@ -0,0 +1,35 @@
+# tests/test_report_writer.py
+
+import csv
+import gzip
+
+import pytest
+from openpyxl import load_workbook
+
+from src.app.utils.report_writer import write_report
+
+
+def read_report(file_path: str, file_format: str) -> list[list]:
+    if file_format == "xlsx":
+        return [list(row) for row in load_workbook(file_path, read_only=True).active.iter_rows(values_only=True)]
+    opener = gzip.open if file_format == "csv.gz" else open
+    with opener(file_path, "rt", newline="", encoding="utf-8") as file:
+        return [[int(value) if value.isdigit() else value for value in row] for row in csv.reader(file)]
+
+
+@pytest.mark.parametrize("file_format", ["xlsx", "csv", "csv.gz"])
+def test_concurrent_writers_of_a_report_do_not_share_a_temporary_file(tmp_path, file_format):
+    file_path = str(tmp_path / f"report.{file_format}")
+
+    def rows(name: str, count: int, during=None):
+        for index in range(count):
+            if during and index == count // 2:
+                # Another writer regenerates the same report while this one is half-way through
+                during()
+            yield {"writer": name, "row": index}
+
+    inner = lambda: write_report(file_path, rows("inner", 3), file_format=file_format)
+    assert write_report(file_path, rows("outer", 10, during=inner), file_format=file_format) == 10
+
+    assert read_report(file_path, file_format) == [["writer", "row"], *[["outer", index] for index in range(10)]]
+    assert [path.name for path in tmp_path.iterdir()] == [f"report.{file_format}"]
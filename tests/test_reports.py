@@ -0,0 +1,128 @@
+# tests/test_reports.py
+#
+# The GET reports return a page of rows without writing the report file: a missing or stale file is left to a report
+# job, run here by hand instead of in a report process.
+
+import os
+import shutil
+from concurrent.futures import Future
+
+import pytest
+
+from src.app.models import ReportJob, Stock, StockBalance
+from src.app.models.report_job import ReportJobStatus
+from src.app.services import report_job_service
+from src.app.services.report_cache_service import CACHE_DIR
+
+ADMIN_ID, ITEM_ID, WAREHOUSE_ID = 1, 1, 1
+
+REPORT_URLS = {
+    "/reports/stock": "stocks_report.csv",
+    "/reports/stock/item/1": "item_I1_stock_report.csv",
+    "/reports/stock/warehouse": "warehouses_stock_report.csv",
+    "/reports/stock/warehouse/1": "Warehouse 1_stock_report.csv",
+}
+
+
+class QueuedJobs:
+    """
+    Stands in for the report processes: jobs stay queued until `run`.
+    """
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, func, *args):
+        self.submitted.append((func, args))
+        return Future()
+
+    def run(self):
+        for func, args in self.submitted:
+            func(*args)
+        self.submitted.clear()
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    queued = QueuedJobs()
+    monkeypatch.setattr(report_job_service, "get_executor", lambda: queued)
+    return queued
+
+
+@pytest.fixture
+def stocked(seed):
+    # The data versions restart with the emptied tables: forget the reports cached by other tests
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    db = seed
+    db.add_all([
+        *[Stock(item_id=item_id, warehouse_id=WAREHOUSE_ID, quantity=item_id, cost_price=1, selling_price=1)
+          for item_id in range(1, 6)],
+        *[StockBalance(item_id=item_id, warehouse_id=WAREHOUSE_ID, location_id=1, quantity=item_id)
+          for item_id in range(1, 6)],
+    ])
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def admin(client_for):
+    return client_for(ADMIN_ID, "admin", "admin")
+
+
+def report_file(name: str) -> str:
+    return os.path.join("src/assets/reports", name)
+
+
+@pytest.mark.parametrize("url", REPORT_URLS)
+def test_report_file_is_left_to_a_job(stocked, jobs, admin, url):
+    file_path = report_file(REPORT_URLS[url])
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+    first = admin.get(url, params={"format": "csv"}).json()
+    assert first["data"] and first["job"]["status"] == "queued"
+    assert first["file_url"] == f"/reports/files/{REPORT_URLS[url]}"
+    assert not os.path.exists(file_path)
+
+    # An identical request joins the queued job
+    again = admin.get(url, params={"format": "csv"}).json()
+    assert again["job"]["id"] == first["job"]["id"] and len(jobs.submitted) == 1
+
+    jobs.run()
+    job = admin.get(f"/reports/jobs/{first['job']['id']}").json()
+    assert (job["status"], job["file_url"]) == ("done", first["file_url"])
+    assert os.path.exists(file_path)
+
+    # The file is up to date: no job
+    done = admin.get(url, params={"format": "csv"}).json()
+    assert done["job"] is None and done["data"] == first["data"] and not jobs.submitted
+
+
+def test_changed_data_submits_a_new_job(stocked, jobs, admin):
+    url = "/reports/stock/warehouse/1"
+    admin.get(url, params={"format": "csv"})
+    jobs.run()
+
+    db = stocked
+    db.query(Stock).filter(Stock.item_id == ITEM_ID).update({"quantity": 10})
+    db.commit()
+
+    response = admin.get(url, params={"format": "csv"}).json()
+    assert response["job"]["status"] == "queued" and len(jobs.submitted) == 1
+    assert db.query(ReportJob).filter(ReportJob.status == ReportJobStatus.DONE).count() == 1
+
+
+def test_continuation_pages_leave_the_file_alone(stocked, jobs, admin, count_statements):
+    url = "/reports/stock/warehouse/1"
+    first = admin.get(url, params={"format": "csv", "limit": 2}).json()
+    assert first["job"] and first["next_cursor"]
+
+    db = stocked
+    db.query(Stock).filter(Stock.item_id == ITEM_ID).update({"quantity": 10})
+    db.commit()
+
+    # The data changed since the job was submitted, yet paging neither checks the file nor submits a job
+    with count_statements() as statements:
+        page = admin.get(url, params={"format": "csv", "limit": 2, "cursor": first["next_cursor"]}).json()
+    assert len(page["data"]) == 2 and "job" not in page and len(jobs.submitted) == 1
+    assert not [statement for statement in statements if "data_versions" in statement]
@@ -0,0 +1,67 @@
+# tests/test_stock_indexes.py
+#
+# The stock hot-path indexes: created by the create-index step, and used by the hot queries on a production-sized
+# dataset (EXPLAIN only: the queries are not run).
+
+import pytest
+from sqlalchemy import inspect, text
+
+from src.scripts import stock_indexes
+
+STOCK_ROWS = 1_000_000
+ITEMS = 20_000
+HOLDERS = 200
+
+
+@pytest.fixture
+def large_dataset(seed):
+    db = seed
+    user_id, location_id = 1, 1
+    db.execute(text(
+        "INSERT INTO items (item_code, name, unit_of_measure, is_active) "
+        "SELECT 'G' || g, 'Generated ' || g, 'pcs', true FROM generate_series(1, :items) g"
+    ), {"items": ITEMS})
+    for table in ("warehouses", "projects"):
+        db.execute(text(
+            f"INSERT INTO {table} (name, location_id, is_active) "
+            f"SELECT '{table} ' || g, :location_id, true FROM generate_series(1, :holders) g"
+        ), {"holders": HOLDERS, "location_id": location_id})
+
+    # Half of the rows held by warehouses, half by projects
+    holder = "CASE WHEN g % 2 = 0 THEN NULL ELSE g % :holders + 1 END, CASE WHEN g % 2 = 0 THEN g % :holders + 1 END"
+    db.execute(text(
+        f"INSERT INTO stocks (item_id, warehouse_id, project_id, quantity, cost_price, selling_price) "
+        f"SELECT g % :items + 1, {holder}, 1, 1, 1 FROM generate_series(1, :rows) g"
+    ), {"items": ITEMS, "holders": HOLDERS, "rows": STOCK_ROWS})
+    db.execute(text(
+        f"INSERT INTO stock_movements (item_id, warehouse_id, project_id, movement_type, quantity_delta, "
+        f"balance_after, moved_by, moved_at) "
+        f"SELECT g % :items + 1, {holder}, 'ADD', 1, 1, :user_id, now() FROM generate_series(1, :rows) g"
+    ), {"items": ITEMS, "holders": HOLDERS, "rows": STOCK_ROWS, "user_id": user_id})
+    db.execute(text(
+        "INSERT INTO stock_balances (item_id, warehouse_id, project_id, location_id, quantity) "
+        "SELECT item_id, warehouse_id, project_id, :location_id, sum(quantity) FROM stocks "
+        "GROUP BY item_id, warehouse_id, project_id"
+    ), {"location_id": location_id})
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+    return db
+
+
+def index_names(db, table_name: str) -> set:
+    return {index["name"] for index in inspect(db.connection()).get_indexes(table_name)}
+
+
+def test_create_indexes_builds_missing_indexes(db):
+    db.execute(text("DROP INDEX ix_stock_item_holder, ix_stock_warehouse_item, ix_stock_project_item"))
+    db.commit()
+
+    stock_indexes.create_indexes()
+
+    db.rollback()
+    assert {"ix_stock_item_holder", "ix_stock_warehouse_item", "ix_stock_project_item"} <= index_names(db, "stocks")
+
+
+def test_hot_queries_use_indexes(large_dataset):
+    assert stock_indexes.scanned_tables(large_dataset) == dict.fromkeys(stock_indexes.hot_queries(large_dataset), [])
@@ -0,0 +1,134 @@
+# tests/test_stock_service.py
+
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from src.app.models import HistoryLog, Stock, StockBalance, StockMovement
+from src.app.models.stock_movement import MovementType
+from src.app.schemas.stock import StockCreate, StockDeduct, StockTransfer
+from src.app.services.stock_service import StockService
+
+ADMIN_ID, ITEM_ID, WAREHOUSE_ID, OTHER_WAREHOUSE_ID = 1, 1, 1, 2
+
+
+@pytest.fixture
+def two_costs(seed):
+    """
+    Warehouse 1 holding the item in two rows: 4 at 10 received first, then 6 at 20.
+    """
+    db = seed
+    db.add_all([
+        Stock(item_id=ITEM_ID, warehouse_id=WAREHOUSE_ID, quantity=4, cost_price=10, selling_price=30,
+              updated_at=datetime(2026, 1, 1)),
+        Stock(item_id=ITEM_ID, warehouse_id=WAREHOUSE_ID, quantity=6, cost_price=20, selling_price=30,
+              updated_at=datetime(2026, 2, 1)),
+        StockBalance(item_id=ITEM_ID, warehouse_id=WAREHOUSE_ID, location_id=1, quantity=10),
+    ])
+    db.commit()
+    return db
+
+
+def movements(db) -> list[tuple]:
+    return [(movement.movement_type, movement.warehouse_id, movement.quantity_delta, movement.cost_price)
+            for movement in db.query(StockMovement).order_by(StockMovement.id)]
+
+
+def test_deduction_spanning_rows_records_their_weighted_cost(two_costs):
+    db = two_costs
+    StockService.deduct_stock(StockDeduct(item_id=ITEM_ID, warehouse_id=WAREHOUSE_ID, quantity=6, selling_price=30),
+                              ADMIN_ID, db=db)
+
+    # 4 at 10 from the oldest row, then 2 at 20
+    assert movements(db) == [(MovementType.DEDUCT, WAREHOUSE_ID, -6, pytest.approx((4 * 10 + 2 * 20) / 6))]
+    assert [(stock.quantity, stock.cost_price) for stock in db.query(Stock)] == [(4, 20)]
+
+
+def test_transfer_moves_the_cost_of_the_rows_taken(two_costs):
+    db = two_costs
+    stock = StockService.transfer_stock(
+        StockTransfer(item_id=ITEM_ID, from_warehouse_id=WAREHOUSE_ID, to_warehouse_id=OTHER_WAREHOUSE_ID,
+                      quantity=8, selling_price=30),
+        ADMIN_ID, db=db,
+    )
+
+    cost = (4 * 10 + 4 * 20) / 8
+    assert (stock.warehouse_id, stock.quantity, stock.cost_price) == (OTHER_WAREHOUSE_ID, 8, pytest.approx(cost))
+    assert movements(db) == [
+        (MovementType.TRANSFER_OUT, WAREHOUSE_ID, -8, pytest.approx(cost)),
+        (MovementType.TRANSFER_IN, OTHER_WAREHOUSE_ID, 8, pytest.approx(cost)),
+    ]
+
+
+def test_async_deduction_and_transfer_match_the_sync_ones(two_costs, run_async):
+    db = two_costs
+    updated = run_async(StockService.deduct_stock_async,
+                        StockDeduct(item_id=ITEM_ID, warehouse_id=WAREHOUSE_ID, quantity=6, selling_price=30),
+                        ADMIN_ID)
+    assert [(stock.quantity, stock.cost_price) for stock in updated] == [(4, 20)]
+
+    stock = run_async(StockService.transfer_stock_async,
+                      StockTransfer(item_id=ITEM_ID, from_warehouse_id=WAREHOUSE_ID,
+                                    to_warehouse_id=OTHER_WAREHOUSE_ID, quantity=3, selling_price=30),
+                      ADMIN_ID)
+    assert (stock.warehouse_id, stock.quantity, stock.cost_price) == (OTHER_WAREHOUSE_ID, 3, 20)
+
+    assert movements(db) == [
+        (MovementType.DEDUCT, WAREHOUSE_ID, -6, pytest.approx((4 * 10 + 2 * 20) / 6)),
+        (MovementType.TRANSFER_OUT, WAREHOUSE_ID, -3, 20),
+        (MovementType.TRANSFER_IN, OTHER_WAREHOUSE_ID, 3, 20),
+    ]
+    assert sorted((balance.warehouse_id, balance.quantity) for balance in db.query(StockBalance)) == [
+        (WAREHOUSE_ID, 1), (OTHER_WAREHOUSE_ID, 3),
+    ]
+    assert db.query(HistoryLog).filter(HistoryLog.entity == "stock").count() == 4
+
+
+def test_async_receipts_match_the_sync_ones(seed, run_async):
+    db = seed
+    line = dict(item_id=ITEM_ID, warehouse_id=WAREHOUSE_ID, cost_price=10, selling_price=30)
+    stock = run_async(StockService.add_stock_async, StockCreate(**line, quantity=2), ADMIN_ID)
+    assert (stock.quantity, stock.cost_price) == (2, 10)
+
+    stocks = run_async(StockService.add_stock_bulk_async, [
+        StockCreate(**line, quantity=2),
+        StockCreate(**{**line, "cost_price": 40}, quantity=4),
+        StockCreate(**{**line, "warehouse_id": OTHER_WAREHOUSE_ID}, quantity=5),
+    ], ADMIN_ID)
+
+    assert [(stock.warehouse_id, stock.quantity, stock.cost_price) for stock in stocks] == [
+        (WAREHOUSE_ID, 8, 25), (OTHER_WAREHOUSE_ID, 5, 10),
+    ]
+    assert [movement[2] for movement in movements(db)] == [2, 2, 4, 5]
+    assert sorted((balance.warehouse_id, balance.quantity) for balance in db.query(StockBalance)) == [
+        (WAREHOUSE_ID, 8), (OTHER_WAREHOUSE_ID, 5),
+    ]
+
+
+@pytest.mark.parametrize("name, kwargs", [
+    ("get_stock_by_location_or_project_or_warehouse", {"location_id": 1}),
+    ("get_stock_by_location_or_project_or_warehouse", {"warehouse_id": WAREHOUSE_ID}),
+    ("get_stock_of_item_by_location_or_project_or_warehouse", {"item_id": ITEM_ID, "location_id": 1}),
+    ("get_item_location_and_qty", {"item_id": ITEM_ID}),
+    ("get_total_stock_by_item", {"item_id": ITEM_ID}),
+])
+def test_async_reads_match_the_sync_ones(two_costs, run_async, name, kwargs):
+    db = two_costs
+    expected = getattr(StockService, name)(db, **kwargs)
+    result = run_async(getattr(StockService, f"{name}_async"), **kwargs)
+
+    if isinstance(expected, list) and expected and isinstance(expected[0], Stock):
+        expected, result = [stock.id for stock in expected], [stock.id for stock in result]
+    assert result == expected
+
+
+def test_async_reads_raise_the_sync_errors(seed, run_async):
+    with pytest.raises(HTTPException) as error:
+        run_async(StockService.get_total_stock_by_item_async, item_id=99)
+    assert (error.value.status_code, error.value.detail) == (404, "Item not found")
+
+    with pytest.raises(HTTPException) as error:
+        run_async(StockService.get_stock_of_item_by_location_or_project_or_warehouse_async, item_id=ITEM_ID,
+                  warehouse_id=WAREHOUSE_ID)
+    assert (error.value.status_code, error.value.detail) == (404, "No stock found for the specified criteria")